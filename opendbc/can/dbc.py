@@ -36,7 +36,7 @@ class SignalType:
   VOLKSWAGEN_MLB_CHECKSUM = 13
 
 
-@dataclass
+@dataclass(slots=True)
 class Signal:
   name: str
   start_bit: int
@@ -51,7 +51,7 @@ class Signal:
   calc_checksum: 'Callable[[int, Signal, bytearray], int] | None' = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Msg:
   name: str
   address: int
@@ -59,7 +59,7 @@ class Msg:
   sigs: dict[str, Signal]
 
 
-@dataclass
+@dataclass(slots=True)
 class Val:
   name: str
   address: int
@@ -174,7 +174,7 @@ def tesla_setup_signal(sig: Signal, dbc_name: str, line_num: int) -> None:
     sig.calc_checksum = tesla_checksum
 
 
-@dataclass
+@dataclass(slots=True)
 class ChecksumState:
   checksum_type: int
   calc_checksum: Callable[[int, Signal, bytearray], int] | None
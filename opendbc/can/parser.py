@@ -1,14 +1,24 @@
 import math
 import numbers
+import pickle
 from collections import defaultdict, deque
-from dataclasses import dataclass, field
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields
+from typing import TypeVar, cast
 
 from opendbc.car.carlog import carlog
-from opendbc.can.dbc import DBC, Signal
+from opendbc.can.dbc import DBC, Msg, Signal
+from opendbc.can.views import ViewUpdater, attribute_names, view_class, view_updater
 
 
 MAX_BAD_COUNTER = 5
 CAN_INVALID_CNT = 5
+FREQUENCY_WINDOW = 500
+
+# MessageState fields fixed by the DBC or set up by the parser, not part of a snapshot
+_STATIC_STATE_FIELDS = ("address", "name", "size", "signals", "signal_names", "view", "update_view")
+
+T = TypeVar("T")
 
 
 def get_raw_value(dat: bytes | bytearray, sig: Signal) -> int:
@@ -26,12 +36,13 @@ def get_raw_value(dat: bytes | bytearray, sig: Signal) -> int:
   return ret
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageState:
   address: int
   name: str
   size: int
-  signals: list[Signal]
+  signals: tuple[Signal, ...]
+  signal_names: tuple[str, ...]
   ignore_alive: bool = False
   ignore_checksum: bool = False
   ignore_counter: bool = False
@@ -39,11 +50,14 @@ class MessageState:
   timeout_threshold: float = 1e5  # default to 1Hz threshold
   vals: list[float] = field(default_factory=list)
   all_vals: list[list[float]] = field(default_factory=list)
-  timestamps: deque[int] = field(default_factory=lambda: deque(maxlen=500))
+  last_nanos: int | None = None
+  timestamps: deque[int] | None = None  # only kept while learning the frequency
   counter: int = 0
   counter_fail: int = 0
   first_seen_nanos: int = 0
   last_warning_log_nanos: int = 0
+  view: object | None = None
+  update_view: ViewUpdater | None = None
 
   def rate_limited_log(self, last_update_nanos: int, msg: str) -> None:
     if (last_update_nanos - self.last_warning_log_nanos) >= 1_000_000_000:
@@ -79,21 +93,22 @@ class MessageState:
     if checksum_failed or counter_failed:
       return False
 
-    if not self.vals:
-      self.vals = [0.0] * len(self.signals)
-      self.all_vals = [[] for _ in self.signals]
-
-    for i, v in enumerate(tmp_vals):
-      self.vals[i] = v
-      self.all_vals[i].append(v)
-
-    self.timestamps.append(nanos)
-
-    if self.frequency < 1e-5 and len(self.timestamps) >= 3:
-      dt = (self.timestamps[-1] - self.timestamps[0]) * 1e-9
-      if (dt > 1.0 or (self.timestamps.maxlen is not None and len(self.timestamps) >= self.timestamps.maxlen)) and dt != 0:
-        self.frequency = min(len(self.timestamps) / dt, 100.0)
-        self.timeout_threshold = (1_000_000_000 / self.frequency) * 10
+    self.vals = tmp_vals
+    for all_vals, v in zip(self.all_vals, tmp_vals, strict=True):
+      all_vals.append(v)
+
+    self.last_nanos = nanos
+
+    if self.frequency < 1e-5:
+      if self.timestamps is None:
+        self.timestamps = deque(maxlen=FREQUENCY_WINDOW)
+      self.timestamps.append(nanos)
+      if len(self.timestamps) >= 3:
+        dt = (self.timestamps[-1] - self.timestamps[0]) * 1e-9
+        if (dt > 1.0 or len(self.timestamps) >= FREQUENCY_WINDOW) and dt != 0:
+          self.frequency = min(len(self.timestamps) / dt, 100.0)
+          self.timeout_threshold = (1_000_000_000 / self.frequency) * 10
+          self.timestamps = None
     return True
 
   def update_counter(self, cur_count: int, cnt_size: int) -> bool:
@@ -107,13 +122,32 @@ class MessageState:
   def valid(self, current_nanos: int, bus_timeout: bool) -> bool:
     if self.ignore_alive:
       return True
-    if not self.timestamps:
+    if self.last_nanos is None:
       return False
-    if (current_nanos - self.timestamps[-1]) > self.timeout_threshold:
+    if (current_nanos - self.last_nanos) > self.timeout_threshold:
       return False
     return True
 
 
+class SignalTimestamps(Mapping):
+  """Timestamps of a message's signals. All signals are updated together, so they share the message's last timestamp"""
+  __slots__ = ("state",)
+
+  def __init__(self, state: MessageState):
+    self.state = state
+
+  def __getitem__(self, name: str) -> int:
+    if name not in self.state.signal_names:
+      raise KeyError(name)
+    return self.state.last_nanos or 0
+
+  def __iter__(self):
+    return iter(self.state.signal_names)
+
+  def __len__(self) -> int:
+    return len(self.state.signal_names)
+
+
 class VLDict(dict):
   def __init__(self, parser):
     super().__init__()
@@ -133,15 +167,13 @@ class CANParser:
 
     self.vl: dict[int | str, dict[str, float]] = VLDict(self)
     self.vl_all: dict[int | str, dict[str, list[float]]] = {}
-    self.ts_nanos: dict[int | str, dict[str, int]] = {}
+    self.ts_nanos: dict[int | str, Mapping[str, int]] = {}
+    self.views: dict[int | str, object] = {}
     self.addresses: set[int] = set()
     self.message_states: dict[int, MessageState] = {}
 
     for name_or_addr, freq in messages:
-      if isinstance(name_or_addr, numbers.Number):
-        msg = self.dbc.addr_to_msg.get(int(name_or_addr))
-      else:
-        msg = self.dbc.name_to_msg.get(name_or_addr)
+      msg = self._get_msg(name_or_addr)
       if msg is None:
         raise RuntimeError(f"could not find message {name_or_addr!r} in DBC {dbc_name}")
       if msg.address in self.addresses:
@@ -153,31 +185,33 @@ class CANParser:
     self.last_nonempty_nanos: int = 0
     self._last_update_nanos: int = 0
 
-  def _add_message(self, name_or_addr: str | int, freq: int | None = None) -> None:
+  def _get_msg(self, name_or_addr: str | int) -> Msg | None:
     if isinstance(name_or_addr, numbers.Number):
-      msg = self.dbc.addr_to_msg.get(int(name_or_addr))
-    else:
-      msg = self.dbc.name_to_msg.get(name_or_addr)
+      return self.dbc.addr_to_msg.get(int(name_or_addr))
+    return self.dbc.name_to_msg.get(name_or_addr)
+
+  def _add_message(self, name_or_addr: str | int, freq: int | None = None) -> None:
+    msg = self._get_msg(name_or_addr)
     assert msg is not None
     assert msg.address not in self.addresses
 
     self.addresses.add(msg.address)
-    signal_names = list(msg.sigs.keys())
-    signals_dict = {s: 0.0 for s in signal_names}
-    dict.__setitem__(self.vl, msg.address, signals_dict)
-    dict.__setitem__(self.vl, msg.name, signals_dict)
-    self.vl_all[msg.address] = defaultdict(list)
-    self.vl_all[msg.name] = self.vl_all[msg.address]
-    self.ts_nanos[msg.address] = {s: 0 for s in signal_names}
-    self.ts_nanos[msg.name] = self.ts_nanos[msg.address]
-
     state = MessageState(
       address=msg.address,
       name=msg.name,
       size=msg.size,
-      signals=list(msg.sigs.values()),
+      signals=tuple(msg.sigs.values()),
+      signal_names=tuple(msg.sigs),
       ignore_alive=freq is not None and math.isnan(freq),
+      all_vals=[[] for _ in msg.sigs],
     )
+
+    # the address and name keys share one entry, vl_all holds the state's value history lists
+    signals_dict = dict.fromkeys(state.signal_names, 0.0)
+    dict.__setitem__(self.vl, msg.address, signals_dict)
+    dict.__setitem__(self.vl, msg.name, signals_dict)
+    self.vl_all[msg.address] = self.vl_all[msg.name] = dict(zip(state.signal_names, state.all_vals, strict=True))
+    self.ts_nanos[msg.address] = self.ts_nanos[msg.name] = SignalTimestamps(state)
     if freq is not None and freq > 0:
       state.frequency = freq
     else:
@@ -187,6 +221,36 @@ class CANParser:
 
     self.message_states[msg.address] = state
 
+  def view(self, name_or_addr: str | int, cls: type[T] | None = None) -> T:
+    """Attribute view of a message with one attribute per signal, updated whenever the message is parsed.
+
+    The view's class is generated from the DBC unless cls is given, which must have the message's signals as its
+    __slots__, in order. A message has one view, asking for it again with a different cls raises ValueError.
+    See opendbc.can.views"""
+    view = self.views.get(name_or_addr)
+    if view is not None:
+      if cls is not None and type(view) is not cls:
+        raise ValueError(f"{name_or_addr} already has a {type(view).__name__} view in {self.dbc_name}, not {cls.__name__}")
+      return cast(T, view)
+
+    msg = self._get_msg(name_or_addr)
+    if msg is None:
+      raise KeyError(name_or_addr)
+    if msg.address not in self.message_states:
+      self._add_message(msg.address)
+    state = self.message_states[msg.address]
+
+    names = attribute_names(msg)
+    if cls is not None and tuple(getattr(cls, "__slots__", ())) != names:
+      raise ValueError(f"{cls.__name__} does not match the signals of {msg.name} in {self.dbc_name}")
+
+    state.view = view = (cls or view_class(self.dbc_name, msg.address))()
+    state.update_view = view_updater(names)
+    if state.vals:
+      state.update_view(view, state.vals)
+    self.views[msg.address] = self.views[msg.name] = view
+    return cast(T, view)
+
   @property
   def bus_timeout(self) -> bool:
     ignore_alive = all(s.ignore_alive for s in self.message_states.values())
@@ -217,9 +281,9 @@ class CANParser:
     if strings and not isinstance(strings[0], list | tuple):
       strings = [strings]
 
-    for addr in self.addresses:
-      for k in self.vl_all[addr]:
-        self.vl_all[addr][k].clear()
+    for state in self.message_states.values():
+      for all_vals in state.all_vals:
+        all_vals.clear()
 
     updated_addrs: set[int] = set()
     for entry in strings:
@@ -235,15 +299,9 @@ class CANParser:
           continue
         if state.parse(t, dat):
           updated_addrs.add(address)
-
-          vl_addr = self.vl[address]
-          vl_all_addr = self.vl_all[address]
-          ts_addr = self.ts_nanos[address]
-
-          for i, sig in enumerate(state.signals):
-            vl_addr[sig.name] = state.vals[i]
-            vl_all_addr[sig.name] = state.all_vals[i]
-            ts_addr[sig.name] = state.timestamps[-1]
+          dict.__getitem__(self.vl, address).update(zip(state.signal_names, state.vals, strict=True))
+          if state.update_view is not None:
+            state.update_view(state.view, state.vals)
 
       if not bus_empty:
         self.last_nonempty_nanos = t
@@ -252,6 +310,48 @@ class CANParser:
 
     return updated_addrs
 
+  def snapshot(self) -> bytes:
+    """Serializes all mutable parser state: counters, learned frequencies, timestamps and last values"""
+    states = {}
+    for addr, state in self.message_states.items():
+      st = {f.name: getattr(state, f.name) for f in fields(state) if f.name not in _STATIC_STATE_FIELDS}
+      st["timestamps"] = list(state.timestamps) if state.timestamps is not None else None
+      states[addr] = st
+    return pickle.dumps({
+      "states": states,
+      "can_invalid_cnt": self.can_invalid_cnt,
+      "last_nonempty_nanos": self.last_nonempty_nanos,
+      "last_update_nanos": self._last_update_nanos,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+  def restore(self, dat: bytes) -> None:
+    """Restores state from snapshot() onto a parser created with the same DBC and messages"""
+    snapshot = pickle.loads(dat)
+    for addr, st in snapshot["states"].items():
+      # messages may have been added lazily through vl
+      if addr not in self.message_states:
+        self._add_message(addr)
+
+      state = self.message_states[addr]
+      for k, v in st.items():
+        if k == "timestamps":
+          state.timestamps = deque(v, maxlen=FREQUENCY_WINDOW) if v is not None else None
+        elif k == "all_vals":
+          # vl_all shares these lists
+          for all_vals, vals in zip(state.all_vals, v, strict=False):
+            all_vals[:] = vals
+        else:
+          setattr(state, k, v)
+
+      if state.vals:
+        dict.__getitem__(self.vl, addr).update(zip(state.signal_names, state.vals, strict=True))
+        if state.update_view is not None:
+          state.update_view(state.view, state.vals)
+
+    self.can_invalid_cnt = snapshot["can_invalid_cnt"]
+    self.last_nonempty_nanos = snapshot["last_nonempty_nanos"]
+    self._last_update_nanos = snapshot["last_update_nanos"]
+
 
 class CANDefine:
   def __init__(self, dbc_name: str):
@@ -1,46 +1,216 @@
 #!/usr/bin/env python3
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
 import time
+from collections.abc import Callable
+
+from opendbc.car import Bus
+from opendbc.car.values import BRANDS
 from opendbc.can import CANPacker, CANParser
+from opendbc.can.dbc import DBC, Msg, SignalType
+
+SEED = 0
+FRAME_NANOS = 10_000_000  # 100Hz
+DEFAULT_THRESHOLD = 0.1
+
+# DBCs with checksum families not used by any platform's dbc_dict
+EXTRA_CHECKSUM_DBCS = ["fca_giorgio"]
+
+
+def brand_dbcs() -> dict[str, str]:
+  """The pt DBC of the first platform of each brand, falling back to its first bus"""
+  dbcs = {}
+  for brand in BRANDS:
+    for platform_ in brand:
+      dbc_dict = platform_.config.dbc_dict
+      dbc_name = dbc_dict.get(Bus.pt, next(iter(dbc_dict.values()), None))
+      if dbc_name is not None:
+        dbcs[brand.__module__.split('.')[-2]] = dbc_name
+        break
+  return dbcs
+
+
+def platform_dbcs() -> list[str]:
+  return sorted({dbc_name for brand in BRANDS for platform_ in brand for dbc_name in platform_.config.dbc_dict.values()})
+
+
+def random_values(msg: Msg, rng: random.Random) -> dict[str, float]:
+  # counters and checksums are left to the packer so the parser sees valid traffic
+  return {name: rng.getrandbits(sig.size) * sig.factor + sig.offset for name, sig in msg.sigs.items()
+          if sig.type == SignalType.DEFAULT and name not in ("COUNTER", "CHECKSUM")}
+
 
+def generate_traffic(dbc_name: str, n_frames: int, bus: int = 0, seed: int = SEED) -> list[tuple[int, list[tuple[int, bytes, int]]]]:
+  """Pack every message in the DBC once per frame with random signal values"""
+  rng = random.Random(seed)
+  packer = CANPacker(dbc_name)
+  msgs = [m for m in DBC(dbc_name).msgs.values() if m.size > 0]
+  return [(i * FRAME_NANOS, [packer.make_can_msg(m.address, bus, random_values(m, rng)) for m in msgs]) for i in range(n_frames)]
 
-def _benchmark(checks, n):
-  parser = CANParser('toyota_new_mc_pt_generated', checks, 0)
-  packer = CANPacker('toyota_new_mc_pt_generated')
 
-  t1 = time.process_time_ns()
-  can_msgs = []
-  for i in range(10000):
-    values = {"ACC_CONTROL": {"ACC_TYPE": 1, "ALLOW_LONG_PRESS": 3}}
-    msgs = [packer.make_can_msg(k, 0, v) for k, v in values.items()]
-    can_msgs.append([int(0.01 * i * 1e9), msgs])
-  t2 = time.process_time_ns()
-  pack_dt = t2 - t1
+def make_parser(dbc_name: str, bus: int = 0) -> CANParser:
+  msgs = [m for m in DBC(dbc_name).msgs.values() if m.size > 0]
+  return CANParser(dbc_name, [(m.name, 100) for m in msgs], bus)
 
+
+def timeit(fn: Callable[[], object], ops: int, repeats: int) -> dict[str, float]:
+  """Runs fn `repeats` times, each performing `ops` operations. Reports median ns per op"""
   ets = []
-  for _ in range(25):
-    if n > 1:
-      strings = []
-      for i in range(0, len(can_msgs), n):
-        strings.append(can_msgs[i:i + n])
-      t1 = time.process_time_ns()
-      for m in strings:
-        parser.update(m)
-      t2 = time.process_time_ns()
-    else:
-      t1 = time.process_time_ns()
+  for _ in range(repeats):
+    t1 = time.process_time_ns()
+    fn()
+    t2 = time.process_time_ns()
+    ets.append((t2 - t1) / ops)
+  return {"ns_per_op": statistics.median(ets), "min_ns_per_op": min(ets), "ops": ops, "repeats": repeats}
+
+
+def bench_dbc_parse(dbc_names: list[str], repeats: int) -> dict[str, dict]:
+  results = {}
+  for dbc_name in dbc_names:
+    # DBC is cached by name, the wrapped class always parses from scratch
+    results[f"dbc_parse_cold/{dbc_name}"] = timeit(lambda n=dbc_name: DBC.__wrapped__(n), 1, repeats)
+    results[f"dbc_parse_warm/{dbc_name}"] = timeit(lambda n=dbc_name: [DBC(n) for _ in range(1000)], 1000, repeats)
+  return results
+
+
+def bench_parser_update(dbcs: dict[str, str], frames: int, repeats: int) -> dict[str, dict]:
+  results = {}
+  for brand, dbc_name in dbcs.items():
+    can_msgs = generate_traffic(dbc_name, frames)
+    n_msgs = sum(len(m[1]) for m in can_msgs)
+
+    def run(dbc_name=dbc_name, can_msgs=can_msgs):
+      # fresh parser each run so counters and learned frequencies start from the same state
+      parser = make_parser(dbc_name)
       for m in can_msgs:
         parser.update([m])
-      t2 = time.process_time_ns()
 
-    ets.append(t2 - t1)
+    results[f"parser_update/{brand}"] = timeit(run, n_msgs, repeats)
+  return results
+
+
+def bench_pack(dbcs: dict[str, str], frames: int, repeats: int) -> dict[str, dict]:
+  results = {}
+  for brand, dbc_name in dbcs.items():
+    rng = random.Random(SEED)
+    packer = CANPacker(dbc_name)
+    msgs = [(m.address, random_values(m, rng)) for m in DBC(dbc_name).msgs.values() if m.size > 0]
+
+    def run(packer=packer, msgs=msgs):
+      for _ in range(frames):
+        for addr, values in msgs:
+          packer.make_can_msg(addr, 0, values)
+
+    results[f"pack/{brand}"] = timeit(run, frames * len(msgs), repeats)
+  return results
+
+
+def bench_checksums(name_filter: str, iterations: int, repeats: int) -> dict[str, dict]:
+  # first message found for each checksum family
+  found = {}
+  for dbc_name in platform_dbcs() + EXTRA_CHECKSUM_DBCS:
+    for msg in DBC(dbc_name).msgs.values():
+      for sig in msg.sigs.values():
+        if sig.calc_checksum is not None and sig.type not in found:
+          found[sig.type] = (dbc_name, msg, sig)
+
+  type_names = {v: k for k, v in vars(SignalType).items() if isinstance(v, int)}
+  results = {}
+  for sig_type, (dbc_name, msg, sig) in sorted(found.items()):
+    if name_filter not in dbc_name and name_filter.upper() not in type_names[sig_type]:
+      continue
+    rng = random.Random(SEED)
+    dat = CANPacker(dbc_name).pack(msg.address, random_values(msg, rng))
+
+    def run(msg=msg, sig=sig, dat=dat):
+      for _ in range(iterations):
+        sig.calc_checksum(msg.address, sig, dat)
+
+    results[f"checksum/{type_names[sig_type]}"] = timeit(run, iterations, repeats)
+  return results
+
+
+def bench_can_valid(dbcs: dict[str, str], iterations: int, repeats: int) -> dict[str, dict]:
+  results = {}
+  for brand, dbc_name in dbcs.items():
+    parser = make_parser(dbc_name)
+    for m in generate_traffic(dbc_name, 10):
+      parser.update([m])
+
+    def run(parser=parser):
+      for _ in range(iterations):
+        parser.can_valid  # noqa: B018
+
+    results[f"can_valid/{brand}"] = timeit(run, iterations, repeats)
+  return results
+
+
+def run_benchmarks(name_filter: str = "", frames: int = 100, iterations: int = 1000, repeats: int = 5) -> dict[str, dict]:
+  dbcs = brand_dbcs()
+  if name_filter:
+    dbcs = {brand: dbc for brand, dbc in dbcs.items() if name_filter in brand or name_filter in dbc}
+  dbc_names = sorted(set(dbcs.values()))
+
+  random.seed(SEED)
+  results = {}
+  results.update(bench_dbc_parse(dbc_names, repeats))
+  results.update(bench_parser_update(dbcs, frames, repeats))
+  results.update(bench_pack(dbcs, frames, repeats))
+  results.update(bench_checksums(name_filter, iterations, repeats))
+  results.update(bench_can_valid(dbcs, iterations, repeats))
+  return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+  """Returns the names of benchmarks slower than baseline by more than threshold (fractional)"""
+  regressions = []
+  for name, res in results.items():
+    if name in baseline and res["ns_per_op"] > baseline[name]["ns_per_op"] * (1 + threshold):
+      regressions.append(name)
+  return regressions
+
+
+def main() -> int:
+  parser = argparse.ArgumentParser(description="Benchmark DBC parsing, CANParser, CANPacker and checksums",
+                                   formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--filter", default="", help="Only benchmark brands or DBCs containing this string")
+  parser.add_argument("--frames", type=int, default=100, help="Frames of traffic per parser/packer run")
+  parser.add_argument("--iterations", type=int, default=1000, help="Calls per checksum/can_valid run")
+  parser.add_argument("--repeats", type=int, default=5, help="Runs per benchmark, median is reported")
+  parser.add_argument("--output", help="Write results JSON to this path")
+  parser.add_argument("--baseline", help="Results JSON to compare against")
+  parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed fractional slowdown vs. baseline")
+  args = parser.parse_args()
+
+  results = run_benchmarks(args.filter, args.frames, args.iterations, args.repeats)
+  baseline = {}
+  if args.baseline:
+    with open(args.baseline) as f:
+      baseline = json.load(f)["results"]
+
+  for name, res in results.items():
+    line = f"{name:<50} {res['ns_per_op']:>14.1f} ns/op"
+    if name in baseline:
+      line += f"  ({res['ns_per_op'] / baseline[name]['ns_per_op'] - 1:+.1%})"
+    print(line)
+
+  if args.output:
+    meta = {"python": platform.python_version(), "machine": platform.machine(), "seed": SEED,
+            "frames": args.frames, "iterations": args.iterations, "repeats": args.repeats}
+    with open(args.output, "w") as f:
+      json.dump({"meta": meta, "results": results}, f, indent=2)
 
-  et = sum(ets) / len(ets)
-  avg_nanos = et / len(can_msgs)
-  print('[%d] %.1fms to pack, %.1fms to parse %s messages, avg: %dns' % (n, pack_dt/1e6, et/1e6, len(can_msgs), avg_nanos))
+  regressions = compare(results, baseline, args.threshold)
+  if regressions:
+    print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:", *regressions, sep="\n  ", file=sys.stderr)
+    return 1
+  return 0
 
 
 if __name__ == "__main__":
-  # python -m cProfile -s cumulative  benchmark.py
-  _benchmark([('ACC_CONTROL', 10)], 1)
-  _benchmark([('ACC_CONTROL', 10)], 5)
-  _benchmark([('ACC_CONTROL', 10)], 10)
+  # python -m cProfile -s cumulative benchmark.py
+  sys.exit(main())
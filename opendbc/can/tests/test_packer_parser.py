@@ -366,3 +366,28 @@ class TestCanParserPacker(unittest.TestCase):
     assert packer.make_can_msg("ACC_CONTROL", 0, {"UNKNOWN_SIGNAL": 0}) == (835, b'\x00\x00\x00\x00\x00\x00\x00N', 0)
     assert packer.make_can_msg("UNKNOWN_MESSAGE", 0, {"UNKNOWN_SIGNAL": 0}) == (0, b'', 0)
     assert packer.make_can_msg(0, 0, {"UNKNOWN_SIGNAL": 0}) == (0, b'', 0)
+
+  def test_snapshot_restore(self):
+    dbc_file = "honda_civic_touring_2016_can_generated"
+    packer = CANPacker(dbc_file)
+    parsers = [CANParser(dbc_file, [("VSA_STATUS", 0)], 0) for _ in range(2)]
+
+    def update(parser, frames):
+      parser.update([(t, [packer.make_can_msg("VSA_STATUS", 0, {"USER_BRAKE": t % 100})]) for t in frames])
+
+    # 50Hz, the frequency isn't learned yet
+    update(parsers[0], range(0, int(0.5e9), int(0.02e9)))
+    parsers[1].restore(parsers[0].snapshot())
+    for parser in parsers:
+      assert parser.vl["VSA_STATUS"] == parsers[0].vl["VSA_STATUS"]
+      assert parser.vl_all["VSA_STATUS"] == parsers[0].vl_all["VSA_STATUS"]
+      assert dict(parser.ts_nanos["VSA_STATUS"]) == dict(parsers[0].ts_nanos["VSA_STATUS"])
+
+    # restored parsers keep learning, vl_all still follows the parsed values
+    for parser in parsers:
+      update(parser, range(int(0.5e9), int(1.5e9), int(0.02e9)))
+      state = parser.message_states[parser.dbc.name_to_msg["VSA_STATUS"].address]
+      assert 50 <= state.frequency <= 52
+      assert state.timestamps is None
+      assert len(parser.vl_all["VSA_STATUS"]["USER_BRAKE"]) == 50
+      assert set(parser.ts_nanos["VSA_STATUS"].values()) == {int(1.48e9)}
@@ -0,0 +1,73 @@
+import os
+import unittest
+
+from opendbc import DBC_PATH, get_generated_dbcs
+from opendbc.can import CANPacker, CANParser
+from opendbc.can.views import view_module_source
+
+DBC_FILE = "toyota_nodsu_pt_generated"
+
+
+class TestMessageViews(unittest.TestCase):
+  def test_all_dbcs(self):
+    dbc_names = set(get_generated_dbcs()) | {f[:-4] for f in os.listdir(DBC_PATH) if f.endswith(".dbc")}
+    for dbc_name in sorted(dbc_names):
+      with self.subTest(dbc=dbc_name):
+        namespace: dict = {}
+        exec(view_module_source(dbc_name), namespace)
+
+  def test_view(self):
+    packer = CANPacker(DBC_FILE)
+    parser = CANParser(DBC_FILE, [("PCM_CRUISE", 0)], 0)
+    pcm_cruise = parser.view("PCM_CRUISE")
+    self.assertIs(parser.view(0x1d2), pcm_cruise)
+    self.assertEqual(pcm_cruise.CRUISE_ACTIVE, 0.)
+
+    for active in (1, 0):
+      parser.update([(0, [packer.make_can_msg("PCM_CRUISE", 0, {"CRUISE_ACTIVE": active, "ACCEL_NET": 0.5})])])
+      self.assertEqual(pcm_cruise.CRUISE_ACTIVE, active)
+      for name, value in parser.vl["PCM_CRUISE"].items():
+        self.assertEqual(getattr(pcm_cruise, name), value)
+
+    with self.assertRaises(AttributeError):
+      pcm_cruise.CRUISE_ACTIV  # noqa: B018
+
+    # messages are added on first use, like vl
+    gear_packet = parser.view("GEAR_PACKET")
+    parser.update([(0, [packer.make_can_msg("GEAR_PACKET", 0, {"GEAR": 1})])])
+    self.assertEqual(gear_packet.GEAR, 1)
+
+    with self.assertRaises(KeyError):
+      parser.view("NOT_A_MESSAGE")
+
+  def test_view_class(self):
+    namespace: dict = {}
+    exec(view_module_source(DBC_FILE, ["PCM_CRUISE", "GEAR_PACKET"]), namespace)
+    parser = CANParser(DBC_FILE, [("PCM_CRUISE", 0)], 0)
+    pcm_cruise = parser.view("PCM_CRUISE", namespace["PCM_CRUISE"])
+    self.assertIsInstance(pcm_cruise, namespace["PCM_CRUISE"])
+
+    with self.assertRaises(ValueError):
+      parser.view("PCM_CRUISE", namespace["GEAR_PACKET"])
+
+    # a message has one view, a second class would leave the first one stale
+    packer = CANPacker(DBC_FILE)
+    gear_packet = parser.view("GEAR_PACKET")
+    with self.assertRaises(ValueError):
+      parser.view("GEAR_PACKET", namespace["GEAR_PACKET"])
+    self.assertIs(parser.view("GEAR_PACKET"), gear_packet)
+    parser.update([(0, [packer.make_can_msg("GEAR_PACKET", 0, {"GEAR": 1})])])
+    self.assertEqual(gear_packet.GEAR, 1)
+
+  def test_restore(self):
+    packer = CANPacker(DBC_FILE)
+    parsers = [CANParser(DBC_FILE, [("PCM_CRUISE", 0)], 0) for _ in range(2)]
+    parsers[0].update([(0, [packer.make_can_msg("PCM_CRUISE", 0, {"CRUISE_ACTIVE": 1})])])
+
+    pcm_cruise = parsers[1].view("PCM_CRUISE")
+    parsers[1].restore(parsers[0].snapshot())
+    self.assertEqual(pcm_cruise.CRUISE_ACTIVE, 1)
+
+
+if __name__ == "__main__":
+  unittest.main()
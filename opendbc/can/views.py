@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Attribute views of CAN messages: cp.view("PCM_CRUISE").CRUISE_ACTIVE instead of cp.vl["PCM_CRUISE"]["CRUISE_ACTIVE"].
+
+A view is an instance of a slotted class generated from the DBC message, with one attribute per signal. The parser
+assigns all attributes at once whenever the message is parsed, so reading a signal is a single attribute load.
+
+Names that aren't identifiers get a leading underscore (2017_1 becomes _2017_1), Python keywords a trailing one.
+Run this module to write the classes of a DBC as a Python module, which type checkers can use to catch signal name
+errors when the classes are passed to CANParser.view.
+"""
+import argparse
+import keyword
+from collections.abc import Callable
+from functools import cache
+from typing import cast
+
+from opendbc.can.dbc import DBC, Msg
+
+ViewUpdater = Callable[[object, list[float]], None]
+
+
+def attribute_name(name: str) -> str:
+  if keyword.iskeyword(name):
+    return name + "_"
+  if not name.isidentifier():
+    name = "_" + name
+    if not name.isidentifier():
+      raise ValueError(f"{name[1:]!r} can't be used as an attribute name")
+  return name
+
+
+def attribute_names(msg: Msg) -> tuple[str, ...]:
+  names = tuple(attribute_name(name) for name in msg.sigs)
+  if len(set(names)) != len(names):
+    raise ValueError(f"signal names of {msg.name} collide as attribute names")
+  return names
+
+
+def view_class_source(msg: Msg, dbc_name: str) -> str:
+  names = attribute_names(msg)
+  lines = [
+    f"class {attribute_name(msg.name)}:",
+    f'  """{msg.name} ({hex(msg.address)}) of {dbc_name}"""',
+    f"  __slots__ = {tuple(names)!r}",
+  ]
+  lines += [f"  {name}: float" for name in names]
+  lines += ["", "  def __init__(self):"]
+  lines += [f"    self.{name} = 0.0" for name in names] or ["    pass"]
+  return "\n".join(lines) + "\n"
+
+
+def _updater_source(names: tuple[str, ...]) -> str:
+  if not names:
+    return "def update(view, vals):\n  pass\n"
+  return f"def update(view, vals):\n  {', '.join(f'view.{name}' for name in names)}, = vals\n"
+
+
+def _exec(source: str, name: str) -> object:
+  namespace: dict[str, object] = {}
+  exec(compile(source, f"<opendbc.can.views {name}>", "exec"), namespace)
+  return namespace[name]
+
+
+@cache
+def view_updater(names: tuple[str, ...]) -> ViewUpdater:
+  """Assigns a message's parsed values to the attributes of its view, names in signal order"""
+  return cast(ViewUpdater, _exec(_updater_source(names), "update"))
+
+
+@cache
+def view_class(dbc_name: str, address: int) -> type:
+  msg = DBC(dbc_name).addr_to_msg[address]
+  return cast(type, _exec(view_class_source(msg, dbc_name), attribute_name(msg.name)))
+
+
+def view_module_source(dbc_name: str, messages: list[str] | None = None) -> str:
+  dbc = DBC(dbc_name)
+  msgs = [dbc.name_to_msg[name] for name in messages] if messages else sorted(dbc.msgs.values(), key=lambda m: m.name)
+  header = f"# generated by opendbc/can/views.py from {dbc_name}, do not edit\n"
+  return header + "".join("\n\n" + view_class_source(msg, dbc_name) for msg in msgs)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Write the message view classes of a DBC as a Python module",
+                                   formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("dbc", help="DBC name or path")
+  parser.add_argument("messages", nargs="*", help="Only these messages, all if not given")
+  parser.add_argument("--output", help="Write to this path instead of stdout")
+  args = parser.parse_args()
+
+  source = view_module_source(args.dbc, args.messages)
+  if args.output:
+    with open(args.output, "w") as f:
+      f.write(source)
+  else:
+    print(source, end="")
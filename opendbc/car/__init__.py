@@ -1,10 +1,10 @@
 # functions common among cars
-import numpy as np
 from dataclasses import dataclass, field
 from enum import ReprEnum, StrEnum, EnumType, auto
 from dataclasses import replace
 
 from opendbc.car import structs, uds
+from opendbc.car.common.fastmath import rate_limit as rate_limit
 from opendbc.car.can_definitions import CanData
 from opendbc.car.docs_definitions import CarDocs, ExtraCarDocs
 
@@ -92,10 +92,6 @@ class Bus(StrEnum):
   ap_party = auto()
 
 
-def rate_limit(new_value, last_value, dw_step, up_step):
-  return float(np.clip(new_value, last_value + dw_step, last_value + up_step))
-
-
 def make_tester_present_msg(addr, bus, subaddr=None, suppress_response=False):
   dat = [0x02, uds.SERVICE_TYPE.TESTER_PRESENT]
   if subaddr is not None:
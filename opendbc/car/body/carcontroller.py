@@ -2,6 +2,7 @@ import numpy as np
 
 from opendbc.can import CANPacker
 from opendbc.car import Bus, DT_CTRL
+from opendbc.car.common.fastmath import clip
 from opendbc.car.common.pid import PIDController
 from opendbc.car.body import bodycan
 from opendbc.car.body.values import SPEED_FROM_RPM
@@ -61,14 +62,14 @@ class CarController(CarControllerBase):
       torque_l = torque - torque_diff
 
       # Torque rate limits
-      self.torque_r_filtered = np.clip(self.deadband_filter(torque_r, 10),
-                                       self.torque_r_filtered - MAX_TORQUE_RATE,
-                                       self.torque_r_filtered + MAX_TORQUE_RATE)
-      self.torque_l_filtered = np.clip(self.deadband_filter(torque_l, 10),
-                                       self.torque_l_filtered - MAX_TORQUE_RATE,
-                                       self.torque_l_filtered + MAX_TORQUE_RATE)
-      torque_r = int(np.clip(self.torque_r_filtered, -MAX_TORQUE, MAX_TORQUE))
-      torque_l = int(np.clip(self.torque_l_filtered, -MAX_TORQUE, MAX_TORQUE))
+      self.torque_r_filtered = clip(self.deadband_filter(torque_r, 10),
+                                    self.torque_r_filtered - MAX_TORQUE_RATE,
+                                    self.torque_r_filtered + MAX_TORQUE_RATE)
+      self.torque_l_filtered = clip(self.deadband_filter(torque_l, 10),
+                                    self.torque_l_filtered - MAX_TORQUE_RATE,
+                                    self.torque_l_filtered + MAX_TORQUE_RATE)
+      torque_r = int(clip(self.torque_r_filtered, -MAX_TORQUE, MAX_TORQUE))
+      torque_l = int(clip(self.torque_l_filtered, -MAX_TORQUE, MAX_TORQUE))
 
     can_sends = []
     can_sends.append(bodycan.create_control(self.packer, torque_l, torque_r))
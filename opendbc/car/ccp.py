@@ -4,6 +4,9 @@ import struct
 from enum import IntEnum, Enum
 from dataclasses import dataclass
 
+from opendbc.car.daq import DaqAcquisition, DaqVariable, pack_odts
+from opendbc.car.frame_trace import FrameDirection, FrameTrace
+
 
 @dataclass
 class ExchangeStationIdsReturn:
@@ -114,23 +117,33 @@ class CommandResponseError(Exception):
 
 
 class CcpClient:
-  def __init__(self, panda, tx_addr: int, rx_addr: int, bus: int=0, byte_order: BYTE_ORDER=BYTE_ORDER.BIG_ENDIAN, debug=False):
+  def __init__(self, panda, tx_addr: int, rx_addr: int, bus: int=0, byte_order: BYTE_ORDER=BYTE_ORDER.BIG_ENDIAN, debug=False,
+               trace: FrameTrace | None = None):
     self.tx_addr = tx_addr
     self.rx_addr = rx_addr
     self.can_bus = bus
     self.byte_order = byte_order
     self.debug = debug
+    self.trace = trace
     self._panda = panda
     self._command_counter = -1
+    self.daq: DaqAcquisition | None = None
+    self._daq_list = 0
 
   def _send_cro(self, cmd: int, dat: bytes = b"") -> None:
     self._command_counter = (self._command_counter + 1) & 0xFF
     tx_data = (bytes([cmd, self._command_counter]) + dat).ljust(8, b"\x00")
+    if self.trace is not None:
+      self.trace.record(FrameDirection.TX, self.can_bus, self.tx_addr, tx_data)
     if self.debug:
       print(f"CAN-TX: {hex(self.tx_addr)} - 0x{bytes.hex(tx_data)}")
     assert len(tx_data) == 8, "data is not 8 bytes"
     self._panda.can_clear(self.can_bus)
-    self._panda.can_clear(0xFFFF)
+    if self.daq is not None:
+      # DTOs are streaming, buffer them instead of clearing
+      self.poll_daq()
+    else:
+      self._panda.can_clear(0xFFFF)
     self._panda.can_send(self.tx_addr, tx_data, self.can_bus)
 
   def _recv_dto(self, timeout: float) -> bytes:
@@ -142,11 +155,16 @@ class CcpClient:
       for rx_addr, rx_data_bytearray, rx_bus in msgs:
         if rx_bus == self.can_bus and rx_addr == self.rx_addr:
           rx_data = bytes(rx_data_bytearray)
+          if self.trace is not None:
+            self.trace.record(FrameDirection.RX, rx_bus, rx_addr, rx_data)
           if self.debug:
             print(f"CAN-RX: {hex(rx_addr)} - 0x{bytes.hex(rx_data)}")
           assert len(rx_data) == 8, f"message length not 8: {len(rx_data)}"
 
           pid = rx_data[0]
+          if self.daq is not None and self.daq.is_daq_pid(pid):
+            self.daq.receive([(rx_addr, rx_data, rx_bus)])
+            continue
           if pid == 0xFF or pid == 0xFE:
             err = rx_data[1]
             err_desc = COMMAND_RETURN_CODES.get(err, "unknown error")
@@ -170,6 +188,8 @@ class CcpClient:
           return dat
       time.sleep(0.001)
 
+    if self.trace is not None:
+      self.trace.dump(f"CCP: {hex(self.tx_addr)} timeout waiting for response")
     raise CommandTimeoutError("timeout waiting for response")
 
   # commands
@@ -383,3 +403,35 @@ class CcpClient:
     self._send_cro(COMMAND_CODE.GET_CCP_VERSION, bytes([major, minor]))
     resp = self._recv_dto(0.025)
     return float(f"{resp[0]}.{resp[1]}")
+
+  def start_daq(self, variables: list[DaqVariable], list_num: int = 0, channel_num: int = 0, rate_prescaler: int = 1,
+                capacity: int = 65536) -> DaqAcquisition:
+    """Writes variables into a DAQ list of the ECU and starts transmission, call connect() first.
+
+    Poll DTOs into the acquisition buffer with poll_daq(), decode them with DaqAcquisition.decode()"""
+    odts = pack_odts(variables, 7)
+    daq_list_size = self.get_daq_list_size(list_num, self.rx_addr)
+    if len(odts) > daq_list_size.list_size:
+      raise ValueError(f"DAQ list {list_num} has {daq_list_size.list_size} ODTs, {len(odts)} needed")
+
+    for odt_num, odt in enumerate(odts):
+      for element_num, entry in enumerate(odt):
+        self.set_daq_list_pointer(list_num, odt_num, element_num)
+        self.write_daq_list_entry(entry.variable.size, entry.variable.addr_ext, entry.variable.addr)
+
+    self.daq = DaqAcquisition(odts, self.rx_addr, self.can_bus, daq_list_size.first_pid, self.byte_order.value, 8, capacity)
+    self._daq_list = list_num
+    self.start_stop_transmission(1, list_num, len(odts) - 1, channel_num, rate_prescaler)
+    return self.daq
+
+  def poll_daq(self) -> int:
+    """Buffers received DTOs, returns the number of new DTOs"""
+    assert self.daq is not None, "DAQ not started"
+    return self.daq.receive(self._panda.can_recv() or [])
+
+  def stop_daq(self) -> DaqAcquisition:
+    assert self.daq is not None, "DAQ not started"
+    self.poll_daq()
+    self.start_stop_transmission(0, self._daq_list, 0, 0)
+    daq, self.daq = self.daq, None
+    return daq
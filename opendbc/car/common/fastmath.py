@@ -0,0 +1,83 @@
+"""
+Scalar versions of np.clip and np.interp for per-cycle control code, avoiding the NumPy scalar boxing cost.
+
+Results are equal to NumPy's, including NaN propagation, but are Python numbers rather than NumPy scalars.
+"""
+import math
+from bisect import bisect_right
+from collections.abc import Sequence
+
+NAN = float('nan')
+
+
+def clip(x, lo, hi):
+  """np.clip(x, lo, hi) for scalars. Like NumPy, hi wins if lo > hi"""
+  if lo != lo or hi != hi:
+    return NAN
+  if x < lo:
+    x = lo
+  if x > hi:
+    x = hi
+  return x
+
+
+def sign(x: float) -> float:
+  """np.sign(x) for scalars"""
+  return x if x != x else float((x > 0) - (x < 0))
+
+
+def rate_limit(new_value: float, last_value: float, dw_step: float, up_step: float) -> float:
+  return float(clip(new_value, last_value + dw_step, last_value + up_step))
+
+
+def _div(a: float, b: float) -> float:
+  # IEEE 754 division like NumPy, Python raises on division by zero
+  if b == 0:
+    return NAN if a == 0 or a != a else math.copysign(math.inf, a) * math.copysign(1., b)
+  return a / b
+
+
+def _interp(x: float, xp: Sequence[float], fp: Sequence[float], slopes: Sequence[float] | None) -> float:
+  if len(xp) == 1:
+    return fp[0]
+  if x != x:
+    return NAN
+  if x >= xp[-1]:
+    return fp[-1]
+  if x < xp[0]:
+    return fp[0]
+
+  j = bisect_right(xp, x) - 1
+  if xp[j] == x:
+    return fp[j]
+
+  slope = slopes[j] if slopes is not None else _div(fp[j + 1] - fp[j], xp[j + 1] - xp[j])
+  # if we get NaN in one direction, try the other
+  res = slope * (x - xp[j]) + fp[j]
+  if res != res:
+    res = slope * (x - xp[j + 1]) + fp[j + 1]
+    if res != res and fp[j] == fp[j + 1]:
+      res = fp[j]
+  return res
+
+
+def interp(x: float, xp: Sequence[float], fp: Sequence[float]) -> float:
+  """np.interp(x, xp, fp) for a scalar x. Prefer Interp for fixed breakpoints"""
+  if len(xp) != len(fp) or len(xp) == 0:
+    raise ValueError("xp and fp are not of the same length, or are empty")
+  return float(_interp(x, xp, fp, None))
+
+
+class Interp:
+  """np.interp with fixed breakpoints, the slopes between them are computed once"""
+  __slots__ = ('xp', 'fp', 'slopes')
+
+  def __init__(self, xp: Sequence[float], fp: Sequence[float]):
+    if len(xp) != len(fp) or len(xp) == 0:
+      raise ValueError("xp and fp are not of the same length, or are empty")
+    self.xp = tuple(float(x) for x in xp)
+    self.fp = tuple(float(f) for f in fp)
+    self.slopes = tuple(_div(self.fp[j + 1] - self.fp[j], self.xp[j + 1] - self.xp[j]) for j in range(len(self.xp) - 1))
+
+  def __call__(self, x: float) -> float:
+    return _interp(x, self.xp, self.fp, self.slopes)
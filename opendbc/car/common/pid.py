@@ -1,6 +1,7 @@
-import numpy as np
 from numbers import Number
 
+from opendbc.car.common.fastmath import Interp, clip, sign
+
 
 class PIDController:
   def __init__(self, k_p, k_i, k_f=0., k_d=0., pos_limit=1e308, neg_limit=-1e308, rate=100):
@@ -14,6 +15,9 @@ class PIDController:
       self._k_i = [[0], [self._k_i]]
     if isinstance(self._k_d, Number):
       self._k_d = [[0], [self._k_d]]
+    self._k_p_interp = Interp(*self._k_p)
+    self._k_i_interp = Interp(*self._k_i)
+    self._k_d_interp = Interp(*self._k_d)
 
     self.pos_limit = pos_limit
     self.neg_limit = neg_limit
@@ -26,15 +30,15 @@ class PIDController:
 
   @property
   def k_p(self):
-    return np.interp(self.speed, self._k_p[0], self._k_p[1])
+    return self._k_p_interp(self.speed)
 
   @property
   def k_i(self):
-    return np.interp(self.speed, self._k_i[0], self._k_i[1])
+    return self._k_i_interp(self.speed)
 
   @property
   def k_d(self):
-    return np.interp(self.speed, self._k_d[0], self._k_d[1])
+    return self._k_d_interp(self.speed)
 
   @property
   def error_integral(self):
@@ -55,17 +59,17 @@ class PIDController:
     self.d = error_rate * self.k_d
 
     if override:
-      self.i -= self.i_unwind_rate * float(np.sign(self.i))
+      self.i -= self.i_unwind_rate * sign(self.i)
     else:
       if not freeze_integrator:
         self.i = self.i + error * self.k_i * self.i_rate
 
         # Clip i to prevent exceeding control limits
         control_no_i = self.p + self.d + self.f
-        control_no_i = np.clip(control_no_i, self.neg_limit, self.pos_limit)
-        self.i = np.clip(self.i, self.neg_limit - control_no_i, self.pos_limit - control_no_i)
+        control_no_i = clip(control_no_i, self.neg_limit, self.pos_limit)
+        self.i = clip(self.i, self.neg_limit - control_no_i, self.pos_limit - control_no_i)
 
     control = self.p + self.i + self.d + self.f
 
-    self.control = np.clip(control, self.neg_limit, self.pos_limit)
+    self.control = clip(control, self.neg_limit, self.pos_limit)
     return self.control
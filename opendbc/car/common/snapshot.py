@@ -0,0 +1,77 @@
+import importlib
+import io
+import pickle
+from types import ModuleType
+from typing import Any
+
+import capnp
+
+from opendbc.can.dbc import DBC
+from opendbc.car import structs
+
+_DBC = DBC.__wrapped__
+
+
+def _capnp_module(display_name: str):
+  # "car.capnp:CarState.ButtonEvent" -> structs.car.CarState.ButtonEvent
+  module = structs.car
+  for name in display_name.split(':')[-1].split('.'):
+    module = getattr(module, name)
+  return module
+
+
+def _load_builder(display_name: str, dat: bytes):
+  with _capnp_module(display_name).from_bytes(dat) as msg:
+    return msg.as_builder()
+
+
+def _load_reader(display_name: str, dat: bytes):
+  with _capnp_module(display_name).from_bytes(dat) as msg:
+    return msg.as_builder().as_reader()
+
+
+class _StatePickler(pickle.Pickler):
+  """Pickles capnp structs by value and references shared read-only state (CarParams, DBCs) by id"""
+  def __init__(self, file, shared: dict[str, Any]):
+    super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+    self.shared = {id(v): k for k, v in shared.items()}
+
+  def persistent_id(self, obj):
+    if id(obj) in self.shared:
+      return self.shared[id(obj)]
+    if isinstance(obj, _DBC):
+      return f"dbc:{obj.name}"
+    return None
+
+  def reducer_override(self, obj):
+    # some controllers keep the brand's CAN message module for their platform
+    if isinstance(obj, ModuleType):
+      return importlib.import_module, (obj.__name__,)
+    # copy before serializing so the original builder isn't marked as written
+    if isinstance(obj, capnp.lib.capnp._DynamicStructBuilder):
+      return _load_builder, (obj.schema.node.displayName, obj.as_reader().as_builder().to_bytes())
+    if isinstance(obj, capnp.lib.capnp._DynamicStructReader):
+      return _load_reader, (obj.schema.node.displayName, obj.as_builder().to_bytes())
+    return NotImplemented
+
+
+class _StateUnpickler(pickle.Unpickler):
+  def __init__(self, file, shared: dict[str, Any]):
+    super().__init__(file)
+    self.shared = shared
+
+  def persistent_load(self, pid):
+    if pid.startswith("dbc:"):
+      return DBC(pid[4:])
+    return self.shared[pid]
+
+
+def dump_state(state: dict[str, Any], shared: dict[str, Any] | None = None) -> bytes:
+  """Serializes a dict of mutable object state. Objects in `shared` are stored by key and must be passed to load_state"""
+  buf = io.BytesIO()
+  _StatePickler(buf, shared or {}).dump(state)
+  return buf.getvalue()
+
+
+def load_state(dat: bytes, shared: dict[str, Any] | None = None) -> dict[str, Any]:
+  return _StateUnpickler(io.BytesIO(dat), shared or {}).load()
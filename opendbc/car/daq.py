@@ -0,0 +1,122 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class DaqVariable:
+  name: str
+  addr: int
+  dtype: str  # numpy type code without byte order, e.g. "u1", "i2", "f4"
+  addr_ext: int = 0
+
+  @property
+  def size(self) -> int:
+    return np.dtype(self.dtype).itemsize
+
+
+@dataclass(frozen=True)
+class OdtEntry:
+  variable: DaqVariable
+  offset: int  # byte offset into the ODT data, after the PID
+
+
+@dataclass
+class DaqSamples:
+  timestamps: np.ndarray  # seconds, time.monotonic clock. the receive time of the frame's can_recv batch
+  values: np.ndarray
+
+
+def pack_odts(variables: list[DaqVariable], odt_size: int) -> list[list[OdtEntry]]:
+  """Packs variables into as few ODTs of odt_size data bytes as possible, largest first"""
+  odts: list[list[OdtEntry]] = []
+  free: list[int] = []
+  for var in sorted(variables, key=lambda v: -v.size):
+    if var.size > odt_size:
+      raise ValueError(f"{var.name} is larger than an ODT ({var.size} > {odt_size} bytes)")
+    odt_num = next((i for i, f in enumerate(free) if f >= var.size), None)
+    if odt_num is None:
+      odts.append([])
+      free.append(odt_size)
+      odt_num = len(odts) - 1
+    odts[odt_num].append(OdtEntry(var, odt_size - free[odt_num]))
+    free[odt_num] -= var.size
+  return odts
+
+
+class DaqBuffer:
+  """Preallocated ring buffer of raw DTO frames and their receive times, oldest frames are overwritten when full"""
+  def __init__(self, capacity: int, dto_size: int):
+    self.capacity = capacity
+    self.timestamps = np.zeros(capacity, dtype=np.int64)
+    self.frames = np.zeros((capacity, dto_size), dtype=np.uint8)
+    self.count = 0  # total frames appended
+
+  def __len__(self) -> int:
+    return min(self.count, self.capacity)
+
+  @property
+  def dropped(self) -> int:
+    return max(self.count - self.capacity, 0)
+
+  def append(self, t_nanos: int, dat: bytes) -> None:
+    i = self.count % self.capacity
+    self.timestamps[i] = t_nanos
+    self.frames[i, :len(dat)] = np.frombuffer(dat, dtype=np.uint8)
+    # short DTOs don't leave the overwritten frame's bytes behind
+    self.frames[i, len(dat):] = 0
+    self.count += 1
+
+  def clear(self) -> None:
+    self.count = 0
+
+  def snapshot(self) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the buffered timestamps and frames, oldest first"""
+    if self.count <= self.capacity:
+      return self.timestamps[:self.count], self.frames[:self.count]
+    i = self.count % self.capacity
+    return np.concatenate((self.timestamps[i:], self.timestamps[:i])), np.concatenate((self.frames[i:], self.frames[:i]))
+
+
+class DaqAcquisition:
+  """Receives the DTO stream of one configured DAQ list and decodes it into per-variable arrays.
+
+  Frames are only copied into the ring buffer while streaming, decoding is done in bulk by decode(). Panda batches
+  carry no per-frame times, so every frame is stamped when its can_recv batch is received: sample times are batch
+  times, and DTOs received after a command's response in the same batch are stamped when they're next polled."""
+  def __init__(self, odts: list[list[OdtEntry]], rx_addr: int, bus: int, first_pid: int, byte_order: str, dto_size: int = 8,
+               capacity: int = 65536):
+    self.odts = odts
+    self.rx_addr = rx_addr
+    self.bus = bus
+    self.first_pid = first_pid
+    self.byte_order = byte_order
+    self.buffer = DaqBuffer(capacity, dto_size)
+
+  def is_daq_pid(self, pid: int) -> bool:
+    return self.first_pid <= pid < self.first_pid + len(self.odts)
+
+  def receive(self, msgs) -> int:
+    """Buffers the DTOs of this DAQ list out of a panda can_recv batch, returns the number buffered"""
+    t_nanos = time.monotonic_ns()
+    received = 0
+    for rx_addr, rx_data, rx_bus in msgs:
+      if rx_addr == self.rx_addr and rx_bus == self.bus and len(rx_data) and self.is_daq_pid(rx_data[0]):
+        self.buffer.append(t_nanos, rx_data)
+        received += 1
+    return received
+
+  def decode(self) -> dict[str, DaqSamples]:
+    timestamps, frames = self.buffer.snapshot()
+    samples = {}
+    for odt_num, odt in enumerate(self.odts):
+      mask = frames[:, 0] == self.first_pid + odt_num
+      odt_frames = frames[mask]
+      odt_timestamps = timestamps[mask] * 1e-9
+      for entry in odt:
+        var = entry.variable
+        dtype = np.dtype(var.dtype).newbyteorder(self.byte_order)
+        raw = np.ascontiguousarray(odt_frames[:, 1 + entry.offset:1 + entry.offset + var.size])
+        samples[var.name] = DaqSamples(odt_timestamps, raw.view(dtype).reshape(-1).astype(dtype.newbyteorder("=")))
+    return samples
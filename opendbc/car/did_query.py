@@ -0,0 +1,113 @@
+from collections import defaultdict, deque
+
+from opendbc.car import uds
+from opendbc.car.can_definitions import CanRecvCallable, CanSendCallable
+from opendbc.car.carlog import carlog
+from opendbc.car.fw_query_definitions import AddrType
+from opendbc.car.isotp_parallel_query import IsoTpParallelQuery
+
+# identifiers that can't change while the car is on
+IMMUTABLE_DIDS = frozenset({
+  uds.DATA_IDENTIFIER_TYPE.BOOT_SOFTWARE_IDENTIFICATION,
+  uds.DATA_IDENTIFIER_TYPE.APPLICATION_SOFTWARE_IDENTIFICATION,
+  uds.DATA_IDENTIFIER_TYPE.APPLICATION_DATA_IDENTIFICATION,
+  uds.DATA_IDENTIFIER_TYPE.VEHICLE_MANUFACTURER_SPARE_PART_NUMBER,
+  uds.DATA_IDENTIFIER_TYPE.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER,
+  uds.DATA_IDENTIFIER_TYPE.VEHICLE_MANUFACTURER_ECU_SOFTWARE_VERSION_NUMBER,
+  uds.DATA_IDENTIFIER_TYPE.SYSTEM_SUPPLIER_IDENTIFIER,
+  uds.DATA_IDENTIFIER_TYPE.ECU_MANUFACTURING_DATE,
+  uds.DATA_IDENTIFIER_TYPE.ECU_SERIAL_NUMBER,
+  uds.DATA_IDENTIFIER_TYPE.VIN,
+  uds.DATA_IDENTIFIER_TYPE.VEHICLE_MANUFACTURER_ECU_HARDWARE_NUMBER,
+  uds.DATA_IDENTIFIER_TYPE.SYSTEM_SUPPLIER_ECU_HARDWARE_NUMBER,
+  uds.DATA_IDENTIFIER_TYPE.SYSTEM_SUPPLIER_ECU_HARDWARE_VERSION_NUMBER,
+  uds.DATA_IDENTIFIER_TYPE.SYSTEM_SUPPLIER_ECU_SOFTWARE_NUMBER,
+  uds.DATA_IDENTIFIER_TYPE.SYSTEM_SUPPLIER_ECU_SOFTWARE_VERSION_NUMBER,
+})
+
+# negative responses from ECUs that only accept one identifier per request
+SINGLE_DID_RESPONSE_CODES = (0x12, 0x13, 0x14)
+# requestOutOfRange, some ECUs reject the whole request if one identifier isn't supported
+REQUEST_OUT_OF_RANGE = 0x31
+
+EcuKey = tuple[int, int, int | None]  # bus, tx addr, sub addr
+
+
+class DidCache:
+  """Per-ECU cache of immutable identifiers, and of ECUs found to only support one identifier per request"""
+  def __init__(self, immutable_dids: frozenset[int] = IMMUTABLE_DIDS):
+    self.immutable_dids = immutable_dids
+    self.values: dict[EcuKey, dict[int, bytes]] = defaultdict(dict)
+    self.single_did_ecus: set[EcuKey] = set()
+
+  def get(self, ecu: EcuKey, did: int) -> bytes | None:
+    return self.values[ecu].get(did) if ecu in self.values else None
+
+  def update(self, ecu: EcuKey, values: dict[int, bytes]) -> None:
+    self.values[ecu].update({did: dat for did, dat in values.items() if did in self.immutable_dids})
+
+  def invalidate(self, ecu: EcuKey | None = None, did: int | None = None) -> None:
+    """Drops cached values of one ECU and/or identifier, or everything. Call after flashing or swapping an ECU"""
+    for key in [ecu] if ecu is not None else list(self.values):
+      if did is None:
+        self.values.pop(key, None)
+        self.single_did_ecus.discard(key)
+      elif key in self.values:
+        self.values[key].pop(did, None)
+
+
+def read_dids(can_send: CanSendCallable, can_recv: CanRecvCallable, bus: int, addrs: list[int] | list[AddrType], dids: list[int],
+              timeout: float = 0.1, max_dids_per_request: int = 8, did_lengths: dict[int, int] | None = None, cache: DidCache | None = None,
+              response_offset: int = 0x8) -> dict[AddrType, dict[int, bytes]]:
+  """Reads identifiers from many ECUs at once, several per request, returns the identifiers each ECU responded with.
+
+  ECUs that reject multi-identifier requests are retried one identifier at a time. Immutable identifiers are served
+  from and stored in cache if given, unless their data was split from a multi-identifier response without a known length"""
+  ecus = [a if isinstance(a, tuple) else (a, None) for a in addrs]
+  results: dict[AddrType, dict[int, bytes]] = {}
+  exact: dict[AddrType, set[int]] = defaultdict(set)
+  requests: dict[tuple[int, ...], list[AddrType]] = defaultdict(list)
+  for ecu in ecus:
+    key = (bus, *ecu)
+    results[ecu] = {did: dat for did in dids if cache is not None and (dat := cache.get(key, did)) is not None}
+    missing = [did for did in dids if did not in results[ecu]]
+
+    # ECUs that need the same identifiers are queried in parallel
+    size = 1 if cache is not None and key in cache.single_did_ecus else max_dids_per_request
+    for i in range(0, len(missing), size):
+      requests[tuple(missing[i:i + size])].append(ecu)
+
+  queue = deque(requests.items())
+  while queue:
+    request_dids, request_ecus = queue.popleft()
+    request = bytes([uds.SERVICE_TYPE.READ_DATA_BY_IDENTIFIER]) + b''.join(did.to_bytes(2, 'big') for did in request_dids)
+    response = bytes([uds.SERVICE_TYPE.READ_DATA_BY_IDENTIFIER + 0x40])
+    query = IsoTpParallelQuery(can_send, can_recv, bus, request_ecus, [request], [response], response_offset=response_offset)
+    for ecu, dat in query.get_data(timeout).items():
+      try:
+        values = uds.parse_data_by_identifier_response(dat, list(request_dids), did_lengths)
+      except ValueError:
+        carlog.exception(f"Error parsing identifiers from {ecu}: 0x{dat.hex()}")
+        continue
+      results[ecu].update(values)
+      exact[ecu].update(did for did in values if len(request_dids) == 1 or (did_lengths is not None and did in did_lengths))
+
+    if len(request_dids) > 1:
+      retry_ecus = []
+      for ecu, dat in query.negative_responses.items():
+        code = dat[2] if len(dat) > 2 else None
+        if code in SINGLE_DID_RESPONSE_CODES:
+          if cache is not None:
+            cache.single_did_ecus.add((bus, *ecu))
+          retry_ecus.append(ecu)
+        elif code == REQUEST_OUT_OF_RANGE:
+          # the other identifiers may be supported and the ECU still accepts multi-identifier requests,
+          # so only this request is retried one identifier at a time
+          retry_ecus.append(ecu)
+      if retry_ecus:
+        queue.extend(((did,), retry_ecus) for did in request_dids)
+
+  if cache is not None:
+    for ecu, values in results.items():
+      cache.update((bus, *ecu), {did: dat for did, dat in values.items() if did in exact[ecu]})
+  return {ecu: values for ecu, values in results.items() if len(values)}
@@ -3,6 +3,7 @@ import re
 import os
 import argparse
 import unicodedata
+from functools import cache
 from string import Template
 from typing import get_args
 
@@ -36,6 +37,7 @@ def get_params_for_docs(platform) -> CarParams:
   return CP
 
 
+@cache
 def get_all_footnotes() -> dict[Enum, int]:
   all_footnotes = list(CommonFootnote)
   for footnotes in get_interface_attr("Footnote", ignore_none=True).values():
@@ -52,18 +54,15 @@ def _natural_sort_key(s):
 def build_sorted_car_docs_list(platforms, footnotes=None):
   collected_car_docs: list[CarDocs | ExtraCarDocs] = []
   for platform in platforms.values():
+    # A platform can include multiple car models, each initialized once per process
     car_docs = platform.config.car_docs
-    CP = get_params_for_docs(platform)
-
-    if not len(car_docs):
-      continue
-
-    # A platform can include multiple car models
-    for _car_docs in car_docs:
-      if not hasattr(_car_docs, "row"):
+    uninitialized = [_car_docs for _car_docs in car_docs if not hasattr(_car_docs, "row")]
+    if len(uninitialized):
+      CP = get_params_for_docs(platform)
+      for _car_docs in uninitialized:
         _car_docs.init_make(CP)
         _car_docs.init(CP, footnotes)
-      collected_car_docs.append(_car_docs)
+    collected_car_docs.extend(car_docs)
 
   # Sort cars by make and model + year
   sorted_cars = sorted(collected_car_docs, key=lambda car: _natural_sort_key(car.name))
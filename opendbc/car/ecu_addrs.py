@@ -1,10 +1,27 @@
 import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
 
 from opendbc.car import make_tester_present_msg, uds
 from opendbc.car.can_definitions import CanData, CanRecvCallable, CanSendCallable
 from opendbc.car.carlog import carlog
 from opendbc.car.fw_query_definitions import EcuAddrBusType
 
+# tester present requests are sent in batches, one per receive, so responses can't overflow the RX buffers
+BATCH_SIZE = 32
+
+STANDARD_11BIT_ADDRS = [0x700 + i for i in range(256)]
+NORMAL_FIXED_29BIT_ADDRS = [0x18da00f1 + (i << 8) for i in range(256)]
+
+
+@dataclass(frozen=True)
+class EcuInfo:
+  bus: int
+  rx_addr: int
+  sub_addr: int | None
+  tx_addr: int | None  # None if the response can't be attributed to a single request
+  response_time: float | None  # seconds from the request to the first response
+
 
 def _is_tester_present_response(msg: CanData, subaddr: int | None = None) -> bool:
   # ISO-TP messages may use CAN frame optimization (not always 8 bytes)
@@ -21,36 +38,113 @@ def _is_tester_present_response(msg: CanData, subaddr: int | None = None) -> boo
   return False
 
 
+def schedule_queries(queries: list[EcuAddrBusType]) -> list[list[EcuAddrBusType]]:
+  """Splits queries into rounds with at most one request per address and bus, since sub-addresses share a gateway address"""
+  by_addr: dict[tuple[int, int], deque[EcuAddrBusType]] = defaultdict(deque)
+  for addr, subaddr, bus in queries:
+    by_addr[(addr, bus)].append((addr, subaddr, bus))
+
+  rounds = []
+  while by_addr:
+    rounds.append([q.popleft() for q in by_addr.values()])
+    by_addr = {k: q for k, q in by_addr.items() if q}
+  return rounds
+
+
+def _query_ecu_addrs(can_recv: CanRecvCallable, can_send: CanSendCallable, queries: list[EcuAddrBusType], responses: set[EcuAddrBusType],
+                     timeout: float, idle_timeout: float | None, expected: list[set[EcuAddrBusType]] | None,
+                     batch_size: int) -> tuple[dict[EcuAddrBusType, float], dict[EcuAddrBusType, float]]:
+  """Returns the times each response was first received and each query was sent"""
+  response_times: dict[EcuAddrBusType, float] = {}
+  send_times: dict[EcuAddrBusType, float] = {}
+  batches = [r[i:i + batch_size] for r in schedule_queries(queries) for i in range(0, len(r), batch_size)]
+  try:
+    can_recv()
+    last_send_time = last_response_time = time.monotonic()
+    for i in range(len(batches) + 1):
+      if i < len(batches):
+        can_send([make_tester_present_msg(addr, bus, subaddr) for addr, subaddr, bus in batches[i]])
+        last_send_time = time.monotonic()
+        send_times.update(dict.fromkeys(batches[i], last_send_time))
+
+      while True:
+        can_packets = can_recv(wait_for_one=True)
+        cur_time = time.monotonic()
+        for packet in can_packets:
+          for msg in packet:
+            if not len(msg.dat):
+              carlog.warning("ECU addr scan: skipping empty remote frame")
+              continue
+
+            # the same address may be scanned with and without sub-addresses
+            for subaddr in (None, msg.dat[0]):
+              if (msg.address, subaddr, msg.src) in responses and _is_tester_present_response(msg, subaddr):
+                carlog.debug(f"CAN-RX: {hex(msg.address)} - 0x{bytes.hex(msg.dat)}")
+                if (msg.address, subaddr, msg.src) in response_times:
+                  carlog.debug(f"Duplicate ECU address: {hex(msg.address)}")
+                else:
+                  response_times[(msg.address, subaddr, msg.src)] = cur_time
+                  last_response_time = cur_time
+                break
+
+        # keep sending until all batches are out, then wait for the remaining responses
+        if i < len(batches):
+          break
+        if cur_time - last_send_time > timeout:
+          break
+        if expected is not None and all(not candidates.isdisjoint(response_times) for candidates in expected):
+          break
+        # adaptive timeout: stop once responses dry up
+        if idle_timeout is not None and len(response_times) and cur_time - max(last_send_time, last_response_time) > idle_timeout:
+          break
+  except Exception:
+    carlog.exception("ECU addr scan exception")
+  return response_times, send_times
+
+
+def get_ecu_addrs(can_recv: CanRecvCallable, can_send: CanSendCallable, queries: set[EcuAddrBusType],
+                  responses: set[EcuAddrBusType], timeout: float = 1, idle_timeout: float | None = None,
+                  expected: list[set[EcuAddrBusType]] | None = None, batch_size: int = BATCH_SIZE) -> set[EcuAddrBusType]:
+  """Sends tester present to queries, returns the addresses that responded out of responses.
+
+  Waits up to timeout after the last request, less if every set of expected responses has a response,
+  or no new responses arrive for idle_timeout"""
+  response_times, _ = _query_ecu_addrs(can_recv, can_send, sorted(queries, key=lambda q: (q[2], q[0], q[1] or -1)), responses,
+                                       timeout, idle_timeout, expected, batch_size)
+  return set(response_times)
+
+
 def get_all_ecu_addrs(can_recv: CanRecvCallable, can_send: CanSendCallable, bus: int, timeout: float = 1) -> set[EcuAddrBusType]:
-  addr_list = [0x700 + i for i in range(256)] + [0x18da00f1 + (i << 8) for i in range(256)]
+  addr_list = STANDARD_11BIT_ADDRS + NORMAL_FIXED_29BIT_ADDRS
   queries: set[EcuAddrBusType] = {(addr, None, bus) for addr in addr_list}
   responses = queries
   return get_ecu_addrs(can_recv, can_send, queries, responses, timeout=timeout)
 
 
-def get_ecu_addrs(can_recv: CanRecvCallable, can_send: CanSendCallable, queries: set[EcuAddrBusType],
-                  responses: set[EcuAddrBusType], timeout: float = 1) -> set[EcuAddrBusType]:
-  ecu_responses: set[EcuAddrBusType] = set()  # set((addr, subaddr, bus),)
-  try:
-    msgs = [make_tester_present_msg(addr, bus, subaddr) for addr, subaddr, bus in queries]
+def discover_ecus(can_recv: CanRecvCallable, can_send: CanSendCallable, buses: list[int], addrs: list[int] | None = None,
+                  sub_addr_addrs: list[int] | None = None, rx_offset: int = 0x8, timeout: float = 1, idle_timeout: float | None = 0.2,
+                  batch_size: int = BATCH_SIZE) -> dict[int, list[EcuInfo]]:
+  """Scans addresses on all buses at once, returns the responding ECUs on each bus.
 
-    can_recv()
-    can_send(msgs)
-    start_time = time.monotonic()
-    while time.monotonic() - start_time < timeout:
-      can_packets = can_recv(wait_for_one=True)
-      for packet in can_packets:
-        for msg in packet:
-          if not len(msg.dat):
-            carlog.warning("ECU addr scan: skipping empty remote frame")
-            continue
-
-          subaddr = None if (msg.address, None, msg.src) in responses else msg.dat[0]
-          if (msg.address, subaddr, msg.src) in responses and _is_tester_present_response(msg, subaddr):
-            carlog.debug(f"CAN-RX: {hex(msg.address)} - 0x{bytes.hex(msg.dat)}")
-            if (msg.address, subaddr, msg.src) in ecu_responses:
-              carlog.debug(f"Duplicate ECU address: {hex(msg.address)}")
-            ecu_responses.add((msg.address, subaddr, msg.src))
-  except Exception:
-    carlog.exception("ECU addr scan exception")
-  return ecu_responses
+  addrs defaults to the 11-bit 0x700-0x7FF and 29-bit normal fixed address ranges. Each address in
+  sub_addr_addrs is additionally scanned for all 256 sub-addresses, one request per batch."""
+  if addrs is None:
+    addrs = STANDARD_11BIT_ADDRS + NORMAL_FIXED_29BIT_ADDRS
+
+  queries: list[EcuAddrBusType] = []
+  for bus in buses:
+    queries += [(addr, None, bus) for addr in addrs]
+    queries += [(addr, subaddr, bus) for addr in sub_addr_addrs or [] for subaddr in range(256)]
+
+  # attribute responses to requests by the usual response address, but accept a response on any scanned address
+  rx_to_query = {(uds.get_rx_addr_for_tx_addr(addr, rx_offset), subaddr, bus): (addr, subaddr, bus) for addr, subaddr, bus in queries}
+  responses = set(rx_to_query) | {q for q in queries if q[1] is None}
+
+  response_times, send_times = _query_ecu_addrs(can_recv, can_send, queries, responses, timeout, idle_timeout, None, batch_size)
+
+  topology: dict[int, list[EcuInfo]] = {bus: [] for bus in buses}
+  for (rx_addr, subaddr, bus), rx_time in sorted(response_times.items(), key=lambda r: (r[0][2], r[0][0], r[0][1] or -1)):
+    query = rx_to_query.get((rx_addr, subaddr, bus))
+    response_time = rx_time - send_times[query] if query is not None else None
+    topology[bus].append(EcuInfo(bus, rx_addr, subaddr, query[0] if query is not None else None, response_time))
+  return topology
@@ -1,14 +1,12 @@
 import numpy as np
-from typing import cast
-from collections import defaultdict
-from math import cos, sin
-from dataclasses import dataclass
 from opendbc.can import CANParser
 from opendbc.car import Bus, structs
 from opendbc.car.common.conversions import Conversions as CV
 from opendbc.car.ford.fordcan import CanBus
 from opendbc.car.ford.values import DBC, RADAR
 from opendbc.car.interfaces import RadarInterfaceBase
+from opendbc.car.radar_clustering import ClusterTracker
+from opendbc.car.radar_tracks import TrackColumns
 
 DELPHI_ESR_RADAR_MSGS = list(range(0x500, 0x540))
 
@@ -21,54 +19,6 @@ DELPHI_MRR_MIN_LONG_RANGE_DIST = 30  # meters
 DELPHI_MRR_CLUSTER_THRESHOLD = 5  # meters, lateral distance and relative velocity are weighted
 
 
-@dataclass
-class Cluster:
-  dRel: float = 0.0
-  yRel: float = 0.0
-  vRel: float = 0.0
-  trackId: int = 0
-
-
-def cluster_points(pts_l: list[list[float]], pts2_l: list[list[float]], max_dist: float) -> list[int]:
-  """
-  Clusters a collection of points based on another collection of points. This is useful for correlating clusters through time.
-  Points in pts2 not close enough to any point in pts are assigned -1.
-  Args:
-    pts_l: List of points to base the new clusters on
-    pts2_l: List of points to cluster using pts
-    max_dist: Max distance from cluster center to candidate point
-
-  Returns:
-    List of cluster indices for pts2 that correspond to pts
-  """
-
-  if not len(pts2_l):
-    return []
-
-  if not len(pts_l):
-    return [-1] * len(pts2_l)
-
-  max_dist_sq = max_dist ** 2
-  pts = np.array(pts_l)
-  pts2 = np.array(pts2_l)
-
-  # Compute squared norms
-  pts_norm_sq = np.sum(pts ** 2, axis=1)
-  pts2_norm_sq = np.sum(pts2 ** 2, axis=1)
-
-  # Compute squared Euclidean distances using the identity
-  # dist_sq[i, j] = ||pts2[i]||^2 + ||pts[j]||^2 - 2 * pts2[i] . pts[j]
-  dist_sq = pts2_norm_sq[:, np.newaxis] + pts_norm_sq[np.newaxis, :] - 2 * np.dot(pts2, pts.T)
-  dist_sq = np.maximum(dist_sq, 0.0)
-
-  # Find the closest cluster for each point and assign its index
-  closest_clusters = np.argmin(dist_sq, axis=1)
-  closest_dist_sq = dist_sq[np.arange(len(pts2)), closest_clusters]
-  cluster_idxs = np.where(closest_dist_sq < max_dist_sq, closest_clusters, -1)
-
-  return cast(list[int], cluster_idxs.tolist())
-
-
 def _create_delphi_esr_radar_can_parser(CP) -> CANParser:
   msg_n = len(DELPHI_ESR_RADAR_MSGS)
   messages = list(zip(DELPHI_ESR_RADAR_MSGS, [20] * msg_n, strict=True))
@@ -93,8 +43,9 @@ class RadarInterface(RadarInterfaceBase):
   def __init__(self, CP):
     super().__init__(CP)
 
-    self.points: list[list[float]] = []
-    self.clusters: list[Cluster] = []
+    self.points: list[np.ndarray] = []
+    # lateral distance and relative velocity are weighted
+    self.tracker = ClusterTracker(DELPHI_MRR_CLUSTER_THRESHOLD, weights=(1., 2., 2.))
 
     self.updated_messages = set()
     self.radar = DBC[CP.carFingerprint].get(Bus.radar)
@@ -110,6 +61,14 @@ class RadarInterface(RadarInterfaceBase):
     elif self.radar == RADAR.DELPHI_MRR:
       self.rcp = _create_delphi_mrr_radar_can_parser(CP)
       self.trigger_msg = DELPHI_MRR_RADAR_HEADER_ADDR
+      ids = range(1, DELPHI_MRR_RADAR_MSG_COUNT + 1)
+      self.detections = TrackColumns(self.rcp, [f"MRR_Detection_{ii:03d}" for ii in ids], {
+        'scanIndex': [f"CAN_SCAN_INDEX_2LSB_{ii:02d}" for ii in ids],
+        'valid': [f"CAN_DET_VALID_LEVEL_{ii:02d}" for ii in ids],
+        'dist': [f"CAN_DET_RANGE_{ii:02d}" for ii in ids],  # m [0|255.984]
+        'azimuth': [f"CAN_DET_AZIMUTH_{ii:02d}" for ii in ids],  # rad [-3.1416|3.13964]
+        'distRate': [f"CAN_DET_RANGE_RATE_{ii:02d}" for ii in ids],  # m/s [-128|127.984]
+      })
     else:
       raise ValueError(f"Unsupported radar: {self.radar}")
 
@@ -177,7 +136,7 @@ class RadarInterface(RadarInterfaceBase):
     if self.radar_unavailable_cnt >= 5:
       self.pts.clear()
       self.points.clear()
-      self.clusters.clear()
+      self.tracker.reset()
       ret.errors.radarUnavailableTemporary = True
       return True
 
@@ -194,73 +153,41 @@ class RadarInterface(RadarInterfaceBase):
     if self.scan_index_invalid_cnt >= 5:
       ret.errors.wrongConfig = True
 
-    for ii in range(1, DELPHI_MRR_RADAR_MSG_COUNT + 1):
-      msg = self.rcp.vl[f"MRR_Detection_{ii:03d}"]
-
-      # SCAN_INDEX rotates through 0..3 on each message for different measurement modes
-      # Indexes 0 and 2 have a max range of ~40m, 1 and 3 are ~170m (MRR_Header_SensorCoverage->CAN_RANGE_COVERAGE)
-      # Indexes 0 and 1 have a Doppler coverage of +-71 m/s, 2 and 3 have +-60 m/s
-      scanIndex = msg[f"CAN_SCAN_INDEX_2LSB_{ii:02d}"]
-
-      # Throw out old measurements. Very unlikely to happen, but is proper behavior
-      if scanIndex != headerScanIndex:
-        continue
+    det = self.detections.read()
 
-      valid = bool(msg[f"CAN_DET_VALID_LEVEL_{ii:02d}"])
+    # SCAN_INDEX rotates through 0..3 on each message for different measurement modes
+    # Indexes 0 and 2 have a max range of ~40m, 1 and 3 are ~170m (MRR_Header_SensorCoverage->CAN_RANGE_COVERAGE)
+    # Indexes 0 and 1 have a Doppler coverage of +-71 m/s, 2 and 3 have +-60 m/s
+    # Throw out old measurements. Very unlikely to happen, but is proper behavior
+    valid = (det['scanIndex'] == headerScanIndex) & (det['valid'] != 0)
 
-      # Long range measurement mode is more sensitive and can detect the road surface
-      dist = msg[f"CAN_DET_RANGE_{ii:02d}"]  # m [0|255.984]
-      if scanIndex in (1, 3) and dist < DELPHI_MRR_MIN_LONG_RANGE_DIST:
-        valid = False
+    # Long range measurement mode is more sensitive and can detect the road surface
+    if headerScanIndex in (1, 3):
+      valid &= det['dist'] >= DELPHI_MRR_MIN_LONG_RANGE_DIST
 
-      if valid:
-        azimuth = msg[f"CAN_DET_AZIMUTH_{ii:02d}"]              # rad [-3.1416|3.13964]
-        distRate = msg[f"CAN_DET_RANGE_RATE_{ii:02d}"]          # m/s [-128|127.984]
-        dRel = cos(azimuth) * dist                              # m from front of car
-        yRel = -sin(azimuth) * dist                             # in car frame's y axis, left is positive
-
-        self.points.append([dRel, yRel * 2, distRate * 2])
+    dist, azimuth = det['dist'][valid], det['azimuth'][valid]
+    dRel = np.cos(azimuth) * dist  # m from front of car
+    yRel = -np.sin(azimuth) * dist  # in car frame's y axis, left is positive
+    self.points.append(np.column_stack((dRel, yRel, det['distRate'][valid])))
 
     # Cluster and publish using stored points once we've cycled through all 4 scan modes
     if headerScanIndex != 3:
       return False
 
     # Cluster points from this cycle against the centroids from the previous cycle
-    prev_keys = [[p.dRel, p.yRel * 2, p.vRel * 2] for p in self.clusters]
-    labels = cluster_points(prev_keys, self.points, DELPHI_MRR_CLUSTER_THRESHOLD)
-
-    points_by_track_id = defaultdict(list)
-    for idx, label in enumerate(labels):
-      if label != -1:
-        points_by_track_id[self.clusters[label].trackId].append(self.points[idx])
-      else:
-        points_by_track_id[self.track_id].append(self.points[idx])
-        self.track_id += 1
-
-    self.clusters = []
-    for idx, (track_id, pts) in enumerate(points_by_track_id.items()):
-      dRel = [p[0] for p in pts]
-      min_dRel = min(dRel)
-      dRel = sum(dRel) / len(dRel)
-
-      yRel = [p[1] for p in pts]
-      yRel = sum(yRel) / len(yRel) / 2
-
-      vRel = [p[2] for p in pts]
-      vRel = sum(vRel) / len(vRel) / 2
-
-      # FIXME: creating capnp RadarPoint and accessing attributes are both expensive, so we store a dataclass and reuse the RadarPoint
-      self.clusters.append(Cluster(dRel=dRel, yRel=yRel, vRel=vRel, trackId=track_id))
+    clusters = self.tracker.update(np.concatenate(self.points))
 
+    for idx, (track_id, dRel, yRel, vRel) in enumerate(zip(clusters.trackId.tolist(), clusters.dRelMin.tolist(),
+                                                            clusters.yRel.tolist(), clusters.vRel.tolist(), strict=True)):
       if idx not in self.pts:
         self.pts[idx] = structs.RadarData.RadarPoint()
 
-      self.pts[idx].dRel = min_dRel
+      self.pts[idx].dRel = dRel
       self.pts[idx].yRel = yRel
       self.pts[idx].vRel = vRel
       self.pts[idx].trackId = track_id
 
-    for idx in range(len(points_by_track_id), len(self.pts)):
+    for idx in range(len(clusters.trackId), len(self.pts)):
       del self.pts[idx]
 
     self.points = []
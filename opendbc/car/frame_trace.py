@@ -0,0 +1,41 @@
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from enum import IntEnum
+
+from opendbc.car.carlog import carlog
+
+
+class FrameDirection(IntEnum):
+  RX = 0
+  TX = 1
+
+
+class FrameTrace:
+  """Ring buffer of the last raw CAN frames sent and received by a diagnostic client.
+
+  Recording is an append of the unformatted frame, formatting only happens when the trace is dumped."""
+  def __init__(self, maxlen: int = 1024):
+    self.frames: deque[tuple[int, FrameDirection, int, int, bytes]] = deque(maxlen=maxlen)
+
+  def __len__(self) -> int:
+    return len(self.frames)
+
+  def __iter__(self) -> Iterator[tuple[int, FrameDirection, int, int, bytes]]:
+    return iter(self.frames)
+
+  def record(self, direction: FrameDirection, bus: int, addr: int, dat: bytes) -> None:
+    self.frames.append((time.monotonic_ns(), direction, bus, addr, dat))
+
+  def clear(self) -> None:
+    self.frames.clear()
+
+  def format(self) -> list[str]:
+    if not self.frames:
+      return []
+    start_nanos = self.frames[0][0]
+    return [f"{(t - start_nanos) * 1e-6:10.3f} ms  {direction.name}  bus {bus}  {hex(addr)}  0x{dat.hex()}"
+            for t, direction, bus, addr, dat in self.frames]
+
+  def dump(self, reason: str, log: Callable[[str], None] = carlog.error) -> None:
+    log("\n".join([f"{reason} - last {len(self.frames)} frames:", *self.format()]))
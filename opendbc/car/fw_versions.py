@@ -8,7 +8,7 @@ from opendbc.car import uds
 from opendbc.car.can_definitions import CanRecvCallable, CanSendCallable
 from opendbc.car.carlog import carlog
 from opendbc.car.structs import CarParams
-from opendbc.car.ecu_addrs import get_ecu_addrs
+from opendbc.car.ecu_addrs import get_ecu_addrs, schedule_queries
 from opendbc.car.fingerprints import FW_VERSIONS
 from opendbc.car.fw_query_definitions import ESSENTIAL_ECUS, AddrType, EcuAddrBusType, FwQueryConfig, LiveFwVersions, OfflineFwVersions
 from opendbc.car.interfaces import get_interface_attr
@@ -172,9 +172,10 @@ def match_fw_to_car(fw_versions: list[CarParams.CarFw], vin: str, allow_exact: b
 
 def get_present_ecus(can_recv: CanRecvCallable, can_send: CanSendCallable, set_obd_multiplexing: ObdCallback) -> set[EcuAddrBusType]:
   # queries are split by OBD multiplexing mode
-  queries: dict[bool, list[list[EcuAddrBusType]]] = {True: [], False: []}
-  parallel_queries: dict[bool, list[EcuAddrBusType]] = {True: [], False: []}
+  queries: dict[bool, list[EcuAddrBusType]] = {True: [], False: []}
   responses: set[EcuAddrBusType] = set()
+  # responses each query could get, depending on the request's rx offset
+  query_responses: dict[EcuAddrBusType, set[EcuAddrBusType]] = defaultdict(set)
 
   for brand, config, r in REQUESTS:
     for ecu_type, addr, sub_addr in config.get_all_ecus(VERSIONS[brand]):
@@ -182,25 +183,21 @@ def get_present_ecus(can_recv: CanRecvCallable, can_send: CanSendCallable, set_o
       if len(r.whitelist_ecus) == 0 or ecu_type in r.whitelist_ecus:
         a = (addr, sub_addr, r.bus)
         # Build set of queries
-        if sub_addr is None:
-          if a not in parallel_queries[r.obd_multiplexing]:
-            parallel_queries[r.obd_multiplexing].append(a)
-        else:  # subaddresses must be queried one by one
-          if [a] not in queries[r.obd_multiplexing]:
-            queries[r.obd_multiplexing].append([a])
+        if a not in queries[r.obd_multiplexing]:
+          queries[r.obd_multiplexing].append(a)
 
         # Build set of expected responses to filter
-        response_addr = uds.get_rx_addr_for_tx_addr(addr, r.rx_offset)
-        responses.add((response_addr, sub_addr, r.bus))
-
-  for obd_multiplexing in queries:
-    queries[obd_multiplexing].insert(0, parallel_queries[obd_multiplexing])
+        response = (uds.get_rx_addr_for_tx_addr(addr, r.rx_offset), sub_addr, r.bus)
+        responses.add(response)
+        query_responses[a].add(response)
 
   ecu_responses = set()
   for obd_multiplexing in queries:
     set_obd_multiplexing(obd_multiplexing)
-    for query in queries[obd_multiplexing]:
-      ecu_responses.update(get_ecu_addrs(can_recv, can_send, set(query), responses, timeout=0.1))
+    # subaddresses of the same address must be queried one by one, everything else is queried in parallel
+    for query in schedule_queries(queries[obd_multiplexing]):
+      ecu_responses.update(get_ecu_addrs(can_recv, can_send, set(query), responses, timeout=0.1,
+                                         expected=[query_responses[q] for q in query]))
   return ecu_responses
 
 
@@ -1,8 +1,9 @@
-import math
+import numpy as np
 
 from opendbc.can import CANParser
 from opendbc.car import Bus, structs
 from opendbc.car.interfaces import RadarInterfaceBase
+from opendbc.car.radar_tracks import TrackColumns
 from opendbc.car.hyundai.values import DBC
 
 RADAR_START_ADDR = 0x500
@@ -27,6 +28,10 @@ class RadarInterface(RadarInterfaceBase):
 
     self.radar_off_can = CP.radarUnavailable
     self.rcp = get_radar_can_parser(CP)
+    self.addrs = list(range(RADAR_START_ADDR, RADAR_START_ADDR + RADAR_MSG_COUNT))
+    if self.rcp is not None:
+      self.tracks = TrackColumns(self.rcp, [f"RADAR_TRACK_{addr:x}" for addr in self.addrs],
+                                 {'STATE': 'STATE', 'AZIMUTH': 'AZIMUTH', 'LONG_DIST': 'LONG_DIST', 'REL_SPEED': 'REL_SPEED'})
 
   def update(self, can_strings):
     if self.radar_off_can or (self.rcp is None):
@@ -51,23 +56,10 @@ class RadarInterface(RadarInterfaceBase):
     if not self.rcp.can_valid:
       ret.errors.canError = True
 
-    for addr in range(RADAR_START_ADDR, RADAR_START_ADDR + RADAR_MSG_COUNT):
-      msg = self.rcp.vl[f"RADAR_TRACK_{addr:x}"]
-
-      if addr not in self.pts:
-        self.pts[addr] = structs.RadarData.RadarPoint()
-        self.pts[addr].trackId = self.track_id
-        self.track_id += 1
-
-      valid = msg['STATE'] in (3, 4)
-      if valid:
-        azimuth = math.radians(msg['AZIMUTH'])
-        self.pts[addr].dRel = math.cos(azimuth) * msg['LONG_DIST']
-        self.pts[addr].yRel = 0.5 * -math.sin(azimuth) * msg['LONG_DIST']
-        self.pts[addr].vRel = msg['REL_SPEED']
-
-      else:
-        del self.pts[addr]
+    tracks = self.tracks.read()
+    valid = np.isin(tracks['STATE'], (3, 4))
+    azimuth = np.radians(tracks['AZIMUTH'])
+    self._update_points(self.addrs, valid, np.cos(azimuth) * tracks['LONG_DIST'], 0.5 * -np.sin(azimuth) * tracks['LONG_DIST'], tracks['REL_SPEED'])
 
     ret.points = list(self.pts.values())
     return ret
@@ -13,7 +13,9 @@ from opendbc.car import structs
 from opendbc.car.can_definitions import CanData, CanRecvCallable, CanSendCallable
 from opendbc.car.common.basedir import BASEDIR
 from opendbc.car.common.conversions import Conversions as CV
+from opendbc.car.common.fastmath import clip
 from opendbc.car.common.simple_kalman import KF1D, get_kalman_gain
+from opendbc.car.common.snapshot import dump_state, load_state
 from opendbc.car.values import PLATFORMS
 from opendbc.can import CANParser
 
@@ -29,6 +31,10 @@ TORQUE_PARAMS_PATH = os.path.join(BASEDIR, 'torque_data/params.toml')
 TORQUE_OVERRIDE_PATH = os.path.join(BASEDIR, 'torque_data/override.toml')
 TORQUE_SUBSTITUTE_PATH = os.path.join(BASEDIR, 'torque_data/substitute.toml')
 
+# CarParams built by get_params, oldest evicted first
+PARAMS_CACHE_SIZE = 1024
+_params_cache: dict[tuple, structs.CarParams] = {}
+
 GEAR_SHIFTER_MAP: dict[str, structs.CarState.GearShifter] = {
   'P': GearShifter.park, 'PARK': GearShifter.park,
   'R': GearShifter.reverse, 'REVERSE': GearShifter.reverse,
@@ -74,6 +80,17 @@ def get_torque_params():
 
   return torque_params
 
+
+def _params_key(fingerprint: dict[int, dict[int, int]], car_fw: list[structs.CarParams.CarFw]) -> tuple:
+  fw_key = tuple((fw.as_reader() if hasattr(fw, 'as_reader') else fw).as_builder().to_bytes() for fw in car_fw)
+  # messages are usually an address to length dict, but some callers pass lists of addresses
+  fingerprint_key = frozenset((bus, frozenset(msgs.items()) if isinstance(msgs, dict) else tuple(msgs)) for bus, msgs in fingerprint.items())
+  return fingerprint_key, fw_key
+
+
+def clear_params_cache() -> None:
+  _params_cache.clear()
+
 # generic car and radar interfaces
 
 
@@ -91,6 +108,27 @@ class RadarInterfaceBase(ABC):
       return structs.RadarData()
     return None
 
+  def _update_points(self, keys: list, valid: np.ndarray, dRel: np.ndarray, yRel: np.ndarray, vRel: np.ndarray,
+                     new_track: np.ndarray | None = None, rows: np.ndarray | None = None) -> None:
+    """Updates self.pts from one scan of per track columns. Valid tracks are created with a new trackId, or
+    recreated on new_track, invalid tracks are removed. Only rows are processed if given, in order"""
+    valid_l, dRel_l, yRel_l, vRel_l = valid.tolist(), dRel.tolist(), yRel.tolist(), vRel.tolist()
+    new_track_l = new_track.tolist() if new_track is not None else None
+    for i in (range(len(keys)) if rows is None else rows.tolist()):
+      key = keys[i]
+      if valid_l[i]:
+        pt = self.pts.get(key)
+        if pt is None or (new_track_l is not None and new_track_l[i]):
+          pt = structs.RadarData.RadarPoint()
+          pt.trackId = self.track_id
+          self.track_id += 1
+          self.pts[key] = pt
+        pt.dRel = dRel_l[i]
+        pt.yRel = yRel_l[i]
+        pt.vRel = vRel_l[i]
+      else:
+        self.pts.pop(key, None)
+
 
 class CarInterfaceBase(ABC):
   CarState: type['CarStateBase']
@@ -116,6 +154,23 @@ class CarInterfaceBase(ABC):
       now_nanos = int(time.monotonic() * 1e9)
     return self.CC.update(c, self.CS, now_nanos)
 
+  def snapshot(self) -> bytes:
+    """Serializes the state of the CAN parsers, CarState and CarController, e.g. to resume a replay from this point"""
+    state = {k: v for k, v in self.__dict__.items() if k not in ('CP', 'CS', 'CC', 'can_parsers')}
+    state['CS'] = self.CS.snapshot()
+    state['CC'] = self.CC.snapshot()
+    state['can_parsers'] = {bus: cp.snapshot() for bus, cp in self.can_parsers.items()}
+    return dump_state(state, {'CP': self.CP})
+
+  def restore(self, dat: bytes) -> None:
+    """Restores state from snapshot() onto an interface created with the same CarParams"""
+    state = load_state(dat, {'CP': self.CP})
+    self.CS.restore(state.pop('CS'))
+    self.CC.restore(state.pop('CC'))
+    for bus, cp_state in state.pop('can_parsers').items():
+      self.can_parsers[bus].restore(cp_state)
+    self.__dict__.update(state)
+
   @staticmethod
   def get_pid_accel_limits(CP, current_speed, cruise_speed):
     return ACCEL_MIN, ACCEL_MAX
@@ -129,7 +184,26 @@ class CarInterfaceBase(ABC):
 
   @classmethod
   def get_params(cls, candidate: str, fingerprint: dict[int, dict[int, int]], car_fw: list[structs.CarParams.CarFw],
-                 alpha_long: bool, is_release: bool, docs: bool) -> structs.CarParams:
+                 alpha_long: bool, is_release: bool, docs: bool, cached: bool = True) -> structs.CarParams:
+    """
+    Returns a copy of the CarParams cached for these inputs, building them on the first call.
+    Pass cached=False to always build, such as when platform configs or torque params are patched.
+    """
+    if not cached:
+      return cls._build_params(candidate, fingerprint, car_fw, alpha_long, is_release, docs)
+
+    key = (cls, candidate, *_params_key(fingerprint, car_fw), alpha_long, is_release, docs)
+    CP = _params_cache.get(key)
+    if CP is None:
+      CP = cls._build_params(candidate, fingerprint, car_fw, alpha_long, is_release, docs)
+      if len(_params_cache) >= PARAMS_CACHE_SIZE:
+        del _params_cache[next(iter(_params_cache))]
+      _params_cache[key] = CP
+    return CP.copy()
+
+  @classmethod
+  def _build_params(cls, candidate: str, fingerprint: dict[int, dict[int, int]], car_fw: list[structs.CarParams.CarFw],
+                    alpha_long: bool, is_release: bool, docs: bool) -> structs.CarParams:
     ret = CarInterfaceBase.get_std_params(candidate)
 
     platform = PLATFORMS[candidate]
@@ -289,6 +363,13 @@ class CarStateBase(ABC):
   def update(self, can_parsers) -> structs.CarState:
     pass
 
+  def snapshot(self) -> bytes:
+    """Serializes all mutable state, including the speed Kalman filter and last output"""
+    return dump_state(self.__dict__, {'CP': self.CP})
+
+  def restore(self, dat: bytes) -> None:
+    self.__dict__.update(load_state(dat, {'CP': self.CP}))
+
   def parse_wheel_speeds(self, cs, fl, fr, rl, rr, unit=CV.KPH_TO_MS):
     cs.vEgoRaw = sum((fl, fr, rl, rr)) / 4 * unit * self.CP.wheelSpeedFactor
     cs.vEgo, cs.aEgo = self.update_speed_kf(cs.vEgoRaw)
@@ -311,7 +392,7 @@ class CarStateBase(ABC):
   def update_steering_pressed(self, steering_pressed, steering_pressed_min_count):
     """Applies filtering on steering pressed for noisy driver torque signals."""
     self.steering_pressed_cnt += 1 if steering_pressed else -1
-    self.steering_pressed_cnt = int(np.clip(self.steering_pressed_cnt, 0, steering_pressed_min_count * 2 + 1))
+    self.steering_pressed_cnt = clip(self.steering_pressed_cnt, 0, steering_pressed_min_count * 2 + 1)
     return self.steering_pressed_cnt > steering_pressed_min_count
 
   def update_blinker_from_stalk(self, blinker_time: int, left_blinker_stalk: bool, right_blinker_stalk: bool):
@@ -366,6 +447,13 @@ class CarControllerBase(ABC):
   def update(self, CC: structs.CarControl, CS: CarStateBase, now_nanos: int) -> tuple[structs.CarControl.Actuators, list[CanData]]:
     pass
 
+  def snapshot(self) -> bytes:
+    """Serializes all mutable state, including packer counters and controller filters"""
+    return dump_state(self.__dict__, {'CP': self.CP})
+
+  def restore(self, dat: bytes) -> None:
+    self.__dict__.update(load_state(dat, {'CP': self.CP}))
+
 
 INTERFACE_ATTR_FILE = {
   "FINGERPRINTS": "fingerprints",
@@ -5,13 +5,15 @@ from functools import partial
 from opendbc.car import uds
 from opendbc.car.can_definitions import CanData, CanRecvCallable, CanSendCallable
 from opendbc.car.carlog import carlog
+from opendbc.car.frame_trace import FrameTrace
 from opendbc.car.fw_query_definitions import AddrType
 
 
 class IsoTpParallelQuery:
   def __init__(self, can_send: CanSendCallable, can_recv: CanRecvCallable, bus: int, addrs: list[int] | list[AddrType],
                request: list[bytes], response: list[bytes], response_offset: int = 0x8,
-               functional_addrs: list[int] | None = None, response_pending_timeout: float = 10) -> None:
+               functional_addrs: list[int] | None = None, response_pending_timeout: float = 10, can_fd: bool = False,
+               separation_time: float = 0.01, trace: FrameTrace | None = None) -> None:
     self.can_send = can_send
     self.can_recv = can_recv
     self.bus = bus
@@ -19,6 +21,9 @@ class IsoTpParallelQuery:
     self.response = response
     self.functional_addrs = functional_addrs or []
     self.response_pending_timeout = response_pending_timeout
+    self.can_fd = can_fd
+    self.separation_time = separation_time
+    self.trace = trace
 
     real_addrs = [a if isinstance(a, tuple) else (a, None) for a in addrs]
     for tx_addr, _ in real_addrs:
@@ -26,21 +31,29 @@ class IsoTpParallelQuery:
 
     self.msg_addrs = {tx_addr: uds.get_rx_addr_for_tx_addr(tx_addr[0], rx_offset=response_offset) for tx_addr in real_addrs}
     self.msg_buffer: dict[int, list[CanData]] = defaultdict(list)
+    self.negative_responses: dict[AddrType, bytes] = {}  # from the last get_data, for callers that retry differently
 
-  def rx(self) -> None:
-    """Drain can socket and sort messages into buffers based on address"""
-    can_packets = self.can_recv(wait_for_one=True)
+  def rx(self, wait_for_one: bool = True) -> int:
+    """Drain can socket and sort messages into buffers based on address, returns the number buffered"""
+    can_packets = self.can_recv(wait_for_one=wait_for_one)
 
+    received = 0
     for packet in can_packets:
       for msg in packet:
         if msg.src == self.bus and msg.address in self.msg_addrs.values():
           self.msg_buffer[msg.address].append(CanData(msg.address, msg.dat, msg.src))
+          received += 1
+    return received
 
   def _can_tx(self, tx_addr: int, dat: bytes, bus: int):
     """Helper function to send single message"""
     msg = CanData(tx_addr, dat, bus)
     self.can_send([msg])
 
+  def _can_tx_many(self, msgs: list[tuple[int, bytes, int]]):
+    """Helper function to send consecutive frames in one call"""
+    self.can_send([CanData(*msg) for msg in msgs])
+
   def _can_rx(self, addr, sub_addr=None):
     """Helper function to retrieve message with specified address and subaddress from buffer"""
     keep_msgs = []
@@ -66,12 +79,12 @@ class IsoTpParallelQuery:
 
   def _create_isotp_msg(self, tx_addr: int, sub_addr: int | None, rx_addr: int):
     can_client = uds.CanClient(self._can_tx, partial(self._can_rx, rx_addr, sub_addr=sub_addr), tx_addr, rx_addr,
-                               self.bus, sub_addr=sub_addr)
+                               self.bus, sub_addr=sub_addr, can_fd=self.can_fd, can_send_many=self._can_tx_many, trace=self.trace)
 
-    # uses iso-tp frame separation time of 10 ms
+    # defaults to an iso-tp frame separation time of 10 ms, ECUs known to keep up can be queried with 0
     # TODO: use single_frame_mode so ECUs can send as fast as they want,
     # as well as reduces chances we process messages from previous queries
-    return uds.IsoTpMessage(can_client, timeout=0, separation_time=0.01)
+    return uds.IsoTpMessage(can_client, timeout=0, separation_time=self.separation_time)
 
   def get_data(self, timeout: float, total_timeout: float = 60.) -> dict[AddrType, bytes]:
     self._drain_rx()
@@ -96,17 +109,25 @@ class IsoTpParallelQuery:
       msg.send(self.request[0], setup_only=len(self.functional_addrs) > 0)
 
     results = {}
+    self.negative_responses = {}
     start_time = time.monotonic()
     addrs_responded = set()  # track addresses that have ever sent a valid iso-tp frame for timeout logging
     response_timeouts = {tx_addr: start_time + timeout for tx_addr in self.msg_addrs}
     while True:
-      self.rx()
+      # don't block on the socket while consecutive frames are waiting for their separation time
+      tx_deadlines = [msg.tx_deadline for tx_addr, msg in msgs.items() if msg.tx_block and not request_done[tx_addr]]
+      if not self.rx(wait_for_one=not tx_deadlines) and tx_deadlines:
+        # nothing to handle, sleep until the next frame is due or a response times out instead of polling
+        next_timeout = min(response_timeouts[tx_addr] for tx_addr in msgs if not request_done[tx_addr])
+        time.sleep(max(0., min(*tx_deadlines, next_timeout) - time.monotonic()))
 
       for tx_addr, msg in msgs.items():
         try:
           dat, rx_in_progress = msg.recv()
         except Exception:
           carlog.exception(f"Error processing UDS response: {tx_addr}")
+          if self.trace is not None:
+            self.trace.dump(f"iso-tp query error: {tx_addr}")
           request_done[tx_addr] = True
           continue
 
@@ -143,6 +164,8 @@ class IsoTpParallelQuery:
             carlog.error(f"iso-tp query response pending: {tx_addr}")
           else:
             request_done[tx_addr] = True
+            if dat[0] == 0x7F:
+              self.negative_responses[tx_addr] = dat
             carlog.error(f"iso-tp query bad response: {tx_addr} - 0x{dat.hex()}")
 
       # Mark request done if address timed out
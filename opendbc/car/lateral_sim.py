@@ -0,0 +1,191 @@
+"""
+Vectorized lateral limiters, and a simulator running them over many commanded trajectories for many platforms at once.
+
+The limiters mirror the scalar ones in opendbc.car.lateral element for element. Limit parameters may be NumPy arrays
+with one value per platform, broadcasting against the (platforms, trajectories) shaped state.
+"""
+import importlib
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import numpy as np
+
+from opendbc.car import DT_CTRL
+from opendbc.car.lateral import AngleSteeringLimits, CurvatureSteeringLimits
+
+# jerk is measured over half a second
+JERK_MEAS_T = 0.5
+
+TORQUE_LIMIT_NAMES = ('STEER_MAX', 'STEER_DELTA_UP', 'STEER_DELTA_DOWN', 'STEER_STEP')
+DRIVER_TORQUE_LIMIT_NAMES = ('STEER_DRIVER_ALLOWANCE', 'STEER_DRIVER_FACTOR', 'STEER_DRIVER_MULTIPLIER')
+MEAS_TORQUE_LIMIT_NAMES = ('STEER_ERROR_MAX',)
+
+
+def apply_driver_steer_torque_limits(apply_torque, apply_torque_last, driver_torque, LIMITS, steer_max=None) -> np.ndarray:
+  if steer_max is None:
+    steer_max = LIMITS.STEER_MAX
+
+  # limits due to driver torque
+  driver_max_torque = steer_max + (LIMITS.STEER_DRIVER_ALLOWANCE + driver_torque * LIMITS.STEER_DRIVER_FACTOR) * LIMITS.STEER_DRIVER_MULTIPLIER
+  driver_min_torque = -steer_max + (-LIMITS.STEER_DRIVER_ALLOWANCE + driver_torque * LIMITS.STEER_DRIVER_FACTOR) * LIMITS.STEER_DRIVER_MULTIPLIER
+  max_steer_allowed = np.maximum(np.minimum(steer_max, driver_max_torque), 0)
+  min_steer_allowed = np.minimum(np.maximum(-steer_max, driver_min_torque), 0)
+  apply_torque = np.clip(apply_torque, min_steer_allowed, max_steer_allowed)
+
+  # slow rate if steer torque increases in magnitude
+  up = apply_torque_last > 0
+  lower = np.where(up, np.maximum(apply_torque_last - LIMITS.STEER_DELTA_DOWN, -LIMITS.STEER_DELTA_UP), apply_torque_last - LIMITS.STEER_DELTA_UP)
+  upper = np.where(up, apply_torque_last + LIMITS.STEER_DELTA_UP, np.minimum(apply_torque_last + LIMITS.STEER_DELTA_DOWN, LIMITS.STEER_DELTA_UP))
+  return np.round(np.clip(apply_torque, lower, upper))
+
+
+def apply_dist_to_meas_limits(val, val_last, val_meas, STEER_DELTA_UP, STEER_DELTA_DOWN, STEER_ERROR_MAX, STEER_MAX) -> np.ndarray:
+  # limits due to comparison of commanded val VS measured val (torque/angle/curvature)
+  max_lim = np.minimum(np.maximum(val_meas + STEER_ERROR_MAX, STEER_ERROR_MAX), STEER_MAX)
+  min_lim = np.maximum(np.minimum(val_meas - STEER_ERROR_MAX, -STEER_ERROR_MAX), -STEER_MAX)
+  val = np.clip(val, min_lim, max_lim)
+
+  # slow rate if val increases in magnitude
+  up = val_last > 0
+  lower = np.where(up, np.maximum(val_last - STEER_DELTA_DOWN, -STEER_DELTA_UP), val_last - STEER_DELTA_UP)
+  upper = np.where(up, val_last + STEER_DELTA_UP, np.minimum(val_last + STEER_DELTA_DOWN, STEER_DELTA_UP))
+  return np.clip(val, lower, upper)
+
+
+def apply_meas_steer_torque_limits(apply_torque, apply_torque_last, motor_torque, LIMITS) -> np.ndarray:
+  return np.round(apply_dist_to_meas_limits(apply_torque, apply_torque_last, motor_torque, LIMITS.STEER_DELTA_UP, LIMITS.STEER_DELTA_DOWN,
+                                            LIMITS.STEER_ERROR_MAX, LIMITS.STEER_MAX))
+
+
+def apply_std_steer_angle_limits(apply_angle, apply_angle_last, v_ego, steering_angle, lat_active, limits: AngleSteeringLimits) -> np.ndarray:
+  # pick angle rate limits based on wind up/down
+  steer_up = (apply_angle_last * apply_angle >= 0.) & (np.abs(apply_angle) > np.abs(apply_angle_last))
+  angle_rate_lim = np.where(steer_up, np.interp(v_ego, *limits.ANGLE_RATE_LIMIT_UP), np.interp(v_ego, *limits.ANGLE_RATE_LIMIT_DOWN))
+  new_apply_angle = np.clip(apply_angle, apply_angle_last - angle_rate_lim, apply_angle_last + angle_rate_lim)
+
+  # angle is current steering wheel angle when inactive on all angle cars
+  new_apply_angle = np.where(lat_active, new_apply_angle, steering_angle)
+  return np.clip(new_apply_angle, -limits.STEER_ANGLE_MAX, limits.STEER_ANGLE_MAX)
+
+
+def apply_curvature_limits(apply_curvature, apply_curvature_last, v_ego, curvature, lat_active, steer_step, limits: CurvatureSteeringLimits) -> np.ndarray:
+  v_ego = np.maximum(v_ego, 1)
+
+  # *** max lateral accel limit ***
+  max_curvature = limits.MAX_LATERAL_ACCEL / (v_ego ** 2)
+  new_apply_curvature = np.clip(apply_curvature, -max_curvature, max_curvature)
+
+  # *** max lateral jerk limit ***
+  max_jerk = (limits.MAX_LATERAL_JERK / (v_ego ** 2)) * (steer_step * DT_CTRL)
+  new_apply_curvature = np.clip(new_apply_curvature, apply_curvature_last - max_jerk, apply_curvature_last + max_jerk)
+
+  # curvature is current curvature when inactive
+  new_apply_curvature = np.where(lat_active, new_apply_curvature, curvature)
+  return np.clip(new_apply_curvature, -limits.CURVATURE_MAX, limits.CURVATURE_MAX)
+
+
+def stack_limits(params: list, names: tuple[str, ...], default: float | None = None) -> SimpleNamespace:
+  """Stacks limit attributes of many platforms into (platforms, 1) arrays, using default for missing attributes if given"""
+  def get(p, name):
+    return getattr(p, name) if default is None else getattr(p, name, default)
+  return SimpleNamespace(**{name: np.array([[float(get(p, name))] for p in params]) for name in names})
+
+
+@dataclass
+class LateralLimitReport:
+  """Worst case over all trajectories, one value per platform"""
+  max_accel: np.ndarray  # m/s^2
+  max_jerk_up: np.ndarray  # m/s^3, lateral accel magnitude increase over JERK_MEAS_T
+  max_jerk_down: np.ndarray  # m/s^3, lateral accel magnitude decrease over JERK_MEAS_T
+  time_to_max: np.ndarray  # s, fastest time to reach max_accel, from the start of the trajectory
+
+
+def lateral_limit_report(lat_accel: np.ndarray) -> LateralLimitReport:
+  """Summarizes (platforms, trajectories, frames) lateral accelerations, sampled every DT_CTRL"""
+  accel = np.abs(lat_accel)
+  frames = round(JERK_MEAS_T / DT_CTRL)
+  delta = accel[..., frames:] - accel[..., :-frames]
+
+  max_accel = accel.max(axis=(1, 2))
+  reached = accel >= max_accel[:, None, None] - 1e-9
+  first_max = np.where(reached.any(axis=2), reached.argmax(axis=2), np.iinfo(np.int64).max).min(axis=1)
+  return LateralLimitReport(max_accel, np.maximum(delta.max(axis=(1, 2)), 0.) / JERK_MEAS_T,
+                            np.maximum(-delta.min(axis=(1, 2)), 0.) / JERK_MEAS_T, first_max * DT_CTRL)
+
+
+def simulate_torque_limits(params: list, commands: np.ndarray, driver_torque: np.ndarray | float = 0.) -> np.ndarray:
+  """Runs the torque limiter of each platform over commanded trajectories.
+
+  Args:
+    params: CarControllerParams of each platform, limited by measured torque if they define STEER_ERROR_MAX
+    commands: (trajectories, frames) normalized torque commands at 100 Hz, from -1 to 1
+    driver_torque: (trajectories, frames) driver torque in each platform's units
+
+  Returns:
+    (platforms, trajectories, frames) applied torque, held between steer frames. The EPS is assumed to
+    track the applied torque exactly for platforms limited by measured torque
+  """
+  meas = np.array([[hasattr(p, 'STEER_ERROR_MAX')] for p in params])
+  limits = stack_limits(params, TORQUE_LIMIT_NAMES)
+  vars(limits).update(vars(stack_limits(params, DRIVER_TORQUE_LIMIT_NAMES + MEAS_TORQUE_LIMIT_NAMES, default=0.)))
+
+  commands = np.asarray(commands, dtype=float)
+  driver_torque = np.broadcast_to(driver_torque, commands.shape)
+  out = np.zeros((len(params), *commands.shape))
+  last = np.zeros((len(params), commands.shape[0]))
+  for frame in range(commands.shape[1]):
+    new_torque = np.round(commands[:, frame] * limits.STEER_MAX)
+    torque = np.where(meas, apply_meas_steer_torque_limits(new_torque, last, last, limits),
+                      apply_driver_steer_torque_limits(new_torque, last, driver_torque[:, frame], limits))
+    last = np.where(frame % limits.STEER_STEP == 0, torque, last)
+    out[:, :, frame] = last
+  return out
+
+
+def simulate_curvature_limits(limits: list[CurvatureSteeringLimits], steer_steps: list[int], commands: np.ndarray,
+                              v_ego: np.ndarray | float) -> np.ndarray:
+  """Runs the curvature limiter of each platform over commanded trajectories.
+
+  Args:
+    limits: CurvatureSteeringLimits of each platform
+    steer_steps: frames per steering command of each platform
+    commands: (trajectories, frames) commanded curvature at 100 Hz [1/m]
+    v_ego: (trajectories, frames) speed [m/s]
+
+  Returns:
+    (platforms, trajectories, frames) applied curvature, held between steer frames
+  """
+  stacked = stack_limits(limits, ('CURVATURE_MAX', 'MAX_LATERAL_ACCEL', 'MAX_LATERAL_JERK'))
+  steer_step = np.array([[s] for s in steer_steps])
+
+  commands = np.asarray(commands, dtype=float)
+  v_ego = np.broadcast_to(v_ego, commands.shape)
+  out = np.zeros((len(limits), *commands.shape))
+  last = np.zeros((len(limits), commands.shape[0]))
+  for frame in range(commands.shape[1]):
+    curvature = apply_curvature_limits(commands[:, frame], last, v_ego[:, frame], 0., True, steer_step, stacked)
+    last = np.where(frame % steer_step == 0, curvature, last)
+    out[:, :, frame] = last
+  return out
+
+
+def get_torque_platforms() -> dict[str, tuple[object, float]]:
+  """CarControllerParams and max measured lateral accel of every platform using a torque limiter"""
+  from opendbc.car.car_helpers import interfaces
+  from opendbc.car.interfaces import get_torque_params
+
+  torque_params = get_torque_params()
+  platforms = {}
+  for platform, CarInterface in sorted(interfaces.items()):
+    if platform == 'MOCK':
+      continue
+    CP = CarInterface.get_non_essential_params(platform)
+    if CP.steerControlType != 'torque' or CP.notCar or platform not in torque_params:
+      continue
+
+    params = importlib.import_module(f'opendbc.car.{CP.brand}.values').CarControllerParams(CP)
+    if not all(hasattr(params, name) for name in TORQUE_LIMIT_NAMES):
+      continue
+    if hasattr(params, 'STEER_ERROR_MAX') or all(hasattr(params, name) for name in DRIVER_TORQUE_LIMIT_NAMES):
+      platforms[platform] = (params, torque_params[platform]['MAX_LAT_ACCEL_MEASURED'])
+  return platforms
@@ -0,0 +1,154 @@
+"""
+Clustering of radar detections into tracks, for radars that report raw detections rather than tracked objects.
+
+Each scan's detections are associated with the clusters of the previous scan. Past a few hundred detections this goes
+through a uniform grid, so a scan costs O(n log n) in the number of detections and clusters instead of a dense distance
+matrix between them.
+"""
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+
+# below this many point pairs a dense distance matrix is faster than building a grid
+DENSE_MAX_PAIRS = 2 ** 18
+
+
+class GridIndex:
+  """Uniform grid over (n, dims) points, for nearest neighbor queries within a fixed radius"""
+  def __init__(self, pts: np.ndarray, radius: float):
+    self.pts = np.asarray(pts, dtype=float)
+    self.radius = radius
+    dims = self.pts.shape[1]
+    self.offsets = np.array(list(itertools.product((-1, 0, 1), repeat=dims)), dtype=np.int64)
+
+    # cells are radius wide, so all neighbors within radius are in the adjacent cells
+    cells = np.floor(self.pts / radius).astype(np.int64)
+    self.lo = cells.min(axis=0, initial=0) - 1
+    self.extent = cells.max(axis=0, initial=0) - self.lo + 2
+    self.strides = np.cumprod(np.concatenate(([1], self.extent[:-1])))
+
+    keys = (cells - self.lo) @ self.strides
+    self.order = np.argsort(keys, kind='stable')
+    self.keys = keys[self.order]
+
+  def nearest(self, queries: np.ndarray) -> np.ndarray:
+    """Index of the nearest point closer than radius for each query, lowest index on ties, -1 if there is none"""
+    queries = np.asarray(queries, dtype=float)
+    nearest = np.full(len(queries), -1, dtype=np.int64)
+    if not len(queries) or not len(self.pts):
+      return nearest
+
+    # candidate points from the neighboring cells of each query
+    cells = np.floor(queries / self.radius).astype(np.int64)[:, None, :] + self.offsets
+    inside = np.all((cells >= self.lo) & (cells < self.lo + self.extent), axis=2)
+    keys = np.clip(cells - self.lo, 0, self.extent - 1) @ self.strides
+    start = np.searchsorted(self.keys, keys, 'left')
+    counts = np.where(inside, np.searchsorted(self.keys, keys, 'right') - start, 0).ravel()
+
+    query_idx = np.repeat(np.arange(len(queries)).repeat(len(self.offsets)), counts)
+    within_cell = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    pt_idx = self.order[np.repeat(start.ravel(), counts) + within_cell]
+
+    dist_sq = np.sum((queries[query_idx] - self.pts[pt_idx]) ** 2, axis=1)
+    close = dist_sq < self.radius ** 2
+    query_idx, pt_idx, dist_sq = query_idx[close], pt_idx[close], dist_sq[close]
+
+    # closest point per query, lowest index on ties
+    order = np.lexsort((pt_idx, dist_sq, query_idx))
+    query_idx, pt_idx = query_idx[order], pt_idx[order]
+    first = np.flatnonzero(np.diff(query_idx, prepend=-1))
+    nearest[query_idx[first]] = pt_idx[first]
+    return nearest
+
+
+def cluster_points(pts: np.ndarray, pts2: np.ndarray, max_dist: float) -> np.ndarray:
+  """
+  Clusters a collection of points based on another collection of points. This is useful for correlating clusters through time.
+  Points in pts2 not close enough to any point in pts are assigned -1.
+  Args:
+    pts: Points to base the new clusters on
+    pts2: Points to cluster using pts
+    max_dist: Max distance from cluster center to candidate point
+
+  Returns:
+    Cluster indices for pts2 that correspond to pts
+  """
+  if not len(pts2):
+    return np.empty(0, dtype=np.int64)
+
+  if not len(pts):
+    return np.full(len(pts2), -1, dtype=np.int64)
+
+  pts = np.asarray(pts, dtype=float)
+  pts2 = np.asarray(pts2, dtype=float)
+  if len(pts) * len(pts2) > DENSE_MAX_PAIRS:
+    return GridIndex(pts, max_dist).nearest(pts2)
+
+  # Compute squared Euclidean distances using the identity
+  # dist_sq[i, j] = ||pts2[i]||^2 + ||pts[j]||^2 - 2 * pts2[i] . pts[j]
+  dist_sq = np.sum(pts2 ** 2, axis=1)[:, np.newaxis] + np.sum(pts ** 2, axis=1)[np.newaxis, :] - 2 * np.dot(pts2, pts.T)
+  dist_sq = np.maximum(dist_sq, 0.0)
+
+  # Find the closest cluster for each point and assign its index
+  closest_clusters = np.argmin(dist_sq, axis=1)
+  closest_dist_sq = dist_sq[np.arange(len(pts2)), closest_clusters]
+  return np.where(closest_dist_sq < max_dist ** 2, closest_clusters, -1)
+
+
+@dataclass
+class Clusters:
+  trackId: np.ndarray
+  dRel: np.ndarray  # mean of the detections
+  yRel: np.ndarray
+  vRel: np.ndarray
+  dRelMin: np.ndarray  # nearest detection
+
+
+class ClusterTracker:
+  """
+  Clusters each scan's (dRel, yRel, vRel) detections against the clusters of the previous scan.
+
+  Detections join the closest previous cluster within max_dist, with distances taken over the weighted detection,
+  and the cluster keeps its trackId. Several detections of an object share a track, so this is a gated nearest
+  neighbor association rather than a one to one assignment. Detections without a cluster each start a new track.
+  Only the clusters of the last scan are kept, so memory is bounded by the detections of a scan.
+  """
+  def __init__(self, max_dist: float, weights: tuple[float, float, float] = (1., 1., 1.)):
+    self.max_dist = max_dist
+    self.weights = np.array(weights)
+    self.next_track_id = 0
+    self.reset()
+
+  def reset(self) -> None:
+    empty = np.empty(0)
+    self.clusters = Clusters(np.empty(0, dtype=np.int64), empty, empty, empty, empty)
+
+  def update(self, detections: np.ndarray) -> Clusters:
+    """Associates one scan's (n, 3) detections, returns the new clusters in order of their first detection"""
+    detections = np.asarray(detections, dtype=float).reshape(-1, 3)
+    prev = self.clusters
+    prev_centers = np.column_stack((prev.dRel, prev.yRel, prev.vRel)) * self.weights
+    labels = cluster_points(prev_centers, detections * self.weights, self.max_dist)
+
+    matched = labels != -1
+    track_ids = np.empty(len(labels), dtype=np.int64)
+    track_ids[matched] = prev.trackId[labels[matched]]
+    new = np.flatnonzero(~matched)
+    track_ids[new] = self.next_track_id + np.arange(len(new))
+    self.next_track_id += len(new)
+
+    # clusters in order of their first detection
+    unique_ids, first, group = np.unique(track_ids, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+    group = rank[group]
+    count = np.bincount(group, minlength=len(first))
+
+    def mean(values):
+      return np.bincount(group, weights=values, minlength=len(first)) / count
+
+    d_rel_min = np.full(len(first), np.inf)
+    np.minimum.at(d_rel_min, group, detections[:, 0])
+    self.clusters = Clusters(unique_ids[np.argsort(first, kind='stable')], mean(detections[:, 0]), mean(detections[:, 1]), mean(detections[:, 2]), d_rel_min)
+    return self.clusters
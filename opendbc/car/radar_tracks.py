@@ -0,0 +1,37 @@
+from collections.abc import Sequence
+from operator import itemgetter
+
+import numpy as np
+
+from opendbc.can import CANParser
+
+
+class TrackColumns:
+  """Reads the signals of a radar's track messages into NumPy columns, one row per message.
+
+  Signals are given per column, either one name shared by all messages or one name per message.
+  The parser's value dicts are resolved once, so a read is a list comprehension per column"""
+  def __init__(self, rcp: CANParser, msgs: Sequence[str | int], signals: dict[str, str | Sequence[str]]):
+    self.vls = [rcp.vl[msg] for msg in msgs]
+    self.signals = {}
+    for column, names in signals.items():
+      if isinstance(names, str):
+        self.signals[column] = itemgetter(names)
+      else:
+        assert len(names) == len(msgs), f"{column}: expected {len(msgs)} signal names, got {len(names)}"
+        self.signals[column] = tuple(names)
+
+  def read(self) -> dict[str, np.ndarray]:
+    columns = {}
+    for column, names in self.signals.items():
+      if isinstance(names, tuple):
+        columns[column] = np.array([vl[name] for vl, name in zip(self.vls, names, strict=True)])
+      else:
+        columns[column] = np.array(list(map(names, self.vls)))
+    return columns
+
+
+def update_valid_counts(counts: np.ndarray, reset: np.ndarray, valid: np.ndarray) -> np.ndarray:
+  """Per track counters, reset to zero, then counting up on valid measurements and down to zero otherwise"""
+  counts = np.where(reset, 0, counts)
+  return np.where(valid, counts + 1, np.maximum(counts - 1, 0))
@@ -23,70 +23,78 @@ class CarState(CarStateBase):
     cp_adas = can_parsers[Bus.adas]
     ret = structs.CarState()
 
+    prop_status = cp.view("VDM_PropStatus")
+    epas_adas_status = cp.view("EPAS_AdasStatus")
+    adas_status = cp.view("VDM_AdasSts")
+    acm_status = cp_cam.view("ACM_Status")
+    cluster = cp_adas.view("Cluster")
+    indicator_lights = cp_adas.view("IndicatorLights")
+
     # Vehicle speed
-    ret.vEgoRaw = cp.vl["ESP_Status"]["ESP_Vehicle_Speed"] * CV.KPH_TO_MS
+    ret.vEgoRaw = cp.view("ESP_Status").ESP_Vehicle_Speed * CV.KPH_TO_MS
     ret.vEgo, ret.aEgo = self.update_speed_kf(ret.vEgoRaw)
     ret.standstill = abs(ret.vEgoRaw) < 0.01
-    conversion = CV.KPH_TO_MS if cp_adas.vl["Cluster"]["Cluster_Unit"] == 0 else CV.MPH_TO_MS
-    ret.vEgoCluster = cp_adas.vl["Cluster"]["Cluster_VehicleSpeed"] * conversion
+    conversion = CV.KPH_TO_MS if cluster.Cluster_Unit == 0 else CV.MPH_TO_MS
+    ret.vEgoCluster = cluster.Cluster_VehicleSpeed * conversion
 
     # Gas pedal
-    ret.gasPressed = cp.vl["VDM_PropStatus"]["VDM_AcceleratorPedalPosition"] > 0
+    ret.gasPressed = prop_status.VDM_AcceleratorPedalPosition > 0
 
     # Brake pedal
-    ret.brakePressed = cp.vl["iBESP2"]["iBESP2_BrakePedalApplied"] == 1
+    ret.brakePressed = cp.view("iBESP2").iBESP2_BrakePedalApplied == 1
 
     # Steering wheel
-    ret.steeringAngleDeg = cp.vl["EPAS_AdasStatus"]["EPAS_InternalSas"]
-    ret.steeringRateDeg = cp.vl["EPAS_AdasStatus"]["EPAS_SteeringAngleSpeed"]
-    ret.steeringTorque = cp.vl["EPAS_SystemStatus"]["EPAS_TorsionBarTorque"]
+    ret.steeringAngleDeg = epas_adas_status.EPAS_InternalSas
+    ret.steeringRateDeg = epas_adas_status.EPAS_SteeringAngleSpeed
+    ret.steeringTorque = cp.view("EPAS_SystemStatus").EPAS_TorsionBarTorque
     ret.steeringPressed = self.update_steering_pressed(abs(ret.steeringTorque) > 1.0, 5)
 
-    ret.steerFaultTemporary = cp.vl["EPAS_AdasStatus"]["EPAS_EacErrorCode"] != 0
+    ret.steerFaultTemporary = epas_adas_status.EPAS_EacErrorCode != 0
 
     # Cruise state
-    speed = min(int(cp_adas.vl["ACM_tsrCmd"]["ACM_tsrSpdDisClsMain"]), 85)
+    speed = min(int(cp_adas.view("ACM_tsrCmd").ACM_tsrSpdDisClsMain), 85)
     self.last_speed = speed if speed != 0 else self.last_speed
-    ret.cruiseState.enabled = cp_cam.vl["ACM_Status"]["ACM_FeatureStatus"] == 1
+    ret.cruiseState.enabled = acm_status.ACM_FeatureStatus == 1
     # TODO: find cruise set speed on CAN
     ret.cruiseState.speed = self.last_speed * CV.MPH_TO_MS  # detected speed limit
     if not self.CP.openpilotLongitudinalControl:
       ret.cruiseState.speed = -1
     ret.cruiseState.available = True  # cp.vl["VDM_AdasSts"]["VDM_AdasInterfaceStatus"] == 1
-    ret.cruiseState.standstill = cp.vl["VDM_AdasSts"]["VDM_AdasVehicleHoldStatus"] == 1
+    ret.cruiseState.standstill = adas_status.VDM_AdasVehicleHoldStatus == 1
 
     # ACM_Status->ACM_FaultSupervisorState normally 1, appears to go to 3 when either:
     # 1. car in park/not in drive (normal)
     # 2. something (message from another ECU) ACM relies on is faulty
     #  * ACM_FaultStatus will stay 0 since ACM itself isn't faulted
     # TODO: ACM_FaultStatus hasn't been seen high yet, but log anyway
-    ret.accFaulted = (cp_cam.vl["ACM_Status"]["ACM_FaultStatus"] == 1 or
+    ret.accFaulted = (acm_status.ACM_FaultStatus == 1 or
                       # VDM_AdasFaultStatus=Brk_Intv is the default for some reason
                       # VDM_AdasFaultStatus=Cntr_Fault isn't fully understood, but we've seen it in the wild
                       # VDM_AdasFaultStatus=Imps_Cmd was seen when sending it rapidly changing ACC enable commands, or when ACC command drops out
-                      cp.vl["VDM_AdasSts"]["VDM_AdasFaultStatus"] in (2, 3))  # 2=Cntr_Fault, 3=Imps_Cmd
+                      adas_status.VDM_AdasFaultStatus in (2, 3))  # 2=Cntr_Fault, 3=Imps_Cmd
 
     # Gear
-    ret.gearShifter = GEAR_MAP.get(int(cp.vl["VDM_PropStatus"]["VDM_Prndl_Status"]), GearShifter.unknown)
+    ret.gearShifter = GEAR_MAP.get(int(prop_status.VDM_Prndl_Status), GearShifter.unknown)
 
     # Doors and seatbelt
     # GEN2 has no CAN signal for these, but stock ACC already handles disengaging
     # door locks prevent opening while driving
     # on standstill, stock ACC disengages when a door is opened or seatbelt is unbuckled
     if not (self.CP.flags & RivianFlags.GEN2):
-      ret.doorOpen = any(cp_adas.vl["IndicatorLights"][door] != 2 for door in ("RearDriverDoor", "FrontPassengerDoor", "DriverDoor", "RearPassengerDoor"))
-      ret.seatbeltUnlatched = cp.vl["RCM_Status"]["RCM_Status_IND_WARN_BELT_DRIVER"] != 0
+      ret.doorOpen = any(door != 2 for door in (indicator_lights.RearDriverDoor, indicator_lights.FrontPassengerDoor,
+                                                indicator_lights.DriverDoor, indicator_lights.RearPassengerDoor))
+      ret.seatbeltUnlatched = cp.view("RCM_Status").RCM_Status_IND_WARN_BELT_DRIVER != 0
 
     # Blinkers
-    ret.leftBlinker = cp_adas.vl["IndicatorLights"]["TurnLightLeft"] in (1, 2)
-    ret.rightBlinker = cp_adas.vl["IndicatorLights"]["TurnLightRight"] in (1, 2)
+    ret.leftBlinker = indicator_lights.TurnLightLeft in (1, 2)
+    ret.rightBlinker = indicator_lights.TurnLightRight in (1, 2)
 
     # Blindspot
     # ret.leftBlindspot = False
     # ret.rightBlindspot = False
 
     # AEB
-    ret.stockAeb = cp_cam.vl["ACM_AebRequest"]["ACM_EnableRequest"] != 0
+    ret.stockAeb = cp_cam.view("ACM_AebRequest").ACM_EnableRequest != 0
 
     # Messages needed by carcontroller
     self.acm_lka_hba_cmd = copy.copy(cp_cam.vl["ACM_lkaHbaCmd"])
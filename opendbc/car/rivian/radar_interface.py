@@ -1,8 +1,9 @@
-import math
+import numpy as np
 
 from opendbc.can import CANParser
 from opendbc.car import Bus, structs
 from opendbc.car.interfaces import RadarInterfaceBase
+from opendbc.car.radar_tracks import TrackColumns
 from opendbc.car.rivian.values import DBC
 
 RADAR_START_ADDR = 0x500
@@ -22,6 +23,10 @@ class RadarInterface(RadarInterfaceBase):
 
     self.radar_off_can = CP.radarUnavailable
     self.rcp = get_radar_can_parser(CP)
+    self.addrs = list(range(RADAR_START_ADDR, RADAR_START_ADDR + RADAR_MSG_COUNT))
+    if self.rcp is not None:
+      self.tracks = TrackColumns(self.rcp, [f"RADAR_TRACK_{addr:x}" for addr in self.addrs],
+                                 {'STATE': 'STATE', 'MODE': 'MODE', 'AZIMUTH': 'AZIMUTH', 'LONG_DIST': 'LONG_DIST', 'REL_SPEED': 'REL_SPEED'})
 
   def update(self, can_strings):
     if self.radar_off_can or (self.rcp is None):
@@ -46,28 +51,18 @@ class RadarInterface(RadarInterfaceBase):
     if not self.rcp.can_valid:
       ret.errors.canError = True
 
-    for addr in range(RADAR_START_ADDR, RADAR_START_ADDR + RADAR_MSG_COUNT):
-      msg = self.rcp.vl[f"RADAR_TRACK_{addr:x}"]
+    tracks = self.tracks.read()
 
-      # STATE: 1=New, 2=New_updated, 3=Updated, 4=Coasting, 7=New_coasting
-      valid = msg['STATE'] in (1, 2, 3, 4, 7)
+    # STATE: 1=New, 2=New_updated, 3=Updated, 4=Coasting, 7=New_coasting
+    valid = np.isin(tracks['STATE'], (1, 2, 3, 4, 7))
 
-      # Rivian's Short Range Radar (SSR) detects close stationary objects like guardrails, which cause phantom braking.
-      # MODE: 1=SRR, 2=LRR, 3=SRR_and_LRR
-      valid = valid and msg['MODE'] in (2, 3)
+    # Rivian's Short Range Radar (SSR) detects close stationary objects like guardrails, which cause phantom braking.
+    # MODE: 1=SRR, 2=LRR, 3=SRR_and_LRR
+    valid &= np.isin(tracks['MODE'], (2, 3))
 
-      if valid:
-        if addr not in self.pts or msg['STATE'] in (1, 2, 7):
-          self.pts[addr] = structs.RadarData.RadarPoint()
-          self.pts[addr].trackId = self.track_id
-          self.track_id += 1
-
-        azimuth = math.radians(msg['AZIMUTH'])
-        self.pts[addr].dRel = math.cos(azimuth) * msg['LONG_DIST']
-        self.pts[addr].yRel = -math.sin(azimuth) * msg['LONG_DIST']
-        self.pts[addr].vRel = msg['REL_SPEED']
-      elif addr in self.pts:
-        del self.pts[addr]
+    azimuth = np.radians(tracks['AZIMUTH'])
+    self._update_points(self.addrs, valid, np.cos(azimuth) * tracks['LONG_DIST'], -np.sin(azimuth) * tracks['LONG_DIST'], tracks['REL_SPEED'],
+                        np.isin(tracks['STATE'], (1, 2, 7)))
 
     ret.points = list(self.pts.values())
     return ret
@@ -1,49 +1,80 @@
 import struct
+from functools import lru_cache
 
-from Crypto.Hash import CMAC
 from Crypto.Cipher import AES
 
+MASK_128 = (1 << 128) - 1
 
-def add_mac(key, trip_cnt, reset_cnt, msg_cnt, msg):
-  # TODO: clean up conversion to and from hex
+# [Message ID (16 bits)][Payload (32 bits)][Freshness Value (48 bits)], padded to a full block for CMAC
+AUTH_FORMAT = struct.Struct('>H4sHI')
+AUTH_PADDING = b'\x80\x00\x00\x00'
 
-  addr, payload, bus = msg
-  reset_flag = reset_cnt & 0b11
-  msg_cnt_flag = msg_cnt & 0b11
-  payload = payload[:4]
 
-  # Step 1: Build Freshness Value (48 bits)
-  # [Trip Counter (16 bit)][[Reset Counter (20 bit)][Message Counter (8 bit)][Reset Flag (2 bit)][Padding (2 bit)]
-  freshness_value = struct.pack('>HI', trip_cnt, (reset_cnt << 12) | ((msg_cnt & 0xff) << 4) | (reset_flag << 2))
+def _cmac_double(x: int) -> int:
+  return ((x << 1) & MASK_128) ^ (0x87 if x >> 127 else 0)
 
-  # Step 2: Build data to authenticate (96 bits)
-  # [Message ID (16 bits)][Payload (32 bits)][Freshness Value (48 bits)]
-  to_auth = struct.pack('>H', addr) + payload + freshness_value
 
-  # Step 3: Calculate CMAC (28 bit)
-  cmac = CMAC.new(key, ciphermod=AES)
-  cmac.update(to_auth)
-  mac = cmac.digest().hex()[:7] # truncated MAC
+class SecOCSigner:
+  """AES-128 CMAC signer for SecOC messages.
 
-  # Step 4: Build message
-  # [Payload (32 bit)][Message Counter Flag (2 bit)][Reset Flag (2 bit)][Authenticator (28 bit)]
-  msg_cnt_rst_flag = struct.pack('>B', (msg_cnt_flag << 2) | reset_flag).hex()[1]
-  msg = payload.hex() + msg_cnt_rst_flag + mac
-  payload = bytes.fromhex(msg)
+  The AES key schedule and CMAC subkey are computed once. Authenticated data always fits in one
+  incomplete CMAC block, so each MAC is one AES block encryption and a batch is a single ECB call"""
+  def __init__(self, key: bytes):
+    self._cipher = AES.new(key, AES.MODE_ECB)
+    k1 = _cmac_double(int.from_bytes(self._cipher.encrypt(bytes(16)), 'big'))
+    self._k2 = _cmac_double(k1).to_bytes(16, 'big')
+    self._k2_repeated = {1: int.from_bytes(self._k2, 'big')}
+    self._buf = bytearray(16)
 
-  return (addr, payload, bus)
+  def _mac(self, dat: bytes) -> int:
+    """28 bit truncated CMAC of less than a block of data"""
+    block = int.from_bytes(dat + b'\x80' + bytes(15 - len(dat)), 'big') ^ self._k2_repeated[1]
+    return int.from_bytes(self._cipher.encrypt(block.to_bytes(16, 'big'))[:4], 'big') >> 4
 
+  def sign(self, trip_cnt: int, reset_cnt: int, msg_cnt: int, msg: tuple[int, bytes, int]) -> tuple[int, bytes, int]:
+    return self.sign_batch(trip_cnt, reset_cnt, [(msg_cnt, msg)])[0]
 
-def build_sync_mac(key, trip_cnt, reset_cnt, id_=0xf):
-  id_ = struct.pack('>H', id_) # 16
-  trip_cnt = struct.pack('>H', trip_cnt) # 16
-  reset_cnt = struct.pack('>I', reset_cnt << 12)[:-1] # 20 + 4 padding
+  def sign_batch(self, trip_cnt: int, reset_cnt: int, msgs: list[tuple[int, tuple[int, bytes, int]]]) -> list[tuple[int, bytes, int]]:
+    """Signs (message counter, message) pairs sharing the trip and reset counters"""
+    n = len(msgs)
+    if n == 0:
+      return []
+    if len(self._buf) < 16 * n:
+      self._buf = bytearray(16 * n)
+    if n not in self._k2_repeated:
+      self._k2_repeated[n] = int.from_bytes(self._k2 * n, 'big')
+
+    reset_flag = reset_cnt & 0b11
+    for i, (msg_cnt, (addr, payload, _)) in enumerate(msgs):
+      # Freshness Value (48 bits)
+      # [Trip Counter (16 bit)][[Reset Counter (20 bit)][Message Counter (8 bit)][Reset Flag (2 bit)][Padding (2 bit)]
+      AUTH_FORMAT.pack_into(self._buf, 16 * i, addr, payload[:4], trip_cnt, (reset_cnt << 12) | ((msg_cnt & 0xff) << 4) | (reset_flag << 2))
+      self._buf[16 * i + 12:16 * i + 16] = AUTH_PADDING
+
+    blocks = int.from_bytes(memoryview(self._buf)[:16 * n], 'big') ^ self._k2_repeated[n]
+    macs = self._cipher.encrypt(blocks.to_bytes(16 * n, 'big'))
+
+    # [Payload (32 bit)][Message Counter Flag (2 bit)][Reset Flag (2 bit)][Authenticator (28 bit)]
+    signed = []
+    for i, (msg_cnt, (addr, payload, bus)) in enumerate(msgs):
+      mac = int.from_bytes(macs[16 * i:16 * i + 4], 'big') >> 4
+      flags = ((msg_cnt & 0b11) << 2) | reset_flag
+      signed.append((addr, payload[:4] + ((flags << 28) | mac).to_bytes(4, 'big'), bus))
+    return signed
+
+  def sync_mac(self, trip_cnt: int, reset_cnt: int, id_: int = 0xf) -> int:
+    # [ID (16 bit)][Trip Counter (16 bit)][Reset Counter (20 bit)][Padding (4 bit)], SecOC 11.4.1.1 page 138
+    return self._mac(struct.pack('>HH', id_, trip_cnt) + struct.pack('>I', reset_cnt << 12)[:-1])
 
-  to_auth = id_ + trip_cnt + reset_cnt # SecOC 11.4.1.1 page 138
 
-  cmac = CMAC.new(key, ciphermod=AES)
-  cmac.update(to_auth)
+@lru_cache(maxsize=8)
+def get_signer(key: bytes) -> SecOCSigner:
+  return SecOCSigner(key)
 
-  msg = "0" + cmac.digest().hex()[:7]
-  msg = bytes.fromhex(msg)
-  return struct.unpack('>I', msg)[0]
+
+def add_mac(key, trip_cnt, reset_cnt, msg_cnt, msg):
+  return get_signer(key).sign(trip_cnt, reset_cnt, msg_cnt, msg)
+
+
+def build_sync_mac(key, trip_cnt, reset_cnt, id_=0xf):
+  return get_signer(key).sync_mac(trip_cnt, reset_cnt, id_)
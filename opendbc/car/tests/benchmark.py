@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tracemalloc
+from collections import defaultdict
+
+from opendbc.car.car_helpers import interfaces
+from opendbc.car.tests.car_interface_runner import generate_can_traffic, get_car_interface, run_car_interface
+from opendbc.car.values import PLATFORMS
+from opendbc.can.tests.benchmark import DEFAULT_THRESHOLD, SEED, compare
+
+
+def percentile(samples: list[int], pct: float) -> float:
+  s = sorted(samples)
+  return s[min(int(len(s) * pct / 100), len(s) - 1)]
+
+
+def bench_platform(car_name: str, seconds: float) -> dict[str, float]:
+  CI = get_car_interface(car_name)
+  # carstates may request messages lazily from CANParser.vl, run once so they're part of message_states
+  CI.update([])
+  traffic = generate_can_traffic(CI.can_parsers, seconds, SEED)
+
+  latencies = run_car_interface(CI, traffic)
+
+  tracemalloc.start()
+  try:
+    allocs = run_car_interface(get_car_interface(car_name), traffic, trace_allocs=True)
+  finally:
+    tracemalloc.stop()
+
+  return {
+    "ns_per_op": statistics.median(latencies),
+    "p99_ns": percentile(latencies, 99),
+    "cycles_per_sec": len(latencies) / (sum(latencies) * 1e-9),
+    "peak_alloc_bytes_per_cycle": statistics.median(allocs),
+    "msgs_per_cycle": sum(len(msgs) for _, msgs in traffic) / len(traffic),
+    "cycles": len(latencies),
+  }
+
+
+def summarize_brands(results: dict[str, dict]) -> dict[str, dict]:
+  by_brand = defaultdict(list)
+  for car_name, res in results.items():
+    by_brand[interfaces[car_name].__module__.split('.')[-2]].append(res)
+
+  return {brand: {
+    "ns_per_op": statistics.median(r["ns_per_op"] for r in res),
+    "p99_ns": max(r["p99_ns"] for r in res),
+    "cycles_per_sec": min(r["cycles_per_sec"] for r in res),
+    "peak_alloc_bytes_per_cycle": max(r["peak_alloc_bytes_per_cycle"] for r in res),
+    "platforms": len(res),
+  } for brand, res in sorted(by_brand.items())}
+
+
+def main() -> int:
+  parser = argparse.ArgumentParser(description="Benchmark CarInterface update + apply on synthesized CAN traffic for each platform",
+                                   formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("--filter", default="", help="Only benchmark platforms or brands containing this string")
+  parser.add_argument("--seconds", type=float, default=10.0, help="Simulated driving time per platform")
+  parser.add_argument("--output", help="Write results JSON to this path")
+  parser.add_argument("--baseline", help="Results JSON to compare against")
+  parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed fractional slowdown vs. baseline")
+  args = parser.parse_args()
+
+  car_names = [c for c in sorted(PLATFORMS) if args.filter in c or args.filter in interfaces[c].__module__]
+  results = {f"car_interface/{c}": bench_platform(c, args.seconds) for c in car_names}
+  brands = {f"brand/{b}": res for b, res in summarize_brands({c: results[f"car_interface/{c}"] for c in car_names}).items()}
+
+  baseline = {}
+  if args.baseline:
+    with open(args.baseline) as f:
+      baseline = json.load(f)["results"]
+
+  for name, res in (results | brands).items():
+    line = f"{name:<60} {res['cycles_per_sec']:>9.0f} cycles/s  p50 {res['ns_per_op'] / 1e3:>7.1f} us  " + \
+           f"p99 {res['p99_ns'] / 1e3:>7.1f} us  {res['peak_alloc_bytes_per_cycle'] / 1024:>7.1f} KiB/cycle"
+    if name in baseline:
+      line += f"  ({res['ns_per_op'] / baseline[name]['ns_per_op'] - 1:+.1%})"
+    print(line)
+
+  if args.output:
+    meta = {"python": platform.python_version(), "machine": platform.machine(), "seed": SEED, "seconds": args.seconds}
+    with open(args.output, "w") as f:
+      json.dump({"meta": meta, "results": results | brands}, f, indent=2)
+
+  regressions = compare(results, baseline, args.threshold)
+  if regressions:
+    print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:", *regressions, sep="\n  ", file=sys.stderr)
+    return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -7,6 +7,7 @@ import subprocess
 import sys
 import tempfile
 import traceback
+import numpy as np
 import zstandard as zstd
 from tqdm import tqdm
 from tqdm.contrib.concurrent import process_map
@@ -20,6 +21,7 @@ from opendbc.car import structs
 from opendbc.car.can_definitions import CanData
 from opendbc.car.car_helpers import can_fingerprint, interfaces
 from opendbc.car.logreader import LogReader, decompress_stream
+from opendbc.car.tests import replay_cache
 
 
 TOLERANCE = 1e-4
@@ -28,8 +30,8 @@ IGNORE_FIELDS = ["cumLagMs", "canErrorCounter"]
 PADDING = 5
 
 Diff = tuple[str, int, tuple[Any, Any], int]
-Ref = tuple[int, structs.CarState]
-Result = tuple[str, str, list[Diff], list[Ref] | None, list[structs.CarState] | None, str | None]
+Columns = dict[str, np.ndarray]  # flattened CarState field path -> value per frame
+Result = tuple[str, str, list[Diff], Columns | None, Columns | None, str | None]
 
 
 def dict_diff(d1: dict[str, Any], d2: dict[str, Any], path: str = "", ignore: list[str] | None = None, tolerance: float = 0) -> list[tuple]:
@@ -50,6 +52,75 @@ def dict_diff(d1: dict[str, Any], d2: dict[str, Any], path: str = "", ignore: li
   return diffs
 
 
+def to_column(vals: list[Any]) -> np.ndarray:
+  if all(isinstance(v, (bool, int, float)) for v in vals):
+    # ints are only stored as numbers where numpy keeps them exact, numpy would round them to float64 otherwise
+    int_limit = 2 ** 53 if any(isinstance(v, float) for v in vals) else 2 ** 63
+    if all(isinstance(v, float) or -int_limit <= v < int_limit for v in vals):
+      return np.array(vals)
+  col = np.empty(len(vals), dtype=object)
+  for i, v in enumerate(vals):
+    col[i] = v
+  return col
+
+
+def flatten_states(states: list[dict[str, Any]], ignore: list[str] | None = None) -> Columns:
+  """Converts a list of CarState dicts to one column per leaf field, keyed by the same dotted path as dict_diff"""
+  ignore = ignore or []
+  cols: dict[str, list[Any]] = {}
+  for i, state in enumerate(states):
+    stack = [("", state)]
+    while stack:
+      path, d = stack.pop()
+      for key, v in d.items():
+        if key in ignore:
+          continue
+        full_path = f"{path}.{key}" if path else key
+        if isinstance(v, dict):
+          stack.append((full_path, v))
+        else:
+          if full_path not in cols:
+            cols[full_path] = [None] * len(states)
+          cols[full_path][i] = v
+  return {k: to_column(v) for k, v in cols.items()}
+
+
+def columns_diff(c1: Columns, c2: Columns, timestamps: np.ndarray, tolerance: float = 0) -> list[Diff]:
+  """Vectorized equivalent of dict_diff over every frame, diffs are ordered by field then frame"""
+  diffs = []
+  n = len(timestamps)
+  missing = np.full(n, None, dtype=object)
+  for key in sorted(c1.keys() | c2.keys()):
+    v1, v2 = c1.get(key, missing), c2.get(key, missing)
+    assert len(v1) == len(v2) == n, f"{key}: frame count mismatch"
+    if v1.dtype.kind in "bi" and v2.dtype.kind in "bi":
+      # exact distance between ints, wrapping into uint64 can't overflow like int64 subtraction
+      changed = (np.maximum(v1, v2).astype(np.uint64) - np.minimum(v1, v2).astype(np.uint64)) > tolerance
+    elif v1.dtype.kind in "bif" and v2.dtype.kind in "bif":
+      # ints are rounded to float like python does when subtracting a float
+      changed = np.abs(v1.astype(np.float64) - v2.astype(np.float64)) > tolerance
+    else:
+      changed = np.fromiter((differs(a, b, tolerance) for a, b in zip(v1, v2, strict=True)), dtype=bool, count=n)
+    for i in np.flatnonzero(changed):
+      diffs.append((key, int(i), (v1[i].item() if isinstance(v1[i], np.generic) else v1[i],
+                                  v2[i].item() if isinstance(v2[i], np.generic) else v2[i]), int(timestamps[i])))
+  return diffs
+
+
+def differs(v1: Any, v2: Any, tolerance: float) -> bool:
+  if isinstance(v1, (int, float)) and isinstance(v2, (int, float)):
+    return abs(v1 - v2) > tolerance
+  return bool(v1 != v2)
+
+
+def load_refs(ref_data: dict[str, Any]) -> tuple[np.ndarray, Columns]:
+  if "frames" in ref_data:
+    # refs generated before the columnar format
+    timestamps = np.array([ts for ts, _ in ref_data["frames"]], dtype=np.int64)
+    return timestamps, flatten_states([state.to_dict() for _, state in ref_data["frames"]], IGNORE_FIELDS)
+  return ref_data["timestamps"], ref_data["columns"]
+
+
 def load_can_messages(seg: str) -> list[Any]:
   from comma_car_segments import get_url
   parts = seg.split("/")
@@ -80,15 +151,28 @@ def replay_segment(platform: str, can_msgs: list[Any]) -> tuple[structs.CarParam
   return CP, states, timestamps
 
 
+def replay_segment_cached(platform: str, seg: str) -> dict[str, Any]:
+  # segment logs are immutable, so the replay output only changes with the code and DBCs the platform uses
+  key = replay_cache.cache_key("car_diff", platform, seg, replay_cache.platform_code_hash(platform, (Path(__file__).resolve(),)))
+  if (data := replay_cache.get(key)) is not None:
+    return data
+
+  CP, states, timestamps = replay_segment(platform, load_can_messages(seg))
+  # states are still converted one frame at a time, storing and diffing them is columnar
+  columns = flatten_states([state.to_dict() for state in states], IGNORE_FIELDS)
+  data = {"cp": CP.to_dict(), "timestamps": np.array(timestamps, dtype=np.int64), "columns": columns}
+  replay_cache.put(key, data)
+  return data
+
+
 def process_segment(args: tuple) -> Result:
   platform, seg, ref_path, update = args
   try:
-    can_msgs = load_can_messages(seg)
-    CP, states, timestamps = replay_segment(platform, can_msgs)
+    data = replay_segment_cached(platform, seg)
+    columns = data["columns"]
     ref_file = Path(ref_path) / f"{platform}_{seg.replace('/', '_')}.zst"
 
     if update:
-      data = {"cp": CP.to_dict(), "frames": list(zip(timestamps, states, strict=True))}
       ref_file.write_bytes(zstd.compress(pickle.dumps(data), 10))
       return (platform, seg, [], None, None, None)
 
@@ -97,14 +181,13 @@ def process_segment(args: tuple) -> Result:
 
     ref_data = pickle.loads(decompress_stream(ref_file.read_bytes()))
     cp: dict[str, Any] = ref_data["cp"]
-    ref: list[Ref] = ref_data["frames"]
+    ref_timestamps, ref_columns = load_refs(ref_data)
+    assert len(ref_timestamps) == len(data["timestamps"]), f"frame count mismatch: {len(ref_timestamps)} != {len(data['timestamps'])}"
     diffs = []
-    for diff in dict_diff(cp, CP.to_dict(), path="carParams", ignore=IGNORE_FIELDS, tolerance=TOLERANCE):
+    for diff in dict_diff(cp, data["cp"], path="carParams", ignore=IGNORE_FIELDS, tolerance=TOLERANCE):
       diffs.append((diff[1], -1, diff[2], 0))
-    for i, ((ts, ref_state), state) in enumerate(zip(ref, states, strict=True)):
-      for diff in dict_diff(ref_state.to_dict(), state.to_dict(), ignore=IGNORE_FIELDS, tolerance=TOLERANCE):
-        diffs.append((diff[1], i, diff[2], ts))
-    return (platform, seg, diffs, ref, states, None)
+    diffs.extend(columns_diff(ref_columns, columns, ref_timestamps, tolerance=TOLERANCE))
+    return (platform, seg, diffs, ref_columns, columns, None)
   except Exception:
     return (platform, seg, [], None, None, traceback.format_exc())
 
@@ -189,21 +272,14 @@ def group_frames(diffs: list[Diff], max_gap: int = 15) -> list[list[Diff]]:
   return groups
 
 
-def build_signals(group: list[Diff], ref: list[Ref], states: list[structs.CarState], field: str) -> tuple[list[Any], list[Any], int, int]:
+def build_signals(group: list[Diff], ref: Columns, states: Columns, field: str) -> tuple[list[Any], list[Any], int, int]:
   _, first_frame, _, _ = group[0]
   _, last_frame, _, _ = group[-1]
+  n = len(next(iter(ref.values())))
   start = max(0, first_frame - PADDING)
-  end = min(last_frame + PADDING + 1, len(ref))
-  master_vals = []
-  pr_vals = []
-  for frame in range(start, end):
-    mval = ref[frame][1].to_dict()
-    pval = states[frame].to_dict()
-    for k in field.split("."):
-      mval = mval.get(k) if isinstance(mval, dict) else None
-      pval = pval.get(k) if isinstance(pval, dict) else None
-    master_vals.append(mval)
-    pr_vals.append(pval)
+  end = min(last_frame + PADDING + 1, n)
+  master_vals = ref[field][start:end].tolist() if field in ref else [None] * (end - start)
+  pr_vals = states[field][start:end].tolist() if field in states else [None] * (end - start)
   return master_vals, pr_vals, start, end
 
 
@@ -216,7 +292,7 @@ def format_numeric_diffs(diffs: list[Diff]) -> list[str]:
   return lines
 
 
-def format_boolean_diffs(diffs: list[Diff], ref: list[Ref], states: list[structs.CarState], field: str) -> list[str]:
+def format_boolean_diffs(diffs: list[Diff], ref: Columns, states: Columns, field: str) -> list[str]:
   _, first_frame, _, first_ts = diffs[0]
   _, last_frame, _, last_ts = diffs[-1]
   frame_time = last_frame - first_frame
@@ -237,7 +313,7 @@ def format_boolean_diffs(diffs: list[Diff], ref: list[Ref], states: list[structs
   return lines
 
 
-def format_diff(diffs: list[Diff], ref: list[Ref], states: list[structs.CarState], field: str) -> list[str]:
+def format_diff(diffs: list[Diff], ref: Columns, states: Columns, field: str) -> list[str]:
   if not diffs:
     return []
   _, _, (old, new), _ = diffs[0]
@@ -0,0 +1,81 @@
+import random
+import time
+import tracemalloc
+
+from opendbc.car import DT_CTRL, gen_empty_fingerprint, structs
+from opendbc.car.can_definitions import CanData
+from opendbc.car.car_helpers import interfaces
+from opendbc.car.interfaces import CarInterfaceBase
+from opendbc.can import CANDefine, CANPacker
+from opendbc.can.dbc import SignalType
+
+DEFAULT_FREQUENCY = 10  # Hz, for messages whose frequency is learned at runtime
+ENGAGE_SECONDS = 1.0
+
+
+def get_car_interface(car_name: str) -> CarInterfaceBase:
+  CarInterface = interfaces[car_name]
+  CP = CarInterface.get_params(car_name, gen_empty_fingerprint(), [], alpha_long=True, is_release=False, docs=False)
+  return CarInterface(CP)
+
+
+def generate_can_traffic(can_parsers: dict, seconds: float, seed: int = 0) -> list[tuple[int, list[CanData]]]:
+  """Pack every message each parser checks for at its configured frequency, one entry per control cycle"""
+  rng = random.Random(seed)
+  schedule = []  # (period in cycles, address, bus, packer, signal value choices, signals)
+  for cp in can_parsers.values():
+    packer = CANPacker(cp.dbc_name)
+    dv = CANDefine(cp.dbc_name).dv
+    for addr, state in sorted(cp.message_states.items()):
+      freq = state.frequency if state.frequency > 0 else DEFAULT_FREQUENCY
+      # signals with value definitions are only sent defined values, counters and checksums are set by the packer
+      choices = {sig.name: list(dv.get(addr, {}).get(sig.name, {})) or None for sig in state.signals
+                 if sig.type == SignalType.DEFAULT and sig.name not in ("COUNTER", "CHECKSUM")}
+      schedule.append((max(round(1 / (freq * DT_CTRL)), 1), addr, cp.bus, packer, choices, state.signals))
+
+  traffic = []
+  for frame in range(round(seconds / DT_CTRL)):
+    msgs = []
+    for period, addr, bus, packer, choices, signals in schedule:
+      if frame % period == 0:
+        values = {}
+        for sig in signals:
+          if sig.name in choices:
+            values[sig.name] = rng.choice(choices[sig.name]) if choices[sig.name] else rng.getrandbits(sig.size) * sig.factor + sig.offset
+        msgs.append(CanData(*packer.make_can_msg(addr, bus, values)))
+    traffic.append((int(frame * DT_CTRL * 1e9), msgs))
+  return traffic
+
+
+def get_car_control(enabled: bool) -> structs.CarControl:
+  CC = structs.CarControl()
+  CC.enabled = enabled
+  CC.latActive = enabled
+  CC.longActive = enabled
+  CC.actuators.accel = 0.5
+  CC.actuators.torque = 0.2
+  CC.actuators.steeringAngleDeg = 2.0
+  CC.actuators.curvature = 0.001
+  return CC.as_reader()
+
+
+def run_car_interface(CI: CarInterfaceBase, traffic: list[tuple[int, list[CanData]]], trace_allocs: bool = False) -> list[int]:
+  """Runs update + apply once per control cycle. Returns per-cycle latency in ns, or peak bytes allocated if trace_allocs"""
+  CC_disabled, CC_enabled = get_car_control(False), get_car_control(True)
+  engage_nanos = int(ENGAGE_SECONDS * 1e9)
+
+  samples = []
+  for now_nanos, msgs in traffic:
+    CC = CC_enabled if now_nanos >= engage_nanos else CC_disabled
+    if trace_allocs:
+      tracemalloc.reset_peak()
+      start = tracemalloc.get_traced_memory()[0]
+      CI.update([(now_nanos, msgs)])
+      CI.apply(CC, now_nanos)
+      samples.append(tracemalloc.get_traced_memory()[1] - start)
+    else:
+      t1 = time.perf_counter_ns()
+      CI.update([(now_nanos, msgs)])
+      CI.apply(CC, now_nanos)
+      samples.append(time.perf_counter_ns() - t1)
+  return samples
@@ -0,0 +1,115 @@
+import ast
+import hashlib
+import os
+import pickle
+import sys
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from opendbc import DBC_PATH, get_generated_dbcs
+from opendbc.car.values import PLATFORMS
+
+ROOT = Path(__file__).resolve().parents[3]
+CACHE_ROOT = Path(os.environ.get("COMMA_CACHE", "/tmp/comma_download_cache")) / "replay_cache"
+ENABLED = os.environ.get("REPLAY_CACHE", "1") != "0"
+
+# files read at runtime rather than imported: the capnp schemas for CarParams and logs, and the torque data every CarParams is built from
+DATA_FILES = (*sorted((ROOT / "opendbc/car").glob("**/*.capnp")), *sorted((ROOT / "opendbc/car/torque_data").glob("*.toml")))
+
+
+def module_path(name: str) -> Path | None:
+  base = ROOT / name.replace(".", "/")
+  for path in (base.with_suffix(".py"), base / "__init__.py"):
+    if path.is_file():
+      return path
+  return None
+
+
+def module_imports(name: str, path: Path) -> set[str]:
+  """Names of opendbc modules imported by a module, including parent packages"""
+  imports = set()
+  for node in ast.walk(ast.parse(path.read_text())):
+    if isinstance(node, ast.Import):
+      imports.update(alias.name for alias in node.names)
+    elif isinstance(node, ast.ImportFrom) and node.module is not None:
+      module = node.module if node.level == 0 else ".".join(name.split(".")[:-node.level] + [node.module])
+      imports.add(module)
+      # `from package import module`
+      imports.update(f"{module}.{alias.name}" for alias in node.names)
+
+  ret = set()
+  for imp in imports:
+    parts = imp.split(".")
+    ret.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+  return {imp for imp in ret if imp.split(".")[0] == "opendbc" and module_path(imp) is not None}
+
+
+@cache
+def import_graph(*roots: str) -> frozenset[str]:
+  """All opendbc modules reachable by static imports from roots"""
+  seen = set()
+  stack = list(roots)
+  while stack:
+    name = stack.pop()
+    path = module_path(name)
+    if name in seen or path is None:
+      continue
+    seen.add(name)
+    stack.extend(module_imports(name, path) - seen)
+  return frozenset(seen)
+
+
+def hash_files(paths: list[Path]) -> str:
+  h = hashlib.sha256()
+  for path in sorted(paths):
+    h.update(str(path.relative_to(ROOT)).encode())
+    h.update(path.read_bytes())
+  return h.hexdigest()
+
+
+@cache
+def platform_code_hash(platform: str, extra_files: tuple[Path, ...] = ()) -> str:
+  """Hash of every module the platform's CarInterface imports, the data files they read, its DBCs, and any extra files (e.g. the test itself)"""
+  brand = PLATFORMS[platform].__module__.split(".")[-2]
+  modules = import_graph(f"opendbc.car.{brand}.interface", "opendbc.car.car_helpers")
+  files = [p for p in (module_path(m) for m in modules) if p is not None]
+  files += [*DATA_FILES, *extra_files]
+
+  h = hashlib.sha256(hash_files(files).encode())
+  generated_dbcs = get_generated_dbcs()
+  for dbc_name in sorted(set(PLATFORMS[platform].config.dbc_dict.values())):
+    if dbc_name in generated_dbcs:
+      h.update(generated_dbcs[dbc_name].encode())
+    else:
+      h.update(Path(DBC_PATH, f"{dbc_name}.dbc").read_bytes())
+
+  # results may depend on the interpreter and numeric libraries too
+  h.update(f"{sys.version}/{np.__version__}".encode())
+  return h.hexdigest()
+
+
+def cache_key(*parts: str) -> str:
+  return hashlib.sha256("/".join(parts).encode()).hexdigest()
+
+
+def get(key: str) -> Any | None:
+  path = CACHE_ROOT / key
+  if not ENABLED or not path.is_file():
+    return None
+  try:
+    return pickle.loads(path.read_bytes())
+  except Exception:
+    return None
+
+
+def put(key: str, value: Any) -> None:
+  if not ENABLED:
+    return
+  CACHE_ROOT.mkdir(parents=True, exist_ok=True)
+  path = CACHE_ROOT / key
+  tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+  tmp_path.write_bytes(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+  tmp_path.replace(path)
@@ -0,0 +1,56 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+from opendbc.car import structs
+from opendbc.car.tests.car_diff import IGNORE_FIELDS, TOLERANCE, columns_diff, dict_diff, flatten_states
+
+BUTTONS = ["accelCruise", "decelCruise", "cancel", "setCruise"]
+GEARS = ["park", "drive", "reverse", "neutral"]
+
+
+def random_state(rng: random.Random) -> dict:
+  CS = structs.CarState()
+  CS.vEgo = rng.choice([0., 1.5, 1.5 + TOLERANCE / 2, 30., math.nan])
+  CS.steeringAngleDeg = rng.uniform(-10, 10)
+  CS.gasPressed = rng.random() < 0.5
+  CS.gearShifter = rng.choice(GEARS)
+  CS.cruiseState.speed = rng.choice([0., 20., math.nan])
+  CS.buttonEvents = [structs.CarState.ButtonEvent(type=t, pressed=rng.random() < 0.5) for t in rng.sample(BUTTONS, rng.randrange(3))]
+  state = CS.to_dict()
+
+  # fields capnp can't produce, but refs and states are compared as plain values
+  state["int64"] = rng.choice([2 ** 62, 2 ** 62 + 1, -2 ** 63, 2 ** 63 - 1])
+  state["largeInt"] = rng.choice([2 ** 63 - 1, 2 ** 63, 2 ** 63 + 1, 2 ** 64, -2 ** 63])
+  state["mixedInt"] = rng.choice([2 ** 60, 2 ** 60 + 1, 0.5, True, 2])
+  state["list"] = rng.choice([[], [1, 2], [1., math.nan]])
+  return state
+
+
+def normalized(diffs: list[tuple]) -> list[tuple]:
+  # NaN never equals itself, compare it by name
+  return sorted((path, frame, tuple("nan" if isinstance(v, float) and math.isnan(v) else v for v in vals)) for path, frame, vals in diffs)
+
+
+class TestCarDiff(unittest.TestCase):
+  def test_columns_diff_matches_dict_diff(self):
+    rng = random.Random(0)
+    refs = [random_state(rng) for _ in range(200)]
+    # new states keep most of each ref, so the diff has unchanged, slightly changed and changed fields
+    states = [{k: (v if rng.random() < 0.7 else random_state(rng)[k]) for k, v in ref.items()} for ref in refs]
+
+    expected = [(path, frame, vals) for frame, (ref, state) in enumerate(zip(refs, states, strict=True))
+                for _, path, vals in dict_diff(ref, state, ignore=IGNORE_FIELDS, tolerance=TOLERANCE)]
+    diffs = columns_diff(flatten_states(refs, IGNORE_FIELDS), flatten_states(states, IGNORE_FIELDS), np.arange(len(refs)) * 10, TOLERANCE)
+
+    self.assertGreater(len(expected), 100)
+    self.assertEqual(normalized([(path, frame, vals) for path, frame, vals, _ in diffs]), normalized(expected))
+    self.assertTrue(all(ts == frame * 10 for _, frame, _, ts in diffs))
+    changed = {path for path, _, _ in expected}
+    self.assertTrue({"vEgo", "cruiseState.speed", "gearShifter", "buttonEvents", "int64", "largeInt", "mixedInt", "list"} <= changed)
+
+
+if __name__ == "__main__":
+  unittest.main()
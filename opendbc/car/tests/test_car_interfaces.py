@@ -1,11 +1,13 @@
 import math
 import unittest
+from unittest.mock import patch
 
 from opendbc.car import DT_CTRL, CanData, structs
 from opendbc.car.car_helpers import interfaces
 from opendbc.car.fingerprints import FW_VERSIONS
 from opendbc.car.fw_versions import FW_QUERY_CONFIGS
-from opendbc.car.interfaces import CarInterfaceBase, get_interface_attr
+from opendbc.car.interfaces import CarInterfaceBase, clear_params_cache, get_interface_attr
+from opendbc.car.tests.car_interface_runner import generate_can_traffic, get_car_control, get_car_interface, run_car_interface
 from opendbc.car.values import PLATFORMS
 from opendbc.testing import Fuzzy, fuzzy_test
 
@@ -126,6 +128,63 @@ class TestCarInterfaces(unittest.TestCase):
     none_brands_in_ret = none_brands.intersection(ret)
     assert len(none_brands_in_ret) == 0, f'Brands with None values in ignore_none=True result: {none_brands_in_ret}'
 
+  def test_params_cache(self):
+    clear_params_cache()
+    CarInterface = interfaces['TOYOTA_RAV4']
+    fingerprint = {0: {0x1d2: 8}, 1: {}}
+    car_fw = [structs.CarParams.CarFw(ecu='eps', address=0x7a1, fwVersion=b'8965B42170\x00\x00\x00\x00\x00\x00')]
+
+    def get_params(fingerprint=fingerprint, car_fw=car_fw, cached=True):
+      return CarInterface.get_params('TOYOTA_RAV4', fingerprint, car_fw, False, False, False, cached=cached)
+
+    CP = get_params()
+    assert CP.to_dict() == get_params(cached=False).to_dict()
+
+    # copies are returned, mutating one doesn't affect the cache
+    CP.mass = 1.
+    assert get_params().mass != 1.
+
+    # equal inputs share an entry, any difference builds new params
+    with patch.object(CarInterface, '_build_params', wraps=CarInterface._build_params) as build:
+      get_params({1: {}, 0: {0x1d2: 8}}, [car_fw[0].as_reader()])
+      assert build.call_count == 0
+      get_params({0: {0x1d2: 8, 0x1d3: 8}, 1: {}})
+      get_params(car_fw=[])
+      get_params(cached=False)
+      assert build.call_count == 3
+
 
 for car_name in sorted(PLATFORMS):
   setattr(TestCarInterfaces, f'test_car_interfaces_{car_name}', _make_car_test(car_name))
+
+
+def _make_snapshot_test(car_name):
+  def test(self):
+    # run through engagement, checkpoint, then continue the original and a restored interface side by side
+    car_interface = get_car_interface(car_name)
+    car_interface.update([])
+    traffic = generate_can_traffic(car_interface.can_parsers, 1.5)
+    split = len(traffic) * 4 // 5
+    run_car_interface(car_interface, traffic[:split])
+
+    restored = get_car_interface(car_name)
+    restored.restore(car_interface.snapshot())
+
+    CC = get_car_control(True)
+    for now_nanos, msgs in traffic[split:]:
+      outputs = []
+      for CI in (car_interface, restored):
+        CS = CI.update([(now_nanos, msgs)])
+        actuators, sends = CI.apply(CC, now_nanos)
+        outputs.append((CS.to_dict(), actuators.to_dict(), sends))
+      assert outputs[0] == outputs[1]
+
+  return test
+
+
+class TestCarInterfaceSnapshot(unittest.TestCase):
+  pass
+
+
+for car_name in sorted(PLATFORMS):
+  setattr(TestCarInterfaceSnapshot, f'test_snapshot_{car_name}', _make_snapshot_test(car_name))
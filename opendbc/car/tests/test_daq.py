@@ -0,0 +1,150 @@
+import struct
+import unittest
+
+import numpy as np
+
+from opendbc.car import ccp, xcp
+from opendbc.car.daq import DaqBuffer, DaqVariable, pack_odts
+
+TX_ADDR, RX_ADDR = 0x700, 0x701
+
+VARIABLES = [
+  DaqVariable("steer_torque", 0x1000, "i2"),
+  DaqVariable("motor_current", 0x1004, "f4"),
+  DaqVariable("state", 0x1008, "u1"),
+  DaqVariable("counter", 0x100c, "u4"),
+]
+
+
+class FakeDaqEcu:
+  """Panda connected to an ECU that sends a DTO per ODT for each sample once DAQ is started"""
+  def __init__(self, byte_order: str, first_pid: int):
+    self.byte_order = byte_order
+    self.first_pid = first_pid
+    self.odts: list[list[tuple[int, int]]] = []  # (addr, size)
+    self.ptr = (0, 0)
+    self.running = False
+    self.sample = 0
+    self.tx: list = []
+
+  def value(self, addr: int) -> bytes:
+    # every variable counts up with the sample number
+    fmt = {0x1000: "h", 0x1004: "f", 0x1008: "B", 0x100c: "I"}[addr]
+    val = -self.sample if addr == 0x1000 else self.sample
+    return struct.pack(self.byte_order + fmt, val)
+
+  def write_entry(self, addr: int, size: int) -> None:
+    odt_num, entry_num = self.ptr
+    while len(self.odts) <= odt_num:
+      self.odts.append([])
+    self.odts[odt_num].append((addr, size))
+    self.ptr = (odt_num, entry_num + 1)
+
+  def respond(self, dat: bytes) -> None:
+    self.tx.append((RX_ADDR, dat.ljust(8, b"\x00"), 0))
+
+  def stream(self) -> None:
+    if self.running:
+      for odt_num, odt in enumerate(self.odts):
+        self.tx.append((RX_ADDR, bytes([self.first_pid + odt_num]) + b"".join(self.value(a) for a, _ in odt).ljust(7, b"\x00"), 0))
+      self.sample += 1
+
+  def can_clear(self, bus):
+    # DTOs keep arriving between any two calls
+    self.stream()
+    if bus == 0xFFFF:
+      self.tx.clear()
+
+  def can_recv(self):
+    self.stream()
+    msgs, self.tx = self.tx, []
+    return msgs
+
+
+class FakeXcpEcu(FakeDaqEcu):
+  def can_send(self, addr, dat, bus):
+    self.stream()
+    cmd, bo = dat[0], self.byte_order
+    if cmd == xcp.COMMAND_CODE.SET_DAQ_PTR:
+      _, odt_num, entry_num = struct.unpack(f"{bo}HBB", dat[2:6])
+      self.ptr = (odt_num, entry_num)
+    elif cmd == xcp.COMMAND_CODE.WRITE_DAQ:
+      self.write_entry(struct.unpack(f"{bo}I", dat[4:8])[0], dat[2])
+    elif cmd == xcp.COMMAND_CODE.START_STOP_DAQ_LIST:
+      self.respond(bytes([0xFF, self.first_pid]))
+      return
+    elif cmd == xcp.COMMAND_CODE.START_STOP_SYNCH:
+      self.running = dat[1] == 1
+    self.respond(b"\xFF")
+
+
+class FakeCcpEcu(FakeDaqEcu):
+  def can_send(self, addr, dat, bus):
+    self.stream()
+    cmd, ctr, bo = dat[0], dat[1], self.byte_order
+    resp = b""
+    if cmd == ccp.COMMAND_CODE.GET_DAQ_SIZE:
+      resp = bytes([3, self.first_pid])
+    elif cmd == ccp.COMMAND_CODE.SET_DAQ_PTR:
+      self.ptr = (dat[3], dat[4])
+    elif cmd == ccp.COMMAND_CODE.WRITE_DAQ:
+      self.write_entry(struct.unpack(f"{bo}I", dat[4:8])[0], dat[2])
+    elif cmd == ccp.COMMAND_CODE.START_STOP:
+      self.running = dat[2] == 1
+    self.respond(bytes([0xFF, 0x00, ctr]) + resp)
+
+
+class TestDaq(unittest.TestCase):
+  def test_pack_odts(self):
+    odts = pack_odts(VARIABLES, 7)
+    self.assertEqual([[(e.variable.name, e.offset) for e in odt] for odt in odts], [
+      [("motor_current", 0), ("steer_torque", 4), ("state", 6)],
+      [("counter", 0)],
+    ])
+    with self.assertRaises(ValueError):
+      pack_odts([DaqVariable("big", 0, "f8")], 7)
+
+  def test_ring_buffer(self):
+    buf = DaqBuffer(4, 8)
+    for i in range(6):
+      buf.append(i, bytes([i]) * 8)
+    self.assertEqual((len(buf), buf.dropped), (4, 2))
+    timestamps, frames = buf.snapshot()
+    self.assertEqual(timestamps.tolist(), [2, 3, 4, 5])
+    self.assertEqual(frames[:, 0].tolist(), [2, 3, 4, 5])
+
+    # a short frame doesn't keep the bytes of the frame it overwrites
+    buf.append(6, bytes([6]) * 3)
+    self.assertEqual(buf.snapshot()[1][-1].tolist(), [6, 6, 6, 0, 0, 0, 0, 0])
+
+  def _check_samples(self, client, ecu):
+    daq = client.start_daq(VARIABLES)
+    for _ in range(50):
+      client.poll_daq()
+    # stopping is a command sent while DTOs are streaming, none may be dropped
+    self.assertIs(client.stop_daq(), daq)
+    self.assertFalse(ecu.running)
+
+    samples = daq.decode()
+    self.assertEqual(set(samples), {v.name for v in VARIABLES})
+    for name, dtype in (("steer_torque", np.int16), ("motor_current", np.float32), ("state", np.uint8), ("counter", np.uint32)):
+      with self.subTest(name=name):
+        values = samples[name].values
+        self.assertEqual(values.dtype, dtype)
+        self.assertEqual(len(samples[name].timestamps), len(values))
+        # the first sample can be received while starting, every sample after is decoded in order
+        counts = -values.astype(int) if name == "steer_torque" else values.astype(int)
+        np.testing.assert_array_equal(counts, np.arange(counts[0], ecu.sample))
+        self.assertGreaterEqual(len(values), 50)
+
+  def test_xcp(self):
+    for byte_order in ("<", ">"):
+      ecu = FakeXcpEcu(byte_order, first_pid=0x10)
+      client = xcp.XcpClient(ecu, TX_ADDR, RX_ADDR)
+      client._byte_order = byte_order
+      self._check_samples(client, ecu)
+
+  def test_ccp(self):
+    for byte_order in ccp.BYTE_ORDER:
+      ecu = FakeCcpEcu(byte_order.value, first_pid=0x20)
+      self._check_samples(ccp.CcpClient(ecu, TX_ADDR, RX_ADDR, byte_order=byte_order), ecu)
@@ -0,0 +1,121 @@
+import unittest
+
+from opendbc.car import uds
+from opendbc.car.can_definitions import CanData
+from opendbc.car.did_query import DidCache, read_dids
+from opendbc.car.uds import DATA_IDENTIFIER_TYPE as DID
+
+VIN = b"1HGCM82633A004352"
+
+
+class FakeEcus:
+  """ECUs on one bus serving identifiers, some only accept a single identifier per request.
+  ECUs in out_of_range_ecus reject a request if any of its identifiers is unsupported"""
+  def __init__(self, ecus: dict[int, tuple[dict[int, bytes], bool]], out_of_range_ecus: tuple[int, ...] = ()):
+    self.out_of_range_ecus = out_of_range_ecus
+    self.sent: list[CanData] = []
+    self.requests: dict[int, list[bytes]] = {addr: [] for addr in ecus}
+    self.ecus = {}
+    for addr, (dids, multi_did) in ecus.items():
+      rx: list = []
+      client = uds.CanClient(lambda a, d, b: self.sent.append(CanData(a, d, b)), lambda rx=rx: [rx.pop(0) for _ in range(len(rx))],
+                             uds.get_rx_addr_for_tx_addr(addr), addr, 0)
+      msg = uds.IsoTpMessage(client, timeout=0)
+      msg.send(b"", setup_only=True)
+      self.ecus[addr] = (msg, rx, dids, multi_did)
+
+  def can_send(self, msgs: list[CanData]) -> None:
+    for m in msgs:
+      if m.address in self.ecus:
+        self.ecus[m.address][1].append((m.address, m.dat, m.src))
+
+  def can_recv(self, wait_for_one: bool = False) -> list[list[CanData]]:
+    for addr, (msg, _, dids, multi_did) in self.ecus.items():
+      req, _ = msg.recv()
+      if req is None:
+        continue
+      self.requests[addr].append(req)
+      req_dids = [int.from_bytes(req[i:i + 2], "big") for i in range(1, len(req), 2)]
+      if len(req_dids) > 1 and not multi_did:
+        msg.send(bytes([0x7F, req[0], 0x13]))
+      elif not any(did in dids for did in req_dids) or (addr in self.out_of_range_ecus and not all(did in dids for did in req_dids)):
+        msg.send(bytes([0x7F, req[0], 0x31]))
+      else:
+        msg.send(bytes([0x62]) + b"".join(did.to_bytes(2, "big") + dids[did] for did in req_dids if did in dids))
+    msgs, self.sent = self.sent, []
+    return [msgs]
+
+
+class TestDidQuery(unittest.TestCase):
+  def setUp(self):
+    self.bus = FakeEcus({
+      0x7e0: ({DID.VIN: VIN, DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-1", DID.ACTIVE_DIAGNOSTIC_SESSION: b"\x01"}, True),
+      0x7e1: ({DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-2", DID.ACTIVE_DIAGNOSTIC_SESSION: b"\x03"}, True),
+      0x7b0: ({DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-3", DID.ACTIVE_DIAGNOSTIC_SESSION: b"\x01"}, False),
+    })
+    self.dids = [DID.VIN, DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER, DID.ACTIVE_DIAGNOSTIC_SESSION]
+    self.expected = {
+      (0x7e0, None): {DID.VIN: VIN, DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-1", DID.ACTIVE_DIAGNOSTIC_SESSION: b"\x01"},
+      (0x7e1, None): {DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-2", DID.ACTIVE_DIAGNOSTIC_SESSION: b"\x03"},
+      (0x7b0, None): {DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-3", DID.ACTIVE_DIAGNOSTIC_SESSION: b"\x01"},
+    }
+
+  def _read(self, cache: DidCache | None = None, did_lengths: dict[int, int] | None = None):
+    return read_dids(self.bus.can_send, self.bus.can_recv, 0, [0x7e0, 0x7e1, 0x7b0, 0x7d0], self.dids, timeout=0.05, cache=cache,
+                     did_lengths=did_lengths)
+
+  def test_parse_response(self):
+    dat = b"\xf1\x90" + VIN + b"\xf1\x88SW-1"
+    self.assertEqual(uds.parse_data_by_identifier_response(dat, [DID.VIN, DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER]),
+                     {DID.VIN: VIN, DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-1"})
+
+    # data containing the next identifier needs a known length
+    dat = b"\xf1\x86\xf1\x88\xf1\x88SW-1"
+    self.assertEqual(uds.parse_data_by_identifier_response(dat, [DID.ACTIVE_DIAGNOSTIC_SESSION, DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER],
+                                                           {DID.ACTIVE_DIAGNOSTIC_SESSION: 2}),
+                     {DID.ACTIVE_DIAGNOSTIC_SESSION: b"\xf1\x88", DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-1"})
+
+    with self.assertRaises(ValueError):
+      uds.parse_data_by_identifier_response(b"\xf1\x90" + VIN, [DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER])
+
+  def test_read_dids(self):
+    self.assertEqual(self._read(), self.expected)
+    # one request for the ECUs supporting multiple identifiers, one request per identifier otherwise
+    self.assertEqual(len(self.bus.requests[0x7e0]), 1)
+    self.assertEqual(len(self.bus.requests[0x7e1]), 1)
+    self.assertEqual(len(self.bus.requests[0x7b0]), 1 + len(self.dids))
+
+  def test_out_of_range(self):
+    # an ECU rejecting a request for an unsupported identifier is retried per identifier, but keeps multi-identifier requests
+    self.bus.out_of_range_ecus = (0x7e1,)
+    cache = DidCache()
+    self.assertEqual(self._read(cache), self.expected)
+    self.assertEqual(len(self.bus.requests[0x7e1]), 1 + len(self.dids))
+    self.assertNotIn((0, 0x7e1, None), cache.single_did_ecus)
+    self.assertIn((0, 0x7b0, None), cache.single_did_ecus)
+
+  def test_cache_split_values(self):
+    # values split from multi-identifier responses without a known length aren't cached, single identifier responses are
+    cache = DidCache()
+    self._read(cache)
+    self.assertEqual(cache.values[(0, 0x7e0, None)], {})
+    self.assertEqual(cache.values[(0, 0x7b0, None)], {DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: b"SW-3"})
+
+  def test_cache(self):
+    cache = DidCache()
+    did_lengths = {DID.VIN: len(VIN), DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER: 4}
+    self.assertEqual(self._read(cache, did_lengths), self.expected)
+    for requests in self.bus.requests.values():
+      requests.clear()
+
+    # only the diagnostic session and unsupported identifiers are read again,
+    # the single identifier ECU isn't sent a multi-identifier request
+    self.assertEqual(self._read(cache, did_lengths), self.expected)
+    self.assertEqual(self.bus.requests[0x7e0], [b"\x22\xf1\x86"])
+    self.assertEqual(self.bus.requests[0x7b0], [b"\x22\xf1\x86", b"\x22\xf1\x90"])
+
+    # after a new ECU is installed, its identifiers are read again
+    self.bus.ecus[0x7e1][2][DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER] = b"SW-4"
+    self.assertEqual(self._read(cache, did_lengths)[(0x7e1, None)][DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER], b"SW-2")
+    cache.invalidate((0, 0x7e1, None))
+    self.assertEqual(self._read(cache, did_lengths)[(0x7e1, None)][DID.VEHICLE_MANUFACTURER_ECU_SOFTWARE_NUMBER], b"SW-4")
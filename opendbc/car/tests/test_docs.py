@@ -1,5 +1,6 @@
 from collections import defaultdict
 import unittest
+from unittest.mock import patch
 
 from opendbc.car.car_helpers import interfaces
 from opendbc.car.docs import get_all_car_docs
@@ -77,3 +78,9 @@ class TestCarDocs(unittest.TestCase):
         assert car_part_type.count(PartType.connector) == 1, f"Need to specify one harness connector: {car.name}"
         assert car_part_type.count(PartType.mount) == 1, f"Need to specify one mount: {car.name}"
         assert Cable.obd_c_cable_2ft in car_parts, f"Need to specify an OBD-C cable (2ft): {car.name}"
+
+  def test_memoized(self):
+    # docs are initialized once per process, later calls don't recompute CarParams
+    with patch("opendbc.car.docs.get_params_for_docs") as get_params_for_docs:
+      self.assertEqual(get_all_car_docs(), self.all_cars)
+    get_params_for_docs.assert_not_called()
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+
+from opendbc.car import ecu_addrs, uds
+from opendbc.car.can_definitions import CanData
+from opendbc.car.ecu_addrs import BATCH_SIZE, EcuInfo, discover_ecus, get_ecu_addrs, schedule_queries
+
+# (tx addr, sub addr, bus) of ECUs on the fake bus
+ECUS = {(0x7e0, None, 0), (0x7b0, None, 0), (0x750, 0x0f, 0), (0x750, 0x6d, 0), (0x18da10f1, None, 1)}
+
+
+class FakeBus:
+  """Responds to tester present from ECUS, and stands in for the time module: waiting for a frame takes 1 ms"""
+  def __init__(self):
+    self.batches: list[list[CanData]] = []
+    self.pending: list[CanData] = []
+    self.now = 0.
+
+  def monotonic(self) -> float:
+    return self.now
+
+  def can_send(self, msgs: list[CanData]) -> None:
+    self.batches.append(msgs)
+    for msg in msgs:
+      subaddr = msg.dat[0] if (msg.address, None, msg.src) not in ECUS else None
+      if (msg.address, subaddr, msg.src) in ECUS:
+        dat = bytes([0x02, uds.SERVICE_TYPE.TESTER_PRESENT + 0x40, 0x00])
+        dat = dat if subaddr is None else bytes([subaddr]) + dat
+        self.pending.append(CanData(uds.get_rx_addr_for_tx_addr(msg.address), dat.ljust(8, b"\x00"), msg.src))
+
+  def can_recv(self, wait_for_one: bool = False) -> list[list[CanData]]:
+    if wait_for_one:
+      self.now += 0.001
+    msgs, self.pending = self.pending, []
+    return [msgs] if msgs else []
+
+
+class TestEcuAddrs(unittest.TestCase):
+  def test_schedule_queries(self):
+    queries = [(0x750, 0x0f, 0), (0x7e0, None, 0), (0x750, 0x6d, 0), (0x750, None, 1), (0x750, 0x1f, 0)]
+    self.assertEqual(schedule_queries(queries), [
+      [(0x750, 0x0f, 0), (0x7e0, None, 0), (0x750, None, 1)],
+      [(0x750, 0x6d, 0)],
+      [(0x750, 0x1f, 0)],
+    ])
+
+  def test_discover_ecus(self):
+    bus = FakeBus()
+    with patch.object(ecu_addrs, "time", bus):
+      topology = discover_ecus(bus.can_recv, bus.can_send, [0, 1], sub_addr_addrs=[0x750], timeout=5, idle_timeout=0.05)
+
+    self.assertEqual({b: [(ecu.bus, ecu.rx_addr, ecu.sub_addr, ecu.tx_addr) for ecu in ecus] for b, ecus in topology.items()}, {
+      0: [(0, 0x758, 0x0f, 0x750), (0, 0x758, 0x6d, 0x750), (0, 0x7b8, None, 0x7b0), (0, 0x7e8, None, 0x7e0)],
+      1: [(1, 0x18daf110, None, 0x18da10f1)],
+    })
+    self.assertTrue(all(isinstance(ecu, EcuInfo) and ecu.response_time >= 0 for ecus in topology.values() for ecu in ecus))
+
+    # paced in batches, never more than one request to an address and bus per batch
+    for batch in bus.batches:
+      self.assertLessEqual(len(batch), BATCH_SIZE)
+      self.assertEqual(len(batch), len({(msg.address, msg.src) for msg in batch}))
+    self.assertEqual(sum(len(batch) for batch in bus.batches), 2 * (512 + 256))
+
+    # stops once responses dry up rather than waiting the full timeout
+    self.assertLess(bus.now, 2)
+
+  def test_expected_responses(self):
+    bus = FakeBus()
+    queries = {(0x7e0, None, 0), (0x7b0, None, 0)}
+    responses = {(0x7e8, None, 0), (0x7b8, None, 0), (0x7d8, None, 0)}
+
+    with patch.object(ecu_addrs, "time", bus):
+      self.assertEqual(get_ecu_addrs(bus.can_recv, bus.can_send, queries, responses, timeout=1,
+                                     expected=[{(0x7e8, None, 0)}, {(0x7b8, None, 0)}]), {(0x7e8, None, 0), (0x7b8, None, 0)})
+      self.assertLess(bus.now, 0.5)
+
+      # an ECU that doesn't respond means waiting the full timeout
+      start = bus.now
+      queries.add((0x7d0, None, 0))
+      get_ecu_addrs(bus.can_recv, bus.can_send, queries, responses, timeout=0.1, expected=[{(0x7d8, None, 0)}])
+      self.assertGreaterEqual(bus.now - start, 0.1)
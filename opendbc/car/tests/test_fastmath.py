@@ -0,0 +1,54 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+from opendbc.car.common.fastmath import Interp, clip, interp, rate_limit, sign
+
+SPECIAL = [0., -0., 1., -1., math.inf, -math.inf, math.nan, 1e-300, 1e300]
+
+
+def same(a, b) -> bool:
+  return (math.isnan(a) and math.isnan(b)) or a == b
+
+
+class TestFastMath(unittest.TestCase):
+  def setUp(self):
+    self.rng = random.Random(0)
+
+  def _value(self):
+    return self.rng.choice(SPECIAL) if self.rng.random() < 0.2 else self.rng.uniform(-10, 10)
+
+  def test_clip(self):
+    for _ in range(10000):
+      x, lo, hi = self._value(), self._value(), self._value()
+      self.assertTrue(same(clip(x, lo, hi), float(np.clip(x, lo, hi))), (x, lo, hi))
+    for x, lo, hi in ((5, 0, 3), (-5, 0, 3), (2, 0, 3), (2, 3, 0)):
+      self.assertEqual(clip(x, lo, hi), int(np.clip(x, lo, hi)))
+
+  def test_sign(self):
+    for x in SPECIAL:
+      self.assertTrue(same(sign(x), float(np.sign(x))), x)
+
+  def test_rate_limit(self):
+    for _ in range(1000):
+      new, last, step = self._value(), self._value(), abs(self._value())
+      self.assertTrue(same(rate_limit(new, last, -step, step), float(np.clip(new, last - step, last + step))))
+
+  def test_interp(self):
+    for _ in range(2000):
+      n = self.rng.randint(1, 6)
+      xp = sorted(x for x in (self.rng.choice([self._value(), self.rng.randint(-3, 3)]) for _ in range(n)) if not math.isnan(x)) or [0.]
+      fp = [self._value() for _ in xp]
+      table = Interp(xp, fp)
+      for x in [*xp, self._value(), self._value(), self.rng.randint(-4, 4)]:
+        expected = float(np.interp(x, xp, fp))
+        self.assertTrue(same(interp(x, xp, fp), expected), (x, xp, fp))
+        self.assertTrue(same(table(x), expected), (x, xp, fp))
+
+  def test_interp_invalid(self):
+    with self.assertRaises(ValueError):
+      interp(1., [], [])
+    with self.assertRaises(ValueError):
+      Interp([0., 1.], [0.])
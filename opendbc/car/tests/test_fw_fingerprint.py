@@ -247,9 +247,9 @@ class TestFwFingerprintTiming(unittest.TestCase):
   def test_startup_timing(self):
     # Tests worse-case VIN query time and typical present ECU query time
     vin_ref_times = {'worst': 1.6, 'best': 0.8}  # best assumes we go through all queries to get a match
-    present_ecu_ref_time = 0.45
+    present_ecu_ref_time = 0.35
 
-    def fake_get_ecu_addrs(*_, timeout):
+    def fake_get_ecu_addrs(*_, timeout, **__):
       self.total_time += timeout
       return set()
 
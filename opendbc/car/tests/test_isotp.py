@@ -0,0 +1,350 @@
+import logging
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from opendbc.car import isotp_parallel_query, uds
+from opendbc.car.can_definitions import CanData
+from opendbc.car.carlog import carlog
+from opendbc.car.frame_trace import FrameDirection, FrameTrace
+from opendbc.car.isotp_parallel_query import IsoTpParallelQuery
+from opendbc.car.uds import CAN_FRAME_LENGTHS, CanClient, IsoTpMessage, MessageTimeoutError, SERVICE_TYPE, UdsClient
+
+TX_ADDR, RX_ADDR = 0x7E0, 0x7E8
+
+
+class FakeClock:
+  """Stands in for the time module, advancing on sleep and by tick on every read"""
+  def __init__(self, tick: float = 0.):
+    self.now = 0.
+    self.tick = tick
+
+  def monotonic(self) -> float:
+    self.now += self.tick
+    return self.now
+
+  def sleep(self, secs: float) -> None:
+    assert secs >= 0
+    self.now += secs
+
+
+class IsoTpLink:
+  """Tester and ECU IsoTpMessages connected back to back, recording every frame on the bus"""
+  def __init__(self, can_fd: bool = False, sub_addr: int | None = None, tester_tx_dl: int | None = None, ecu_tx_dl: int | None = None,
+               ecu_separation_time: float = 0, ecu_single_frame_mode: bool = False, trace: FrameTrace | None = None):
+    self.frames: list[tuple[int, bytes]] = []
+    self.sends: list[int] = []  # number of frames in each send call
+    self.buffers: dict[int, list] = {TX_ADDR: [], RX_ADDR: []}
+    tester = CanClient(self._can_send, self._can_recv(RX_ADDR), TX_ADDR, RX_ADDR, 0, sub_addr=sub_addr, can_fd=can_fd, can_send_many=self._can_send_many,
+                       trace=trace)
+    ecu = CanClient(self._can_send, self._can_recv(TX_ADDR), RX_ADDR, TX_ADDR, 0, sub_addr=sub_addr, can_fd=can_fd, can_send_many=self._can_send_many)
+    self.tester = IsoTpMessage(tester, timeout=0, tx_dl=tester_tx_dl)
+    self.ecu = IsoTpMessage(ecu, timeout=0, tx_dl=ecu_tx_dl, separation_time=ecu_separation_time, single_frame_mode=ecu_single_frame_mode)
+
+  def _can_send(self, addr: int, dat: bytes, bus: int) -> None:
+    self.sends.append(1)
+    self.frames.append((addr, dat))
+    self.buffers[addr].append((addr, dat, bus))
+
+  def _can_send_many(self, msgs: list[tuple[int, bytes, int]]) -> None:
+    self.sends.append(len(msgs))
+    for addr, dat, bus in msgs:
+      self.frames.append((addr, dat))
+      self.buffers[addr].append((addr, dat, bus))
+
+  def _can_recv(self, addr: int):
+    def recv():
+      msgs, self.buffers[addr] = self.buffers[addr], []
+      return msgs
+    return recv
+
+  def transfer(self, sender: IsoTpMessage, receiver: IsoTpMessage, dat: bytes, timeout: float = 1) -> bytes:
+    self.frames.clear()
+    self.sends.clear()
+    receiver.send(b"", setup_only=True)
+    sender.send(dat)
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+      # sender handles flow control frames from the receiver and sends frames as they're due
+      resp, _ = receiver.recv()
+      if resp is not None:
+        return resp
+      sender.recv()
+    raise AssertionError("transfer did not complete")
+
+
+class FakeEcuPanda:
+  """Panda connected to an ECU that serves reads from memory and records transferred data"""
+  def __init__(self, memory: bytes, can_fd: bool = False):
+    self.memory = memory
+    self.transferred: list[bytes] = []
+    self.rx: list = []
+    self.tx: list = []
+    self.ecu = IsoTpMessage(CanClient(lambda addr, dat, bus: self.tx.append((addr, dat, bus)), self._ecu_recv, RX_ADDR, TX_ADDR, 0, can_fd=can_fd))
+    self.ecu.send(b"", setup_only=True)
+
+  def _ecu_recv(self):
+    msgs, self.rx = self.rx, []
+    return msgs
+
+  def can_send(self, addr, dat, bus, timeout=0):
+    self.rx.append((addr, dat, bus))
+
+  def can_send_many(self, arr, timeout=0):
+    self.rx.extend(arr)
+
+  def can_recv(self):
+    req, _ = self.ecu.recv(timeout=0)
+    if req is not None:
+      if req[0] == SERVICE_TYPE.READ_MEMORY_BY_ADDRESS:
+        addr, size = int.from_bytes(req[2:6], "big"), req[6]
+        self.ecu.send(bytes([req[0] + 0x40]) + self.memory[addr:addr + size])
+      elif req[0] == SERVICE_TYPE.TRANSFER_DATA:
+        self.transferred.append(req[2:])
+        self.ecu.send(bytes([req[0] + 0x40, req[1]]))
+    msgs, self.tx = self.tx, []
+    return msgs
+
+
+class TestIsoTp(unittest.TestCase):
+  def _check_round_trip(self, link: IsoTpLink, lengths: list[int]):
+    for length in lengths:
+      dat = bytes(i % 251 for i in range(length))
+      with self.subTest(length=length):
+        self.assertEqual(link.transfer(link.tester, link.ecu, dat), dat)
+        self.assertEqual(link.transfer(link.ecu, link.tester, dat), dat)
+        for _, frame in link.frames:
+          self.assertIn(len(frame), CAN_FRAME_LENGTHS)
+
+  def test_classic(self):
+    for sub_addr in (None, 0x10):
+      link = IsoTpLink(sub_addr=sub_addr)
+      self._check_round_trip(link, [1, 6, 7, 8, 100, 4095, 5000])
+      self.assertTrue(all(len(frame) == 8 for _, frame in link.frames))
+
+  def test_can_fd(self):
+    for sub_addr in (None, 0x10):
+      self._check_round_trip(IsoTpLink(can_fd=True, sub_addr=sub_addr), [1, 7, 8, 20, 61, 62, 63, 100, 4095, 4096, 70000])
+
+  def test_can_fd_frame_lengths(self):
+    link = IsoTpLink(can_fd=True)
+
+    # short single frames keep the classic 8 byte format
+    link.transfer(link.tester, link.ecu, b"\x22\xf1\x90")
+    self.assertEqual(link.frames, [(TX_ADDR, b"\x03\x22\xf1\x90\x00\x00\x00\x00")])
+
+    # longer single frames are padded to the next valid length
+    link.transfer(link.tester, link.ecu, bytes(10))
+    self.assertEqual(link.frames, [(TX_ADDR, b"\x00\x0a" + bytes(10))])
+
+    link.transfer(link.tester, link.ecu, bytes(11))
+    self.assertEqual(link.frames, [(TX_ADDR, b"\x00\x0b" + bytes(11) + bytes(3))])
+
+    # 62 bytes in the first frame, 63 in each consecutive frame
+    link.transfer(link.tester, link.ecu, bytes(62 + 63 * 3 + 1))
+    self.assertEqual([len(f) for a, f in link.frames if a == TX_ADDR], [64, 64, 64, 64, 8])
+    self.assertEqual([f[:3] for a, f in link.frames if a == RX_ADDR], [b"\x30\x00\x00"])
+
+    # escape sequence for lengths above 4095
+    link.transfer(link.tester, link.ecu, bytes(5000))
+    self.assertEqual(link.frames[0][1][:6], b"\x10\x00\x00\x00\x13\x88")
+
+  def test_mixed_data_lengths(self):
+    # TX_DL is configured per direction, receivers learn RX_DL from the first frame
+    link = IsoTpLink(can_fd=True, tester_tx_dl=8, ecu_tx_dl=24)
+    self._check_round_trip(link, [7, 21, 22, 23, 300])
+    self.assertTrue(all(len(f) == 8 for a, f in link.frames if a == TX_ADDR))
+
+  def test_classic_client_rejects_fd_frames(self):
+    with self.assertRaises(AssertionError):
+      IsoTpLink(tester_tx_dl=64)
+
+  def test_parallel_query_can_fd(self):
+    request, response = b"\x22\xf1\x00", b"\x62\xf1\x00"
+    fw_version = bytes(range(100))
+    query_sent: list[CanData] = []
+    ecu_sent: list[CanData] = []
+
+    def ecu_recv():
+      msgs = [(m.address, m.dat, m.src) for m in query_sent]
+      query_sent.clear()
+      return msgs
+
+    ecu = IsoTpMessage(CanClient(lambda addr, dat, bus: ecu_sent.append(CanData(addr, dat, bus)), ecu_recv, RX_ADDR, TX_ADDR, 0, can_fd=True), timeout=0)
+    ecu.send(b"", setup_only=True)
+
+    def can_recv(wait_for_one=False):
+      # the ECU handles everything the query sent since the last receive
+      resp, _ = ecu.recv()
+      if resp == request:
+        ecu.send(response + fw_version)
+      msgs = ecu_sent.copy()
+      ecu_sent.clear()
+      return [msgs]
+
+    query = IsoTpParallelQuery(query_sent.extend, can_recv, 0, [TX_ADDR], [request], [response], can_fd=True)
+    self.assertEqual(query.get_data(0.1), {(TX_ADDR, None): fw_version})
+
+  def test_parallel_query_paced(self):
+    # a multi-frame request to an ECU with a separation time sleeps until each consecutive frame is due
+    request, response = bytes([0x22, *range(20)]), b"\x62\x00"
+    clock = FakeClock(tick=1e-6)
+    query_sent: list[CanData] = []
+    ecu_sent: list[CanData] = []
+    polls: list[float] = []
+
+    def ecu_recv():
+      msgs = [(m.address, m.dat, m.src) for m in query_sent]
+      query_sent.clear()
+      return msgs
+
+    ecu = IsoTpMessage(CanClient(lambda addr, dat, bus: ecu_sent.append(CanData(addr, dat, bus)), ecu_recv, RX_ADDR, TX_ADDR, 0),
+                       timeout=0, separation_time=0.01)
+    ecu.send(b"", setup_only=True)
+
+    def can_recv(wait_for_one=False):
+      polls.append(clock.now)
+      resp, _ = ecu.recv()
+      if resp == request:
+        ecu.send(response)
+      msgs = ecu_sent.copy()
+      ecu_sent.clear()
+      return [msgs]
+
+    with patch.object(uds, "time", clock), patch.object(isotp_parallel_query, "time", clock):
+      query = IsoTpParallelQuery(query_sent.extend, can_recv, 0, [TX_ADDR], [request], [response])
+      self.assertEqual(query.get_data(0.1), {(TX_ADDR, None): b""})
+    self.assertGreaterEqual(clock.now, 0.02)
+    self.assertLess(len([t for t in polls if t < 0.02]), 10)
+
+  def test_uds_streaming(self):
+    memory = bytes(i % 251 for i in range(1000))
+    for can_fd in (False, True):
+      panda = FakeEcuPanda(memory, can_fd=can_fd)
+      uds_client = UdsClient(panda, TX_ADDR, RX_ADDR, can_fd=can_fd)
+
+      chunks = list(uds_client.read_memory_by_address_iter(0x10, 700, chunk_size=200))
+      self.assertEqual([len(c) for c in chunks], [200, 200, 200, 100])
+      self.assertEqual(b"".join(chunks), memory[0x10:0x10 + 700])
+
+      blocks = [memory[i:i + 300] for i in range(0, len(memory), 300)]
+      self.assertEqual(list(uds_client.transfer_data_iter(iter(blocks))), [b""] * len(blocks))
+      self.assertEqual(panda.transferred, blocks)
+
+  def test_uds_without_can_send_many(self):
+    # panda-like objects only implementing can_send and can_recv
+    memory = bytes(range(200))
+    panda = FakeEcuPanda(memory)
+    uds_client = UdsClient(SimpleNamespace(can_send=panda.can_send, can_recv=panda.can_recv), TX_ADDR, RX_ADDR)
+    self.assertEqual(b"".join(uds_client.read_memory_by_address_iter(0x10, 100, chunk_size=50)), memory[0x10:0x10 + 100])
+    self.assertEqual(list(uds_client.transfer_data_iter(iter([memory[:100]]))), [b""])
+    self.assertEqual(panda.transferred, [memory[:100]])
+
+  def test_batched_consecutive_frames(self):
+    # with no separation time, all consecutive frames go out in one call
+    link = IsoTpLink()
+    link.transfer(link.tester, link.ecu, bytes(6 + 7 * 20))
+    self.assertEqual(link.sends, [1, 1, 20])
+
+  def test_debug_level_change(self):
+    # clients created before the log level is raised still log their frames
+    link = IsoTpLink()
+    with self.assertLogs(carlog, logging.DEBUG) as logs:
+      link.transfer(link.tester, link.ecu, bytes(20))
+    self.assertTrue(any("CAN-TX" in line for line in logs.output))
+    self.assertTrue(any("ISO-TP: RESPONSE" in line for line in logs.output))
+
+  def test_send_delay_deprecated(self):
+    link = IsoTpLink()
+    with self.assertWarns(DeprecationWarning):
+      link.tester._can_client.send([bytes(8), bytes(8)], delay=0.001)
+    self.assertEqual(link.sends, [1, 1])
+
+  def test_separation_time(self):
+    link = IsoTpLink(ecu_separation_time=0.005)
+    start = time.monotonic()
+    dat = bytes(range(6 + 7 * 5))
+    self.assertEqual(link.transfer(link.tester, link.ecu, dat), dat)
+    self.assertGreaterEqual(time.monotonic() - start, 0.005 * 4)
+    self.assertEqual(link.sends, [1] * 7)
+    self.assertEqual(link.frames[1][1][:3], b"\x30\x00\x05")
+
+    # sub-millisecond separation times
+    link = IsoTpLink(ecu_separation_time=0.0003)
+    self.assertEqual(link.transfer(link.tester, link.ecu, dat), dat)
+    self.assertEqual(link.frames[1][1][:3], b"\x30\x00\xf3")
+    self.assertAlmostEqual(link.tester.tx_st_min, 0.0003)
+
+  def test_block_size(self):
+    # single frame mode requests a flow control after every consecutive frame, without sending padding frames past the end
+    link = IsoTpLink(ecu_single_frame_mode=True)
+    dat = bytes(range(6 + 7 * 3))
+    self.assertEqual(link.transfer(link.tester, link.ecu, dat), dat)
+    self.assertEqual([f[0] >> 4 for _, f in link.frames], [1, 3, 2, 3, 2, 3, 2])
+
+  def test_concurrent_sessions(self):
+    # two paced transfers progress together rather than one after the other
+    clock = FakeClock()
+    links = [IsoTpLink(ecu_separation_time=0.01) for _ in range(2)]
+    dat = bytes(6 + 7 * 5)
+    sent_at: list[list[float]] = [[], []]
+    with patch.object(uds, "time", clock):
+      for link in links:
+        link.ecu.send(b"", setup_only=True)
+        link.tester.send(dat)
+
+      done = [False, False]
+      while not all(done) and clock.now < 1:
+        for i, link in enumerate(links):
+          resp, _ = link.ecu.recv()
+          done[i] |= resp == dat
+          frames = len(link.frames)
+          link.tester.recv()
+          sent_at[i] += [clock.now] * (len(link.frames) - frames)
+        clock.now += 0.001
+
+    self.assertTrue(all(done))
+    # consecutive frames go out as soon as their separation time passes, without waiting on the other session
+    for times in sent_at:
+      self.assertEqual(len(times), 5)
+      self.assertEqual(times[0], 0.)
+      for prev, t in zip(times, times[1:], strict=False):
+        self.assertAlmostEqual(t - prev, 0.01)
+
+  def test_paced_recv_sleeps(self):
+    # a blocking recv sleeps until each consecutive frame is due instead of polling
+    clock = FakeClock(tick=1e-6)
+    link = IsoTpLink(ecu_separation_time=0.01)
+    tester_rx = link.tester._can_client.rx
+    polls: list[float] = []
+
+    def rx():
+      polls.append(clock.now)
+      return tester_rx()
+    link.tester._can_client.rx = rx
+
+    with patch.object(uds, "time", clock):
+      link.ecu.send(b"", setup_only=True)
+      link.tester.send(bytes(6 + 7 * 5))
+      link.ecu.recv()  # flow control
+      with self.assertRaises(MessageTimeoutError):
+        link.tester.recv(timeout=0.02)
+
+    # the consecutive frames are sent 10 ms apart, then the tester waits for a response that never comes
+    self.assertEqual([f[0] >> 4 for _, f in link.frames], [1, 3, 2, 2, 2, 2, 2])
+    self.assertLess(len([t for t in polls if t < 0.04]), 10)
+
+  def test_frame_trace(self):
+    trace = FrameTrace(maxlen=4)
+    link = IsoTpLink(trace=trace)
+    link.transfer(link.tester, link.ecu, bytes(6 + 7 * 5))
+    # first frame, flow control, then 5 consecutive frames, only the last 4 are kept
+    self.assertEqual([(d, addr) for _, d, _, addr, _ in trace], [(FrameDirection.TX, TX_ADDR)] * 4)
+    self.assertEqual([f for *_, f in trace], [f for _, f in link.frames[-4:]])
+
+    lines = []
+    trace.dump("test", log=lines.append)
+    self.assertEqual(len(lines), 1)
+    self.assertEqual(len(lines[0].splitlines()), 5)
+    self.assertIn("TX  bus 0  0x7e0  0x25", lines[0])
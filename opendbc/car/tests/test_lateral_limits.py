@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 import unittest
 import importlib
+import numpy as np
 from opendbc.testing import parameterized_class
 
 from opendbc.car import DT_CTRL
 from opendbc.car.car_helpers import interfaces
 from opendbc.car.interfaces import get_torque_params
-from opendbc.car.lateral import ISO_LATERAL_ACCEL
+from opendbc.car import lateral, lateral_sim
+from opendbc.car.lateral import ISO_LATERAL_ACCEL, AngleSteeringLimits, CurvatureSteeringLimits
 from opendbc.car.values import PLATFORMS
 
 # ISO 11270 - allowed up jerk is strictly lower than recommended limits
@@ -67,3 +69,68 @@ class TestLateralLimits(unittest.TestCase):
 
   def test_max_lateral_accel(self):
     assert self.torque_params["MAX_LAT_ACCEL_MEASURED"] <= ISO_LATERAL_ACCEL
+
+
+class TestLateralLimitSimulator(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.platforms = lateral_sim.get_torque_platforms()
+    cls.params = [params for params, _ in cls.platforms.values()]
+    cls.rng = np.random.default_rng(0)
+
+  def test_torque_limits_match_scalar(self):
+    for params in self.params[::5]:
+      steer_max = params.STEER_MAX
+      torque, torque_last = self.rng.integers(-2 * steer_max, 2 * steer_max, (2, 200))
+      meas_torque = self.rng.integers(-steer_max, steer_max, 200)
+      if hasattr(params, 'STEER_ERROR_MAX'):
+        batch = lateral_sim.apply_meas_steer_torque_limits(torque, torque_last, meas_torque, params)
+        scalar = [lateral.apply_meas_steer_torque_limits(*x, params) for x in zip(torque, torque_last, meas_torque, strict=True)]
+      else:
+        driver_torque = self.rng.uniform(-3, 3, 200) * params.STEER_DRIVER_ALLOWANCE / params.STEER_DRIVER_FACTOR
+        batch = lateral_sim.apply_driver_steer_torque_limits(torque, torque_last, driver_torque, params)
+        scalar = [lateral.apply_driver_steer_torque_limits(*x, params) for x in zip(torque, torque_last, driver_torque, strict=True)]
+      np.testing.assert_array_equal(batch, scalar)
+
+  def test_angle_and_curvature_limits_match_scalar(self):
+    angle_limits = AngleSteeringLimits(90, ([5., 25.], [0.3, 0.15]), ([5., 25.], [0.36, 0.26]))
+    curvature_limits = CurvatureSteeringLimits(0.02)
+    x, x_last, meas = self.rng.uniform(-1, 1, (3, 500))
+    v_ego = self.rng.uniform(0, 40, 500)
+    lat_active = self.rng.random(500) < 0.9
+
+    np.testing.assert_array_equal(lateral_sim.apply_std_steer_angle_limits(x * 100, x_last * 100, v_ego, meas * 100, lat_active, angle_limits),
+                                  [lateral.apply_std_steer_angle_limits(*args, angle_limits)
+                                   for args in zip(x * 100, x_last * 100, v_ego, meas * 100, lat_active, strict=True)])
+    np.testing.assert_array_equal(lateral_sim.apply_curvature_limits(x / 20, x_last / 20, v_ego, meas / 20, lat_active, 2, curvature_limits),
+                                  [curvature_limits.apply_limits(*args, 2) for args in zip(x / 20, x_last / 20, v_ego, meas / 20, lat_active, strict=True)])
+
+  def test_step_response(self):
+    # full torque right then left, released after each
+    commands = np.zeros((2, 800))
+    commands[0, :400], commands[1, :400] = 1, -1
+    torque = lateral_sim.simulate_torque_limits(self.params, commands)
+    max_lat_accel = np.array([[[max_lat_accel]] for _, max_lat_accel in self.platforms.values()])
+    steer_max = np.array([[[params.STEER_MAX]] for params in self.params])
+    report = lateral_sim.lateral_limit_report(torque / steer_max * max_lat_accel)
+
+    for i, (platform, (params, max_lat_accel)) in enumerate(self.platforms.items()):
+      with self.subTest(platform=platform):
+        up_jerk, down_jerk = TestLateralLimits.calculate_0_5s_jerk(params, {'MAX_LAT_ACCEL_MEASURED': max_lat_accel})
+        self.assertAlmostEqual(report.max_accel[i], max_lat_accel)
+        # the analytic jerk assumes a continuous rate, the simulation is within one steer command of it
+        self.assertAlmostEqual(report.max_jerk_up[i], up_jerk, delta=params.STEER_DELTA_UP / params.STEER_MAX * max_lat_accel / JERK_MEAS_T + 1e-9)
+        self.assertAlmostEqual(report.max_jerk_down[i], down_jerk, delta=params.STEER_DELTA_DOWN / params.STEER_MAX * max_lat_accel / JERK_MEAS_T + 1e-9)
+        self.assertAlmostEqual(report.time_to_max[i], np.ceil(params.STEER_MAX / params.STEER_DELTA_UP - 1) * params.STEER_STEP * DT_CTRL)
+
+  def test_curvature_sweep(self):
+    # every speed from standstill to highway, commanding far past the accel limit
+    v_ego = np.linspace(5, 40, 36)[:, None]
+    commands = np.where(np.arange(300) < 150, 1., 0.) * np.ones_like(v_ego)
+    limits = CurvatureSteeringLimits(0.2)
+    curvature = lateral_sim.simulate_curvature_limits([limits], [2], commands, v_ego)
+    report = lateral_sim.lateral_limit_report(curvature * v_ego ** 2)
+
+    self.assertAlmostEqual(report.max_accel[0], limits.MAX_LATERAL_ACCEL)
+    self.assertLessEqual(report.max_jerk_up[0], limits.MAX_LATERAL_JERK + 1e-9)
+    self.assertLessEqual(report.max_jerk_down[0], limits.MAX_LATERAL_JERK + 1e-9)
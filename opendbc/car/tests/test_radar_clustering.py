@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from opendbc.car.radar_clustering import DENSE_MAX_PAIRS, ClusterTracker, GridIndex, cluster_points
+
+
+def brute_force_nearest(pts, queries, radius):
+  dist_sq = np.sum((queries[:, None, :] - pts[None, :, :]) ** 2, axis=2)
+  closest = np.argmin(dist_sq, axis=1)
+  return np.where(dist_sq[np.arange(len(queries)), closest] < radius ** 2, closest, -1)
+
+
+class TestRadarClustering(unittest.TestCase):
+  def setUp(self):
+    self.rng = np.random.default_rng(0)
+
+  def test_grid_nearest(self):
+    for dims in (1, 2, 3):
+      for _ in range(50):
+        n, m = self.rng.integers(1, 80, 2)
+        radius = self.rng.uniform(0.5, 10)
+        pts = self.rng.uniform(-50, 50, (n, dims))
+        queries = self.rng.uniform(-60, 60, (m, dims))
+        np.testing.assert_array_equal(GridIndex(pts, radius).nearest(queries), brute_force_nearest(pts, queries, radius))
+
+  def test_grid_ties(self):
+    # integer points have exact distances, ties go to the lowest index
+    pts = self.rng.integers(-5, 5, (200, 2)).astype(float)
+    queries = self.rng.integers(-6, 6, (200, 2)).astype(float)
+    np.testing.assert_array_equal(GridIndex(pts, 2).nearest(queries), brute_force_nearest(pts, queries, 2))
+
+  def test_cluster_points(self):
+    self.assertEqual(len(cluster_points([], [], 5)), 0)
+    np.testing.assert_array_equal(cluster_points([], [[0., 0., 0.]], 5), [-1])
+
+    n = int(DENSE_MAX_PAIRS ** 0.5) + 1
+    for size in (10, n):
+      pts = self.rng.uniform(0, 100, (size, 3))
+      pts2 = pts + self.rng.normal(0, 2, (size, 3))
+      np.testing.assert_array_equal(cluster_points(pts, pts2, 5), brute_force_nearest(pts, pts2, 5))
+
+  def test_tracker(self):
+    tracker = ClusterTracker(5, weights=(1., 2., 2.))
+    clusters = tracker.update([[10., 0., 0.], [50., 1., 1.], [11., 0.5, 0.]])
+    np.testing.assert_array_equal(clusters.trackId, [0, 1, 2])
+
+    # tracks persist while detections stay close, lateral distance is weighted. Unmatched detections start new tracks
+    clusters = tracker.update([[51., 1., 1.], [12., 3., 0.], [10.5, 0.5, 0.]])
+    np.testing.assert_array_equal(clusters.trackId, [1, 3, 2])
+
+    # close detections are merged into one cluster
+    clusters = tracker.update([[10., 0.5, 0.], [30., 0., 0.], [11., 1., 0.]])
+    np.testing.assert_array_equal(clusters.trackId, [2, 4])
+    np.testing.assert_array_equal(clusters.dRel, [10.5, 30.])
+    np.testing.assert_array_equal(clusters.dRelMin, [10., 30.])
+    np.testing.assert_array_equal(clusters.yRel, [0.75, 0.])
+
+    clusters = tracker.update(np.empty((0, 3)))
+    self.assertEqual(len(clusters.trackId), 0)
+    clusters = tracker.update([[30., 0., 0.]])
+    np.testing.assert_array_equal(clusters.trackId, [5])
+
+
+if __name__ == "__main__":
+  unittest.main()
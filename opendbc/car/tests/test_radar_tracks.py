@@ -0,0 +1,59 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from opendbc.car import structs
+from opendbc.car.interfaces import RadarInterfaceBase
+from opendbc.car.radar_tracks import TrackColumns, update_valid_counts
+
+
+class RadarInterface(RadarInterfaceBase):
+  pass
+
+
+class TestRadarTracks(unittest.TestCase):
+  def test_track_columns(self):
+    rcp = SimpleNamespace(vl={'A': {'DIST': 1., 'IDX_1': 3}, 'B': {'DIST': 2., 'IDX_2': 4}})
+    tracks = TrackColumns(rcp, ['A', 'B'], {'dist': 'DIST', 'idx': ['IDX_1', 'IDX_2']})
+    columns = tracks.read()
+    np.testing.assert_array_equal(columns['dist'], [1., 2.])
+    np.testing.assert_array_equal(columns['idx'], [3, 4])
+
+    # values are read from the parser's dicts on every read
+    rcp.vl['B']['DIST'] = 5.
+    np.testing.assert_array_equal(tracks.read()['dist'], [1., 5.])
+
+    with self.assertRaises(AssertionError):
+      TrackColumns(rcp, ['A', 'B'], {'idx': ['IDX_1']})
+
+  def test_update_valid_counts(self):
+    counts = np.array([0, 3, 3, 0])
+    counts = update_valid_counts(counts, np.array([False, True, False, False]), np.array([True, True, False, False]))
+    np.testing.assert_array_equal(counts, [1, 1, 2, 0])
+
+  def test_update_points(self):
+    RI = RadarInterface(structs.CarParams())
+    keys = [10, 11, 12]
+
+    def update(valid, new_track=None, rows=None):
+      n = len(keys)
+      RI._update_points(keys, np.array(valid), np.arange(n, dtype=float), -np.arange(n, dtype=float), np.ones(n), new_track, rows)
+      return {key: pt.trackId for key, pt in RI.pts.items()}
+
+    self.assertEqual(update([True, False, True]), {10: 0, 12: 1})
+    self.assertEqual(RI.pts[12].dRel, 2.)
+    self.assertEqual(RI.pts[12].yRel, -2.)
+
+    # existing tracks keep their trackId and position, invalid ones are removed
+    self.assertEqual(update([True, True, False]), {10: 0, 11: 2})
+
+    # new tracks are recreated in place
+    self.assertEqual(update([True, True, True], new_track=np.array([True, False, False])), {10: 3, 11: 2, 12: 4})
+
+    # only given rows are processed
+    self.assertEqual(update([False, False, False], rows=np.array([1])), {10: 3, 12: 4})
+
+
+if __name__ == "__main__":
+  unittest.main()
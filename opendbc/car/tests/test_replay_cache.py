@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from opendbc.car.interfaces import TORQUE_OVERRIDE_PATH, TORQUE_PARAMS_PATH, TORQUE_SUBSTITUTE_PATH
+from opendbc.car.tests import replay_cache, test_models
+from opendbc.testing import fuzzy_test
+
+
+class TestReplayCache(unittest.TestCase):
+  def test_import_graph(self):
+    modules = replay_cache.import_graph("opendbc.car.toyota.interface")
+    assert {"opendbc.car.toyota.carstate", "opendbc.car.toyota.carcontroller", "opendbc.car.interfaces", "opendbc.can.parser"} <= modules
+    # other brands' control code doesn't affect Toyota results
+    assert "opendbc.car.honda.carcontroller" not in modules
+    assert not any(m.startswith(("numpy", "capnp")) for m in modules)
+
+  def test_platform_code_hash(self):
+    assert replay_cache.platform_code_hash("TOYOTA_RAV4") == replay_cache.platform_code_hash("TOYOTA_RAV4")
+    assert replay_cache.platform_code_hash("TOYOTA_RAV4") != replay_cache.platform_code_hash("HONDA_CIVIC")
+
+    with tempfile.NamedTemporaryFile(dir=replay_cache.ROOT, suffix=".py") as f:
+      f.write(b"a")
+      f.flush()
+      h = replay_cache.platform_code_hash("TOYOTA_RAV4", (Path(f.name),))
+      replay_cache.platform_code_hash.cache_clear()
+      f.write(b"b")
+      f.flush()
+      assert h != replay_cache.platform_code_hash("TOYOTA_RAV4", (Path(f.name),))
+
+  def test_data_files(self):
+    data_files = {str(p) for p in replay_cache.DATA_FILES}
+    assert {TORQUE_PARAMS_PATH, TORQUE_OVERRIDE_PATH, TORQUE_SUBSTITUTE_PATH} <= data_files
+    assert str(replay_cache.ROOT / "opendbc/car/car.capnp") in data_files
+
+  def test_get_put(self):
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.object(replay_cache, "CACHE_ROOT", Path(tmp) / "cache"), \
+         mock.patch.object(replay_cache, "ENABLED", True):
+      key = replay_cache.cache_key("test", "TOYOTA_RAV4", "segment")
+      assert replay_cache.get(key) is None
+      replay_cache.put(key, {"passed": True})
+      assert replay_cache.get(key) == {"passed": True}
+
+      with mock.patch.object(replay_cache, "ENABLED", False):
+        assert replay_cache.get(key) is None
+
+  def test_model_verdicts(self):
+    class TestCarModel(test_models.TestCarModelBase):
+      platform = "TOYOTA_RAV4"
+      cached_passes = {"test_cached"}
+      ran: list[str] = []
+
+      @classmethod
+      def get_cache_key(cls, test_name):
+        return test_name
+
+      def setUp(self):
+        self.ran.append(self._testMethodName)
+
+      def test_cached(self):
+        pass
+
+      def test_pass(self):
+        pass
+
+      def test_fail(self):
+        raise AssertionError
+
+      def test_skip(self):
+        self.skipTest("skipped")
+
+      def test_subtest_fail(self):
+        with self.subTest(i=0):
+          pass
+        with self.subTest(i=1):
+          raise AssertionError
+
+      @fuzzy_test(max_examples=1)
+      def test_fuzzy(self, fuzzy):
+        pass
+
+    # the repo runs tests under pytest, whose result isn't a unittest.TestResult
+    for result in (unittest.TestResult(), PytestLikeResult()):
+      with self.subTest(result=type(result).__name__), tempfile.TemporaryDirectory() as tmp, \
+           mock.patch.object(replay_cache, "CACHE_ROOT", Path(tmp)), mock.patch.object(replay_cache, "ENABLED", True):
+        TestCarModel.ran = []
+        names = ("test_cached", "test_pass", "test_fail", "test_skip", "test_subtest_fail", "test_fuzzy")
+        for name in names:
+          TestCarModel(name).run(result)
+
+        # cached tests are reported as passed without running, only passing non-fuzzy tests are recorded
+        assert TestCarModel.ran == list(names[1:])
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ["test_pass"]
+        if isinstance(result, PytestLikeResult):
+          assert result.passed == ["test_cached", "test_pass", "test_fuzzy"]
+
+
+class PytestLikeResult:
+  """The result methods pytest's TestCaseFunction implements"""
+  def __init__(self):
+    self.passed: list[str] = []
+
+  def startTest(self, test):
+    pass
+
+  def stopTest(self, test):
+    pass
+
+  def addSuccess(self, test):
+    self.passed.append(test._testMethodName)
+
+  def addError(self, test, err):
+    pass
+
+  def addFailure(self, test, err):
+    pass
+
+  def addSkip(self, test, reason, *, handle_subtests=True):
+    pass
+
+  def addExpectedFailure(self, test, err, reason=""):
+    pass
+
+  def addUnexpectedSuccess(self, test, reason=None):
+    pass
+
+  def addSubTest(self, test, subtest, err):
+    pass
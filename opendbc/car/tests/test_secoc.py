@@ -0,0 +1,46 @@
+import random
+import struct
+import unittest
+
+from Crypto.Cipher import AES
+from Crypto.Hash import CMAC
+
+from opendbc.car.secoc import SecOCSigner, add_mac, build_sync_mac
+
+
+def reference_mac(key: bytes, dat: bytes) -> int:
+  cmac = CMAC.new(key, ciphermod=AES)
+  cmac.update(dat)
+  return int.from_bytes(cmac.digest()[:4], "big") >> 4
+
+
+class TestSecOC(unittest.TestCase):
+  def setUp(self):
+    self.rng = random.Random(0)
+    self.key = self.rng.randbytes(16)
+
+  def test_sign_matches_cmac(self):
+    signer = SecOCSigner(self.key)
+    for _ in range(200):
+      addr, payload = self.rng.randrange(0x800), self.rng.randbytes(8)
+      trip_cnt, reset_cnt, msg_cnt = self.rng.randrange(1 << 16), self.rng.randrange(1 << 20), self.rng.randrange(1 << 10)
+
+      freshness = struct.pack(">HI", trip_cnt, (reset_cnt << 12) | ((msg_cnt & 0xff) << 4) | ((reset_cnt & 0b11) << 2))
+      mac = reference_mac(self.key, struct.pack(">H", addr) + payload[:4] + freshness)
+      flags = ((msg_cnt & 0b11) << 2) | (reset_cnt & 0b11)
+      expected = (addr, payload[:4] + struct.pack(">I", (flags << 28) | mac), 0)
+
+      self.assertEqual(signer.sign(trip_cnt, reset_cnt, msg_cnt, (addr, payload, 0)), expected)
+      self.assertEqual(add_mac(self.key, trip_cnt, reset_cnt, msg_cnt, (addr, payload, 0)), expected)
+
+  def test_sign_batch(self):
+    signer = SecOCSigner(self.key)
+    msgs = [(cnt, (0x131 + cnt, self.rng.randbytes(8), cnt % 3)) for cnt in range(10)]
+    for n in (1, 3, 10, 2):
+      self.assertEqual(signer.sign_batch(123, 4567, msgs[:n]), [signer.sign(123, 4567, cnt, msg) for cnt, msg in msgs[:n]])
+    self.assertEqual(signer.sign_batch(123, 4567, []), [])
+
+  def test_sync_mac(self):
+    for trip_cnt, reset_cnt in ((0, 0), (1, 2), (0xffff, 0xfffff)):
+      dat = struct.pack(">HH", 0xf, trip_cnt) + struct.pack(">I", reset_cnt << 12)[:-1]
+      self.assertEqual(build_sync_mac(self.key, trip_cnt, reset_cnt), reference_mac(self.key, dat))
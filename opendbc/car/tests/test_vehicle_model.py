@@ -65,3 +65,23 @@ class TestVehicleModel(unittest.TestCase):
           x2 = dyn_ss_sol(sa, u, roll, self.VM)
 
           np.testing.assert_almost_equal(x1, x2, decimal=3)
+
+  def test_vectorized(self):
+    """Verifies that evaluating arrays matches evaluating each point"""
+    u, roll, sa = (x.ravel() for x in np.meshgrid(np.linspace(0, 30, num=7), np.linspace(math.radians(-20), math.radians(20), num=5),
+                                                  np.linspace(math.radians(-20), math.radians(20), num=5)))
+
+    np.testing.assert_allclose(self.VM.steady_state_sol(sa, u, roll),
+                               np.hstack([self.VM.steady_state_sol(*x) for x in zip(sa, u, roll, strict=True)]), rtol=1e-12)
+
+    u, roll, sa = u[u > 0], roll[u > 0], sa[u > 0]
+    yaw_rate = self.VM.yaw_rate(sa, u, roll)
+    np.testing.assert_allclose(yaw_rate, [self.VM.yaw_rate(*x) for x in zip(sa, u, roll, strict=True)], rtol=1e-12)
+    np.testing.assert_allclose(self.VM.get_steer_from_yaw_rate(yaw_rate, u, roll), sa, rtol=1e-9, atol=1e-12)
+
+  def test_update_params(self):
+    yaw_rate = self.VM.yaw_rate(0.1, 20., 0.)
+    self.VM.update_params(2.0, self.VM.sR)
+    self.assertNotAlmostEqual(self.VM.yaw_rate(0.1, 20., 0.), yaw_rate)
+    _, yr = dyn_ss_sol(0.1, 20., 0., self.VM)
+    self.assertAlmostEqual(float(yr[0]), self.VM.yaw_rate(0.1, 20., 0.), places=10)
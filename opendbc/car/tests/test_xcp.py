@@ -0,0 +1,151 @@
+import struct
+import unittest
+from types import SimpleNamespace
+
+from opendbc.car.xcp import COMMAND_CODE, CommandResponseError, XcpClient
+
+TX_ADDR, RX_ADDR = 0x700, 0x701
+
+
+class FakeXcpSlave:
+  """Panda connected to an XCP slave with byte addressed memory, optionally supporting block and interleaved modes"""
+  def __init__(self, memory: bytes, slave_block_mode: bool = True, master_block_mode: bool = True, max_bs: int = 8, queue_size: int = 0,
+               comm_mode_info: bool = True, download_next: bool = True):
+    self.memory = bytearray(memory)
+    self.slave_block_mode = slave_block_mode
+    self.master_block_mode = master_block_mode
+    self.max_bs = max_bs
+    self.queue_size = queue_size
+    self.comm_mode_info = comm_mode_info
+    self.download_next = download_next
+    self.mta = 0
+    self.download_remaining = 0
+    self.log: list[int | str] = []  # commands received and receive calls
+    self.tx: list = []
+
+  def respond(self, dat: bytes) -> None:
+    self.tx.append((RX_ADDR, dat.ljust(8, b"\x00"), 0))
+
+  def write(self, n: int, dat: bytes) -> None:
+    n = min(n, 6)
+    self.memory[self.mta:self.mta + n] = dat[:n]
+    self.mta += n
+    self.download_remaining -= n
+    if self.download_remaining == 0:
+      self.respond(b"\xFF")
+
+  def can_clear(self, bus):
+    pass
+
+  def can_send(self, addr, dat, bus):
+    cmd = dat[0]
+    self.log.append(cmd)
+    if cmd == COMMAND_CODE.CONNECT:
+      self.respond(bytes([0xFF, 0x15, 0x41 if self.slave_block_mode else 0x01, 8, 0, 8, 1, 1]))
+    elif cmd == COMMAND_CODE.GET_COMM_MODE_INFO:
+      if not self.comm_mode_info:
+        self.respond(b"\xFE\x20")
+        return
+      optional = (0x01 if self.master_block_mode else 0) | (0x02 if self.queue_size else 0)
+      self.respond(bytes([0xFF, 0, optional, 0, self.max_bs, 0, self.queue_size, 1]))
+    elif cmd == COMMAND_CODE.SET_MTA:
+      self.mta = struct.unpack(">I", dat[4:8])[0]
+      self.respond(b"\xFF")
+    elif cmd == COMMAND_CODE.UPLOAD:
+      n = dat[1]
+      chunk = 7 if self.slave_block_mode else n
+      for i in range(0, n, chunk):
+        self.respond(b"\xFF" + self.memory[self.mta + i:self.mta + min(i + chunk, n)])
+      self.mta += n
+    elif cmd == COMMAND_CODE.DOWNLOAD:
+      self.download_remaining = dat[1]
+      self.write(dat[1], dat[2:])
+    elif cmd == COMMAND_CODE.DOWNLOAD_NEXT:
+      if not self.download_next:
+        self.respond(b"\xFE\x20")
+      elif dat[1] != self.download_remaining:
+        self.respond(b"\xFE\x29")
+      else:
+        self.write(dat[1], dat[2:])
+
+  def can_send_many(self, msgs):
+    for addr, dat, bus in msgs:
+      self.can_send(addr, dat, bus)
+
+  def can_recv(self):
+    self.log.append("recv")
+    msgs, self.tx = self.tx, []
+    return msgs
+
+
+class TestXcp(unittest.TestCase):
+  def setUp(self):
+    self.memory = bytes(i % 251 for i in range(0x1000))
+
+  def _client(self, slave: FakeXcpSlave) -> XcpClient:
+    client = XcpClient(slave, TX_ADDR, RX_ADDR)
+    client.connect()
+    return client
+
+  def test_read_memory(self):
+    for slave_block_mode in (False, True):
+      slave = FakeXcpSlave(self.memory, slave_block_mode=slave_block_mode)
+      client = self._client(slave)
+      self.assertEqual(client.read_memory(0x10, 600), self.memory[0x10:0x10 + 600])
+      uploads = slave.log.count(COMMAND_CODE.UPLOAD)
+      self.assertEqual(uploads, 3 if slave_block_mode else 86)
+
+  def test_interleaved_read_memory(self):
+    slave = FakeXcpSlave(self.memory, queue_size=3)
+    client = self._client(slave)
+    self.assertEqual(client.read_memory(0, 2000), self.memory[:2000])
+    # one command in progress plus three queued before waiting for the first response
+    after_mta = slave.log[slave.log.index(COMMAND_CODE.SET_MTA) + 1:]
+    first_upload = after_mta.index(COMMAND_CODE.UPLOAD)
+    self.assertEqual(after_mta[first_upload:first_upload + 5], [COMMAND_CODE.UPLOAD] * 4 + ["recv"])
+
+  def test_write_memory(self):
+    data = bytes(range(200)) * 2
+    for master_block_mode in (False, True):
+      slave = FakeXcpSlave(bytes(0x1000), master_block_mode=master_block_mode)
+      client = self._client(slave)
+      client.write_memory(0x20, data)
+      self.assertEqual(bytes(slave.memory[0x20:0x20 + len(data)]), data)
+      self.assertEqual(slave.log.count(COMMAND_CODE.DOWNLOAD), 9 if master_block_mode else 67)
+      self.assertEqual(slave.log.count(COMMAND_CODE.DOWNLOAD_NEXT), 58 if master_block_mode else 0)
+
+  def test_write_memory_without_can_send_many(self):
+    data = bytes(range(200))
+    slave = FakeXcpSlave(bytes(0x1000))
+    client = self._client(SimpleNamespace(can_clear=slave.can_clear, can_send=slave.can_send, can_recv=slave.can_recv))
+    client.write_memory(0x20, data)
+    self.assertEqual(bytes(slave.memory[0x20:0x20 + len(data)]), data)
+    self.assertGreater(slave.log.count(COMMAND_CODE.DOWNLOAD_NEXT), 0)
+
+  def test_write_memory_fallback(self):
+    data = bytes(range(100))
+    for kwargs in ({"comm_mode_info": False}, {"download_next": False}):
+      with self.subTest(**kwargs):
+        slave = FakeXcpSlave(bytes(0x1000), **kwargs)
+        client = self._client(slave)
+        client.write_memory(0x20, data)
+        self.assertEqual(bytes(slave.memory[0x20:0x20 + len(data)]), data)
+        self.assertFalse(client._master_block_mode)
+
+  def test_download_block_limits(self):
+    client = self._client(FakeXcpSlave(self.memory, master_block_mode=False))
+    client.get_comm_mode_info()
+    with self.assertRaises(ValueError):
+      client.download(bytes(7))
+
+    client = self._client(FakeXcpSlave(self.memory, max_bs=2))
+    client.get_comm_mode_info()
+    client.download(bytes(12))
+    with self.assertRaises(ValueError):
+      client.download(bytes(13))
+
+  def test_error_response(self):
+    client = self._client(FakeXcpSlave(self.memory, download_next=False))
+    client.get_comm_mode_info()
+    with self.assertRaises(CommandResponseError):
+      client.download(bytes(20))
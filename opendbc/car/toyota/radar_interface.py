@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
+import numpy as np
+
 from opendbc.can import CANParser
 from opendbc.car import Bus
+from opendbc.car.radar_tracks import TrackColumns, update_valid_counts
 from opendbc.car.structs import RadarData
 from opendbc.car.toyota.values import DBC, ToyotaFlags
 from opendbc.car.interfaces import RadarInterfaceBase
@@ -33,9 +36,13 @@ class RadarInterface(RadarInterfaceBase):
       self.RADAR_A_MSGS = list(range(0x210, 0x220))
       self.RADAR_B_MSGS = list(range(0x220, 0x230))
 
-    self.valid_cnt = {key: 0 for key in self.RADAR_A_MSGS}
+    self.valid_cnt = np.zeros(len(self.RADAR_A_MSGS), dtype=int)
 
     self.rcp = None if CP.radarUnavailable else _create_radar_can_parser(CP)
+    if self.rcp is not None:
+      self.track_a = TrackColumns(self.rcp, self.RADAR_A_MSGS, {'LONG_DIST': 'LONG_DIST', 'LAT_DIST': 'LAT_DIST', 'REL_SPEED': 'REL_SPEED',
+                                                               'NEW_TRACK': 'NEW_TRACK', 'VALID': 'VALID'})
+      self.track_b = TrackColumns(self.rcp, self.RADAR_B_MSGS, {'SCORE': 'SCORE'})
     self.trigger_msg = self.RADAR_B_MSGS[-1]
     self.updated_messages = set()
 
@@ -62,32 +69,17 @@ class RadarInterface(RadarInterfaceBase):
     if self.rcp.vl['STATUS_MSG']['RADAR_STATUS'] != 1 or self.rcp.vl['STATUS_MSG']['RADAR_PRE_FAULT'] != 0:
       ret.errors.radarUnavailableTemporary = True
 
-    for ii in sorted(updated_messages):
-      if ii in self.RADAR_A_MSGS:
-        cpt = self.rcp.vl[ii]
-
-        if cpt['LONG_DIST'] >= 255 or cpt['NEW_TRACK']:
-          self.valid_cnt[ii] = 0    # reset counter
-        if cpt['VALID'] and cpt['LONG_DIST'] < 255:
-          self.valid_cnt[ii] += 1
-        else:
-          self.valid_cnt[ii] = max(self.valid_cnt[ii] - 1, 0)
-
-        score = self.rcp.vl[ii+16]['SCORE']
-        # print ii, self.valid_cnt[ii], score, cpt['VALID'], cpt['LONG_DIST'], cpt['LAT_DIST']
-
-        # radar point only valid if it's a valid measurement and score is above 50
-        if cpt['VALID'] or (score > 50 and cpt['LONG_DIST'] < 255 and self.valid_cnt[ii] > 0):
-          if ii not in self.pts or cpt['NEW_TRACK']:
-            self.pts[ii] = RadarData.RadarPoint()
-            self.pts[ii].trackId = self.track_id
-            self.track_id += 1
-          self.pts[ii].dRel = cpt['LONG_DIST']  # from front of car
-          self.pts[ii].yRel = -cpt['LAT_DIST']  # in car frame's y axis, left is positive
-          self.pts[ii].vRel = cpt['REL_SPEED']
-        else:
-          if ii in self.pts:
-            del self.pts[ii]
+    a, score = self.track_a.read(), self.track_b.read()['SCORE']
+    updated = np.array([ii in updated_messages for ii in self.RADAR_A_MSGS])
+    in_range = a['LONG_DIST'] < 255
+    new_track = a['NEW_TRACK'] != 0
+
+    self.valid_cnt = np.where(updated, update_valid_counts(self.valid_cnt, ~in_range | new_track, (a['VALID'] != 0) & in_range), self.valid_cnt)
+
+    # radar point only valid if it's a valid measurement and score is above 50
+    valid = (a['VALID'] != 0) | ((score > 50) & in_range & (self.valid_cnt > 0))
+    # dRel from front of car, yRel in car frame's y axis, left is positive
+    self._update_points(self.RADAR_A_MSGS, valid, a['LONG_DIST'], -a['LAT_DIST'], a['REL_SPEED'], new_track, np.flatnonzero(updated))
 
     ret.points = list(self.pts.values())
     return ret
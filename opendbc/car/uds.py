@@ -1,12 +1,15 @@
 import time
 import struct
+import logging
+import warnings
 from collections import deque
 from typing import NamedTuple, cast
-from collections.abc import Callable, Generator
+from collections.abc import Callable, Generator, Iterable
 from enum import IntEnum
 from functools import partial
 
 from opendbc.car.carlog import carlog
+from opendbc.car.frame_trace import FrameDirection, FrameTrace
 
 
 class SERVICE_TYPE(IntEnum):
@@ -334,10 +337,48 @@ def get_dtc_status_names(status):
   return result
 
 
+def parse_data_by_identifier_response(dat: bytes, data_identifier_types: list[int], did_lengths: dict[int, int] | None = None) -> dict[int, bytes]:
+  """Splits a read data by identifier response (without the service id) into the data of each identifier.
+
+  Identifiers are returned in request order, unsupported ones are left out. Without a known length, data runs up
+  to the next requested identifier, which is ambiguous if the data contains it"""
+  results = {}
+  remaining = list(data_identifier_types)
+  pos = 0
+  while pos < len(dat):
+    did = struct.unpack('!H', dat[pos:pos + 2])[0] if len(dat) - pos >= 2 else None
+    if did not in remaining:
+      raise ValueError(f'invalid response data identifier: {hex(did) if did is not None else None} expected one of: {[hex(d) for d in remaining]}')
+    remaining = remaining[remaining.index(did) + 1:]
+    start = pos + 2
+    if did_lengths is not None and did in did_lengths:
+      pos = start + did_lengths[did]
+    else:
+      next_pos = [dat.find(struct.pack('!H', next_did), start) for next_did in remaining]
+      pos = min([i for i in next_pos if i != -1], default=len(dat))
+    results[did] = dat[start:pos]
+  return results
+
+
+# ISO 15765-2: CAN-FD frames longer than 8 bytes must be one of these lengths
+CAN_FRAME_LENGTHS = (8, 12, 16, 20, 24, 32, 48, 64)
+ISOTP_MAX_FIRST_FRAME_LEN = 0xFFF  # longer messages use the 32-bit escape sequence
+
+
+def get_can_frame_length(dat_len: int) -> int:
+  """Shortest valid CAN frame length that fits dat_len bytes (classic frames are padded to 8)"""
+  for frame_len in CAN_FRAME_LENGTHS:
+    if dat_len <= frame_len:
+      return frame_len
+  raise ValueError(f"invalid CAN frame length: {dat_len}")
+
+
 class CanClient:
   def __init__(self, can_send: Callable[[int, bytes, int], None], can_recv: Callable[[], list[tuple[int, bytes, int]]],
-               tx_addr: int, rx_addr: int, bus: int, sub_addr: int | None = None, rx_sub_addr: int | None = None):
+               tx_addr: int, rx_addr: int, bus: int, sub_addr: int | None = None, rx_sub_addr: int | None = None, can_fd: bool = False,
+               can_send_many: Callable[[list[tuple[int, bytes, int]]], None] | None = None, trace: FrameTrace | None = None):
     self.tx = can_send
+    self.tx_many = can_send_many
     self.rx = can_recv
     self.tx_addr = tx_addr
     self.rx_addr = rx_addr
@@ -345,6 +386,14 @@ class CanClient:
     self.sub_addr = sub_addr
     self.rx_sub_addr = rx_sub_addr if rx_sub_addr is not None else sub_addr
     self.bus = bus
+    self.max_frame_len = CAN_FRAME_LENGTHS[-1] if can_fd else 8
+    # frames are recorded unformatted into the trace if one is set
+    self.trace = trace
+
+  @property
+  def debug(self) -> bool:
+    """Whether frames are logged, checked once per send or receive so the log level can change on a live client"""
+    return carlog.isEnabledFor(logging.DEBUG)
 
   def _recv_filter(self, bus: int, addr: int) -> bool:
     # handle functional addresses (switch to first addr to respond)
@@ -364,6 +413,7 @@ class CanClient:
     return bus == self.bus and addr == self.rx_addr
 
   def _recv_buffer(self, drain: bool = False) -> None:
+    debug = self.debug
     while True:
       msgs = self.rx()
       if drain:
@@ -374,7 +424,10 @@ class CanClient:
           if self._recv_filter(rx_bus, rx_addr) and len(rx_data) > 0:
             rx_data = bytes(rx_data)  # convert bytearray to bytes
 
-            carlog.debug(f"CAN-RX: {hex(rx_addr)} - 0x{bytes.hex(rx_data)}")
+            if self.trace is not None:
+              self.trace.record(FrameDirection.RX, rx_bus, rx_addr, rx_data)
+            if debug:
+              carlog.debug(f"CAN-RX: {hex(rx_addr)} - 0x{bytes.hex(rx_data)}")
 
             # Cut off sub addr in first byte
             if self.rx_sub_addr is not None:
@@ -398,17 +451,34 @@ class CanClient:
       pass  # empty
 
   def send(self, msgs: list[bytes], delay: float = 0) -> None:
-    for i, msg in enumerate(msgs):
-      if delay and i != 0:
-        carlog.debug(f"CAN-TX: delay - {delay}")
-        time.sleep(delay)
+    """delay between frames is deprecated, IsoTpMessage paces consecutive frames by STmin without blocking"""
+    if delay:
+      warnings.warn("CanClient.send delay is deprecated", DeprecationWarning, stacklevel=2)
 
+    debug = self.debug
+    frames = []
+    for msg in msgs:
       if self.sub_addr is not None:
         msg = bytes([self.sub_addr]) + msg
 
-      carlog.debug(f"CAN-TX: {hex(self.tx_addr)} - 0x{bytes.hex(msg)}")
-      assert len(msg) <= 8
+      if self.trace is not None:
+        self.trace.record(FrameDirection.TX, self.bus, self.tx_addr, msg)
+      if debug:
+        carlog.debug(f"CAN-TX: {hex(self.tx_addr)} - 0x{bytes.hex(msg)}")
+      assert len(msg) <= self.max_frame_len, f"CAN-TX: invalid frame length: {len(msg)}"
+      frames.append(msg)
+
+    if self.tx_many is not None and len(frames) > 1 and not delay:
+      self.tx_many([(self.tx_addr, msg, self.bus) for msg in frames])
+      # prevent rx buffer from overflowing on large tx
+      if len(frames) >= 10:
+        self._recv_buffer()
+      return
 
+    for i, msg in enumerate(frames):
+      if delay and i != 0:
+        carlog.debug(f"CAN-TX: delay - {delay}")
+        time.sleep(delay)
       self.tx(self.tx_addr, msg, self.bus)
       # prevent rx buffer from overflowing on large tx
       if i % 10 == 9:
@@ -416,58 +486,95 @@ class CanClient:
 
 
 class IsoTpMessage:
-  def __init__(self, can_client: CanClient, timeout: float = 1, single_frame_mode: bool = False, separation_time: float = 0):
+  def __init__(self, can_client: CanClient, timeout: float = 1, single_frame_mode: bool = False, separation_time: float = 0,
+               tx_dl: int | None = None):
     self._can_client = can_client
     self.timeout = timeout
     self.single_frame_mode = single_frame_mode
-    self.max_len = 8 if self._can_client.sub_addr is None else 7
+
+    # TX_DL is the CAN frame length we transmit with, RX_DL is learned from each received first frame
+    if tx_dl is None:
+      tx_dl = can_client.max_frame_len
+    assert tx_dl in CAN_FRAME_LENGTHS and tx_dl <= can_client.max_frame_len, f"isotp - invalid TX_DL: {tx_dl}"
+    self.tx_dl = tx_dl
+    self.addr_len = 0 if self._can_client.sub_addr is None else 1
+    self.max_len = self.tx_dl - self.addr_len
 
     # <= 127, separation time in milliseconds
     # 0xF1 to 0xF9 UF, 100 to 900 microseconds
     if 1e-4 <= separation_time <= 9e-4:
-      offset = int(round(separation_time, 4) * 1e4) - 1
+      offset = round(separation_time * 1e4) - 1
       separation_time = 0xF1 + offset
     elif 0 <= separation_time <= 0.127:
       separation_time = round(separation_time * 1000)
     else:
       raise Exception("Separation time not in range")
 
-    self.flow_control_msg = bytes([
+    self.flow_control_msg = self._pad(bytes([
       0x30,  # flow control
       0x01 if self.single_frame_mode else 0x00,  # block size
       separation_time,
-    ]).ljust(self.max_len, b"\x00")
+    ]))
+
+  @property
+  def debug(self) -> bool:
+    return self._can_client.debug
+
+  def _pad(self, msg: bytes) -> bytes:
+    # pad to 8 bytes, or the next valid CAN-FD frame length (the CanClient adds the sub-address byte)
+    return msg.ljust(get_can_frame_length(len(msg) + self.addr_len) - self.addr_len, b"\x00")
+
+  def _single_frame_capacity(self, frame_len: int) -> int:
+    # single frames longer than 8 bytes have a 0x00 PCI byte followed by the length
+    return frame_len - 1 if frame_len + self.addr_len <= 8 else frame_len - 2
 
   def send(self, dat: bytes, setup_only: bool = False) -> None:
     # throw away any stale data
     self._can_client.recv(drain=True)
 
-    self.tx_dat = dat
+    # frames are sliced from a view of the request to avoid copying it for each frame
+    self.tx_dat = memoryview(dat)
     self.tx_len = len(dat)
     self.tx_idx = 0
     self.tx_done = False
+    # consecutive frames allowed by the last flow control, sent no faster than the receiver's STmin
+    self.tx_block: deque[bytes] = deque()
+    self.tx_last_block = False
+    self.tx_st_min = 0.
+    self.tx_deadline = 0.
 
+    # multi-frame responses are reassembled in a buffer sized from the first frame
     self.rx_dat = b""
+    self.rx_buf = bytearray()
     self.rx_len = 0
+    self.rx_pos = 0
     self.rx_idx = 0
     self.rx_done = False
 
-    if not setup_only:
-      carlog.debug(f"ISO-TP: REQUEST - {hex(self._can_client.tx_addr)} 0x{bytes.hex(self.tx_dat)}")
+    if not setup_only and self.debug:
+      carlog.debug(f"ISO-TP: REQUEST - {hex(self._can_client.tx_addr)} 0x{self.tx_dat.hex()}")
     self._tx_first_frame(setup_only=setup_only)
 
   def _tx_first_frame(self, setup_only: bool = False) -> None:
-    if self.tx_len < self.max_len:
+    if self.tx_len <= self._single_frame_capacity(self.max_len):
       # single frame (send all bytes)
-      if not setup_only:
+      if not setup_only and self.debug:
         carlog.debug(f"ISO-TP: TX - single frame - {hex(self._can_client.tx_addr)}")
-      msg = (bytes([self.tx_len]) + self.tx_dat).ljust(self.max_len, b"\x00")
+      if self.tx_len <= self._single_frame_capacity(8 - self.addr_len):
+        msg = self._pad(bytes([self.tx_len]) + self.tx_dat)
+      else:
+        msg = self._pad(bytes([0x00, self.tx_len]) + self.tx_dat)
       self.tx_done = True
     else:
-      # first frame (send first 6 bytes)
-      if not setup_only:
+      # first frame (send first max_len - 2 bytes, max_len - 6 with the escaped length)
+      if not setup_only and self.debug:
         carlog.debug(f"ISO-TP: TX - first frame - {hex(self._can_client.tx_addr)}")
-      msg = (struct.pack("!H", 0x1000 | self.tx_len) + self.tx_dat[:self.max_len - 2]).ljust(self.max_len - 2, b"\x00")
+      if self.tx_len <= ISOTP_MAX_FIRST_FRAME_LEN:
+        pci = struct.pack("!H", 0x1000 | self.tx_len)
+      else:
+        pci = struct.pack("!HI", 0x1000, self.tx_len)
+      self.tx_first_len = self.max_len - len(pci)
+      msg = pci + self.tx_dat[:self.tx_first_len]
     if not setup_only:
       self._can_client.send([msg])
 
@@ -479,7 +586,11 @@ class IsoTpMessage:
     rx_in_progress = False
     try:
       while True:
+        received = False
+        if self._tx_consecutive_frames():
+          start_time = time.monotonic()
         for msg in self._can_client.recv():
+          received = True
           frame_type = self._isotp_rx_next(msg)
           start_time = time.monotonic()
           # Anything that signifies we're building a response
@@ -489,51 +600,86 @@ class IsoTpMessage:
         # no timeout indicates non-blocking
         if timeout == 0:
           return None, rx_in_progress
-        if time.monotonic() - start_time > timeout:
+        now = time.monotonic()
+        if now - start_time > timeout:
           raise MessageTimeoutError("timeout waiting for response")
+        # consecutive frames are waiting for their separation time, sleep until the next is due instead of polling
+        if self.tx_block and not received:
+          time.sleep(max(0., min(self.tx_deadline, start_time + timeout) - now))
     finally:
-      if self.rx_dat:
+      if self.rx_dat and self.debug:
         carlog.debug(f"ISO-TP: RESPONSE - {hex(self._can_client.rx_addr)} 0x{bytes.hex(self.rx_dat)}")
 
+  def _tx_consecutive_frames(self) -> bool:
+    """Sends the consecutive frames that are due without blocking, returns whether any were sent"""
+    if not self.tx_block:
+      return False
+
+    now = time.monotonic()
+    if self.tx_st_min == 0:
+      self._can_client.send(list(self.tx_block))
+      self.tx_block.clear()
+    elif now >= self.tx_deadline:
+      self._can_client.send([self.tx_block.popleft()])
+      self.tx_deadline = now + self.tx_st_min
+    else:
+      return False
+
+    if not self.tx_block and self.tx_last_block:
+      self.tx_done = True
+    if self.debug:
+      carlog.debug(f"ISO-TP: TX - consecutive frame - {hex(self._can_client.tx_addr)} idx={self.tx_idx - len(self.tx_block)} done={self.tx_done}")
+    return True
+
   def _isotp_rx_next(self, rx_data: bytes) -> ISOTP_FRAME_TYPE:
     # TODO: Handle CAN frame data optimization, which is allowed with some frame types
     # # ISO 15765-2 specifies an eight byte CAN frame for ISO-TP communication
     # assert len(rx_data) == self.max_len, f"isotp - rx: invalid CAN frame length: {len(rx_data)}"
 
     if rx_data[0] >> 4 == ISOTP_FRAME_TYPE.SINGLE:
-      assert self.rx_dat == b"" or self.rx_done, "isotp - rx: single frame with active frame"
+      assert self.rx_len == 0 or self.rx_done, "isotp - rx: single frame with active frame"
 
       # "if the first byte is 0x00, then it's a CAN-FD SF, and the second byte specifies the size of the data."
       # - https://en.wikipedia.org/wiki/CAN_FD
-      if rx_data[0] & 0x0F == 0 and len(rx_data) > 8:
+      if rx_data[0] & 0x0F == 0 and len(rx_data) + self.addr_len > 8:
         self.rx_len = rx_data[1]
         offset = 2
-        # TODO: update self.max_len for CAN FD
-        max_len = 62 if self._can_client.sub_addr is None else 61
-        assert self.rx_len <= max_len, f"isotp - rx: invalid single frame length: {self.rx_len}"
+        assert self.rx_len <= self._single_frame_capacity(len(rx_data)), f"isotp - rx: invalid single frame length: {self.rx_len}"
       else:
         self.rx_len = rx_data[0] & 0x0F
         offset = 1
-        assert self.rx_len < self.max_len, f"isotp - rx: invalid single frame length: {self.rx_len}"
+        assert self.rx_len <= self._single_frame_capacity(8 - self.addr_len), f"isotp - rx: invalid single frame length: {self.rx_len}"
 
       self.rx_dat = rx_data[offset:offset + self.rx_len]
       self.rx_idx = 0
       self.rx_done = True
-      carlog.debug(f"ISO-TP: RX - single frame - {hex(self._can_client.rx_addr)} idx={self.rx_idx} done={self.rx_done}")
+      if self.debug:
+        carlog.debug(f"ISO-TP: RX - single frame - {hex(self._can_client.rx_addr)} idx={self.rx_idx} done={self.rx_done}")
       return ISOTP_FRAME_TYPE.SINGLE
 
     elif rx_data[0] >> 4 == ISOTP_FRAME_TYPE.FIRST:
-      # TODO: support CAN FD first frames
       # Once a first frame is received, further frames must be consecutive
-      assert self.rx_dat == b"" or self.rx_done, "isotp - rx: first frame with active frame"
+      assert self.rx_len == 0 or self.rx_done, "isotp - rx: first frame with active frame"
+      # RX_DL is the first frame's length, every consecutive frame but the last is the same length
+      rx_dl = len(rx_data)
+      assert rx_dl + self.addr_len in CAN_FRAME_LENGTHS, f"isotp - rx: invalid CAN frame length: {len(rx_data)}"
       self.rx_len = ((rx_data[0] & 0x0F) << 8) + rx_data[1]
-      assert self.rx_len >= self.max_len, f"isotp - rx: invalid first frame length: {self.rx_len}"
-      assert len(rx_data) == self.max_len, f"isotp - rx: invalid CAN frame length: {len(rx_data)}"
-      self.rx_dat = rx_data[2:]
+      offset = 2
+      if self.rx_len == 0:
+        # escape sequence, 32-bit length follows
+        self.rx_len = struct.unpack("!I", rx_data[2:6])[0]
+        offset = 6
+        assert self.rx_len > ISOTP_MAX_FIRST_FRAME_LEN, f"isotp - rx: invalid first frame length: {self.rx_len}"
+      assert self.rx_len > self._single_frame_capacity(rx_dl), f"isotp - rx: invalid first frame length: {self.rx_len}"
+      self.rx_dat = b""
+      self.rx_buf = bytearray(self.rx_len)
+      self.rx_pos = len(rx_data) - offset
+      self.rx_buf[:self.rx_pos] = memoryview(rx_data)[offset:]
       self.rx_idx = 0
       self.rx_done = False
-      carlog.debug(f"ISO-TP: RX - first frame - {hex(self._can_client.rx_addr)} idx={self.rx_idx} done={self.rx_done}")
-      carlog.debug(f"ISO-TP: TX - flow control continue - {hex(self._can_client.tx_addr)}")
+      if self.debug:
+        carlog.debug(f"ISO-TP: RX - first frame - {hex(self._can_client.rx_addr)} idx={self.rx_idx} done={self.rx_done}")
+        carlog.debug(f"ISO-TP: TX - flow control continue - {hex(self._can_client.tx_addr)}")
       # send flow control message
       self._can_client.send([self.flow_control_msg])
       return ISOTP_FRAME_TYPE.FIRST
@@ -542,14 +688,18 @@ class IsoTpMessage:
       assert not self.rx_done, "isotp - rx: consecutive frame with no active frame"
       self.rx_idx += 1
       assert self.rx_idx & 0xF == rx_data[0] & 0xF, "isotp - rx: invalid consecutive frame index"
-      rx_size = self.rx_len - len(self.rx_dat)
-      self.rx_dat += rx_data[1:1 + rx_size]
-      if self.rx_len == len(self.rx_dat):
+      rx_size = min(len(rx_data) - 1, self.rx_len - self.rx_pos)
+      self.rx_buf[self.rx_pos:self.rx_pos + rx_size] = memoryview(rx_data)[1:1 + rx_size]
+      self.rx_pos += rx_size
+      if self.rx_len == self.rx_pos:
+        self.rx_dat = bytes(self.rx_buf)
+        self.rx_buf = bytearray()
         self.rx_done = True
       elif self.single_frame_mode:
         # notify ECU to send next frame
         self._can_client.send([self.flow_control_msg])
-      carlog.debug(f"ISO-TP: RX - consecutive frame - {hex(self._can_client.rx_addr)} idx={self.rx_idx} done={self.rx_done}")
+      if self.debug:
+        carlog.debug(f"ISO-TP: RX - consecutive frame - {hex(self._can_client.rx_addr)} idx={self.rx_idx} done={self.rx_done}")
       return ISOTP_FRAME_TYPE.CONSECUTIVE
 
     elif rx_data[0] >> 4 == ISOTP_FRAME_TYPE.FLOW:
@@ -557,31 +707,35 @@ class IsoTpMessage:
       assert rx_data[0] != 0x32, "isotp - rx: flow-control overflow/abort"
       assert rx_data[0] == 0x30 or rx_data[0] == 0x31, "isotp - rx: flow-control transfer state indicator invalid"
       if rx_data[0] == 0x30:
-        carlog.debug(f"ISO-TP: RX - flow control continue - {hex(self._can_client.tx_addr)}")
-        delay_ts = rx_data[2] & 0x7F
-        # scale is 1 milliseconds if first bit == 0, 100 micro seconds if first bit == 1
-        delay_div = 1000. if rx_data[2] & 0x80 == 0 else 10000.
-        delay_sec = delay_ts / delay_div
-
-        # first frame = 6 bytes, each consecutive frame = 7 bytes
+        if self.debug:
+          carlog.debug(f"ISO-TP: RX - flow control continue - {hex(self._can_client.tx_addr)}")
+        assert not self.tx_block, "isotp - rx: flow control before block was sent"
+        # STmin is 0-127 milliseconds, or 100-900 microseconds for 0xF1-0xF9. reserved values use the maximum
+        st_min = rx_data[2]
+        if st_min <= 0x7F:
+          self.tx_st_min = st_min / 1000.
+        elif 0xF1 <= st_min <= 0xF9:
+          self.tx_st_min = (st_min - 0xF0) / 10000.
+        else:
+          self.tx_st_min = 0x7F / 1000.
+
+        # first frame = max_len - 2 bytes (- 6 if escaped), each consecutive frame = max_len - 1 bytes
         num_bytes = self.max_len - 1
-        start = self.max_len - 2 + self.tx_idx * num_bytes
+        start = self.tx_first_len + self.tx_idx * num_bytes
         count = rx_data[1]
-        end = start + count * num_bytes if count > 0 else self.tx_len
-        tx_msgs = []
+        end = min(start + count * num_bytes, self.tx_len) if count > 0 else self.tx_len
         for i in range(start, end, num_bytes):
           self.tx_idx += 1
-          # consecutive tx messages
-          msg = (bytes([0x20 | (self.tx_idx & 0xF)]) + self.tx_dat[i:i + num_bytes]).ljust(self.max_len, b"\x00")
-          tx_msgs.append(msg)
-        # send consecutive tx messages
-        self._can_client.send(tx_msgs, delay=delay_sec)
-        if end >= self.tx_len:
-          self.tx_done = True
-        carlog.debug(f"ISO-TP: TX - consecutive frame - {hex(self._can_client.tx_addr)} idx={self.tx_idx} done={self.tx_done}")
+          self.tx_block.append(self._pad(bytes([0x20 | (self.tx_idx & 0xF)]) + self.tx_dat[i:i + num_bytes]))
+        self.tx_last_block = end >= self.tx_len
+
+        # the first consecutive frame is sent right away, the rest are paced by recv
+        self.tx_deadline = time.monotonic()
+        self._tx_consecutive_frames()
       elif rx_data[0] == 0x31:
         # wait (do nothing until next flow control message)
-        carlog.debug(f"ISO-TP: TX - flow control wait - {hex(self._can_client.tx_addr)}")
+        if self.debug:
+          carlog.debug(f"ISO-TP: TX - flow control wait - {hex(self._can_client.tx_addr)}")
       return ISOTP_FRAME_TYPE.FLOW
 
     # 4-15 - reserved
@@ -610,14 +764,21 @@ def get_rx_addr_for_tx_addr(tx_addr, rx_offset=0x8):
 
 class UdsClient:
   def __init__(self, panda, tx_addr: int, rx_addr: int | None = None, bus: int = 0, sub_addr: int | None = None, rx_sub_addr: int | None = None,
-               timeout: float = 1, tx_timeout: float = 1, response_pending_timeout: float = 10):
+               timeout: float = 1, tx_timeout: float = 1, response_pending_timeout: float = 10, can_fd: bool = False,
+               separation_time: float = 0, trace: FrameTrace | None = None):
     self.bus = bus
     self.tx_addr = tx_addr
     self.rx_addr = rx_addr if rx_addr is not None else get_rx_addr_for_tx_addr(tx_addr)
     self.sub_addr = sub_addr
     self.timeout = timeout
+    self.separation_time = separation_time
     can_send_with_timeout = partial(panda.can_send, timeout=int(tx_timeout*1000))
-    self._can_client = CanClient(can_send_with_timeout, panda.can_recv, self.tx_addr, self.rx_addr, self.bus, self.sub_addr, rx_sub_addr)
+    # panda-like objects without can_send_many send consecutive frames one at a time
+    can_send_many = getattr(panda, "can_send_many", None)
+    can_send_many_with_timeout = partial(can_send_many, timeout=int(tx_timeout*1000)) if can_send_many is not None else None
+    self.trace = trace
+    self._can_client = CanClient(can_send_with_timeout, panda.can_recv, self.tx_addr, self.rx_addr, self.bus, self.sub_addr, rx_sub_addr, can_fd,
+                                 can_send_many_with_timeout, trace)
     self.response_pending_timeout = response_pending_timeout
 
   # generic uds request
@@ -629,12 +790,17 @@ class UdsClient:
       req += data
 
     # send request, wait for response
-    isotp_msg = IsoTpMessage(self._can_client, timeout=self.timeout)
+    isotp_msg = IsoTpMessage(self._can_client, timeout=self.timeout, separation_time=self.separation_time)
     isotp_msg.send(req)
     response_pending = False
     while True:
       timeout = self.response_pending_timeout if response_pending else self.timeout
-      resp, _ = isotp_msg.recv(timeout)
+      try:
+        resp, _ = isotp_msg.recv(timeout)
+      except (MessageTimeoutError, AssertionError) as e:
+        if self.trace is not None:
+          self.trace.dump(f"UDS-RX: {hex(self.tx_addr)} {SERVICE_TYPE(service_type).name} - {e}")
+        raise
 
       if resp is None:
         continue
@@ -763,8 +929,13 @@ class UdsClient:
       data = None
     self._uds_request(SERVICE_TYPE.LINK_CONTROL, subfunction=link_control_type, data=data)
 
+  def read_data_by_identifiers(self, data_identifier_types: list[int], did_lengths: dict[int, int] | None = None) -> dict[int, bytes]:
+    """Reads several identifiers in one request, not every ECU supports this"""
+    data = b''.join(struct.pack('!H', did) for did in data_identifier_types)
+    resp = self._uds_request(SERVICE_TYPE.READ_DATA_BY_IDENTIFIER, subfunction=None, data=data)
+    return parse_data_by_identifier_response(resp, data_identifier_types, did_lengths)
+
   def read_data_by_identifier(self, data_identifier_type: DATA_IDENTIFIER_TYPE):
-    # TODO: support list of identifiers
     data = struct.pack('!H', data_identifier_type)
     resp = self._uds_request(SERVICE_TYPE.READ_DATA_BY_IDENTIFIER, subfunction=None, data=data)
     resp_id = struct.unpack('!H', resp[0:2])[0] if len(resp) >= 2 else None
@@ -789,6 +960,12 @@ class UdsClient:
     resp = self._uds_request(SERVICE_TYPE.READ_MEMORY_BY_ADDRESS, subfunction=None, data=data)
     return resp
 
+  def read_memory_by_address_iter(self, memory_address: int, memory_size: int, chunk_size: int = 0xFF, memory_address_bytes: int = 4,
+                                  memory_size_bytes: int = 1) -> Generator[bytes, None, None]:
+    """Reads memory in chunk_size requests, yielding each chunk as it's received"""
+    for offset in range(0, memory_size, chunk_size):
+      yield self.read_memory_by_address(memory_address + offset, min(chunk_size, memory_size - offset), memory_address_bytes, memory_size_bytes)
+
   def read_scaling_data_by_identifier(self, data_identifier_type: DATA_IDENTIFIER_TYPE):
     data = struct.pack('!H', data_identifier_type)
     resp = self._uds_request(SERVICE_TYPE.READ_SCALING_DATA_BY_IDENTIFIER, subfunction=None, data=data)
@@ -969,5 +1146,11 @@ class UdsClient:
       raise ValueError(f'invalid block_sequence_count: {resp_id}')
     return resp[1:]
 
+  def transfer_data_iter(self, blocks: Iterable[bytes], block_sequence_count: int = 1) -> Generator[bytes, None, None]:
+    """Transfers blocks as they're produced with a wrapping block sequence counter, yielding each response"""
+    for block in blocks:
+      yield self.transfer_data(block_sequence_count, block)
+      block_sequence_count = (block_sequence_count + 1) & 0xFF
+
   def request_transfer_exit(self):
     self._uds_request(SERVICE_TYPE.REQUEST_TRANSFER_EXIT, subfunction=None)
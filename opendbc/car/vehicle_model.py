@@ -11,14 +11,17 @@ The system is defined by
 x_dot = A*x + B*u
 
 A depends on longitudinal speed, u [m/s], and vehicle parameters CP
+
+All VehicleModel methods accept NumPy arrays for sa, u, and roll, and evaluate them element-wise
 """
 
 import numpy as np
-from numpy.linalg import solve
 
 from opendbc.car.structs import CarParams
 from opendbc.car import ACCELERATION_DUE_TO_GRAVITY
 
+FloatOrArray = float | np.ndarray
+
 
 class VehicleModel:
   def __init__(self, CP: CarParams):
@@ -44,7 +47,16 @@ class VehicleModel:
     self.cR: float = stiffness_factor * self.cR_orig
     self.sR: float = steer_ratio
 
-  def steady_state_sol(self, sa: float, u: float, roll: float) -> np.ndarray:
+    # constants derived from the parameters, only recomputed here
+    self.slip_factor: float = calc_slip_factor(self)
+    self._a = (-(self.cF + self.cR) / self.m,
+               -(self.cF * self.aF - self.cR * self.aR) / self.m,
+               -(self.cF * self.aF - self.cR * self.aR) / self.j,
+               -(self.cF * self.aF**2 + self.cR * self.aR**2) / self.j)
+    self._b = ((self.cF + self.chi * self.cR) / self.m / self.sR,
+               (self.cF * self.aF - self.chi * self.cR * self.aR) / self.j / self.sR)
+
+  def steady_state_sol(self, sa: FloatOrArray, u: FloatOrArray, roll: FloatOrArray) -> np.ndarray:
     """Returns the steady state solution.
 
     If the speed is too low we can't use the dynamic model (tire slip is undefined),
@@ -56,14 +68,14 @@ class VehicleModel:
       roll: Road Roll [rad]
 
     Returns:
-      2x1 matrix with steady state solution (lateral speed, rotational speed)
+      2x1 matrix with steady state solution (lateral speed, rotational speed), 2xN for array inputs
     """
-    if u > 0.1:
-      return dyn_ss_sol(sa, u, roll, self)
-    else:
-      return kin_ss_sol(sa, u, self)
+    dynamic = np.greater(u, 0.1)
+    if dynamic.ndim == 0:
+      return dyn_ss_sol(sa, u, roll, self) if dynamic else kin_ss_sol(sa, u, self)
+    return np.where(dynamic, dyn_ss_sol(sa, np.where(dynamic, u, 1.), roll, self), kin_ss_sol(sa, u, self))
 
-  def calc_curvature(self, sa: float, u: float, roll: float) -> float:
+  def calc_curvature(self, sa: FloatOrArray, u: FloatOrArray, roll: FloatOrArray) -> FloatOrArray:
     """Returns the curvature. Multiplied by the speed this will give the yaw rate.
 
     Args:
@@ -76,7 +88,7 @@ class VehicleModel:
     """
     return (self.curvature_factor(u) * sa / self.sR) + self.roll_compensation(roll, u)
 
-  def curvature_factor(self, u: float) -> float:
+  def curvature_factor(self, u: FloatOrArray) -> FloatOrArray:
     """Returns the curvature factor.
     Multiplied by wheel angle (not steering wheel angle) this will give the curvature.
 
@@ -86,10 +98,9 @@ class VehicleModel:
     Returns:
       Curvature factor [1/m]
     """
-    sf = calc_slip_factor(self)
-    return (1. - self.chi) / (1. - sf * u**2) / self.l
+    return (1. - self.chi) / (1. - self.slip_factor * u**2) / self.l
 
-  def get_steer_from_curvature(self, curv: float, u: float, roll: float) -> float:
+  def get_steer_from_curvature(self, curv: FloatOrArray, u: FloatOrArray, roll: FloatOrArray) -> FloatOrArray:
     """Calculates the required steering wheel angle for a given curvature
 
     Args:
@@ -103,7 +114,7 @@ class VehicleModel:
 
     return (curv - self.roll_compensation(roll, u)) * self.sR * 1.0 / self.curvature_factor(u)
 
-  def roll_compensation(self, roll: float, u: float) -> float:
+  def roll_compensation(self, roll: FloatOrArray, u: FloatOrArray) -> FloatOrArray:
     """Calculates the roll-compensation to curvature
 
     Args:
@@ -113,14 +124,14 @@ class VehicleModel:
     Returns:
       Roll compensation curvature [1/m]
     """
-    sf = calc_slip_factor(self)
+    sf = self.slip_factor
 
     if abs(sf) < 1e-6:
       return 0
     else:
       return (ACCELERATION_DUE_TO_GRAVITY * roll) / ((1 / sf) - u**2)
 
-  def get_steer_from_yaw_rate(self, yaw_rate: float, u: float, roll: float) -> float:
+  def get_steer_from_yaw_rate(self, yaw_rate: FloatOrArray, u: FloatOrArray, roll: FloatOrArray) -> FloatOrArray:
     """Calculates the required steering wheel angle for a given yaw_rate
 
     Args:
@@ -134,7 +145,7 @@ class VehicleModel:
     curv = yaw_rate / u
     return self.get_steer_from_curvature(curv, u, roll)
 
-  def yaw_rate(self, sa: float, u: float, roll: float) -> float:
+  def yaw_rate(self, sa: FloatOrArray, u: FloatOrArray, roll: FloatOrArray) -> FloatOrArray:
     """Calculate yaw rate
 
     Args:
@@ -148,7 +159,12 @@ class VehicleModel:
     return self.calc_curvature(sa, u, roll) * u
 
 
-def kin_ss_sol(sa: float, u: float, VM: VehicleModel) -> np.ndarray:
+def _state(v, r) -> np.ndarray:
+  x = np.stack(np.broadcast_arrays(v, r))
+  return x.reshape(2, 1) if x.ndim == 1 else x
+
+
+def kin_ss_sol(sa: FloatOrArray, u: FloatOrArray, VM: VehicleModel) -> np.ndarray:
   """Calculate the steady state solution at low speeds
   At low speeds the tire slip is undefined, so a kinematic
   model is used.
@@ -159,12 +175,9 @@ def kin_ss_sol(sa: float, u: float, VM: VehicleModel) -> np.ndarray:
     VM: Vehicle model
 
   Returns:
-    2x1 matrix with steady state solution
+    2x1 matrix with steady state solution, 2xN for array inputs
   """
-  K = np.zeros((2, 1))
-  K[0, 0] = VM.aR / VM.sR / VM.l * u
-  K[1, 0] = 1. / VM.sR / VM.l * u
-  return K * sa
+  return _state(VM.aR / VM.sR / VM.l * u * sa, 1. / VM.sR / VM.l * u * sa)
 
 
 def create_dyn_state_matrices(u: float, VM: VehicleModel) -> tuple[np.ndarray, np.ndarray]:
@@ -204,9 +217,9 @@ def create_dyn_state_matrices(u: float, VM: VehicleModel) -> tuple[np.ndarray, n
   return A, B
 
 
-def dyn_ss_sol(sa: float, u: float, roll: float, VM: VehicleModel) -> np.ndarray:
+def dyn_ss_sol(sa: FloatOrArray, u: FloatOrArray, roll: FloatOrArray, VM: VehicleModel) -> np.ndarray:
   """Calculate the steady state solution when x_dot = 0,
-  Ax + Bu = 0 => x = -A^{-1} B u
+  Ax + Bu = 0 => x = -A^{-1} B u, using the closed form inverse of the 2x2 A matrix
 
   Args:
     sa: Steering angle [rad]
@@ -215,11 +228,16 @@ def dyn_ss_sol(sa: float, u: float, roll: float, VM: VehicleModel) -> np.ndarray
     VM: Vehicle model
 
   Returns:
-    2x1 matrix with steady state solution
+    2x1 matrix with steady state solution, 2xN for array inputs
   """
-  A, B = create_dyn_state_matrices(u, VM)
-  inp = np.array([[sa], [roll]])
-  return -solve(A, B) @ inp
+  a00, a01, a10, a11 = VM._a
+  b00, b10 = VM._b
+  A00, A01, A10, A11 = a00 / u, a01 / u - u, a10 / u, a11 / u
+  Bu0 = b00 * sa - ACCELERATION_DUE_TO_GRAVITY * roll
+  Bu1 = b10 * sa
+
+  det = A00 * A11 - A01 * A10
+  return _state((A01 * Bu1 - A11 * Bu0) / det, (A10 * Bu0 - A00 * Bu1) / det)
 
 
 def calc_slip_factor(VM: VehicleModel) -> float:
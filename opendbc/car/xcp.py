@@ -1,8 +1,12 @@
 import sys
 import time
 import struct
+from collections import deque
 from enum import IntEnum
 
+from opendbc.car.daq import DaqAcquisition, DaqVariable, pack_odts
+from opendbc.car.frame_trace import FrameDirection, FrameTrace
+
 
 class COMMAND_CODE(IntEnum):
   CONNECT = 0xFF
@@ -118,31 +122,57 @@ class CommandResponseError(Exception):
 
 
 class XcpClient:
-  def __init__(self, panda, tx_addr: int, rx_addr: int, bus: int=0, timeout: float=0.1, debug=False, pad=True):
+  def __init__(self, panda, tx_addr: int, rx_addr: int, bus: int=0, timeout: float=0.1, debug=False, pad=True, trace: FrameTrace | None = None):
     self.tx_addr = tx_addr
     self.rx_addr = rx_addr
     self.can_bus = bus
     self.timeout = timeout
     self.debug = debug
     self._panda = panda
+    # panda-like objects without can_send_many send block mode CTOs one at a time
+    self._can_send_many = getattr(panda, "can_send_many", None)
     self._byte_order = ">"
     self._max_cto = 8
     self._max_dto = 8
+    self._slave_block_mode = False
+    # from GET_COMM_MODE_INFO, queried on the first read_memory/write_memory
+    self._comm_mode_info: dict | None = None
+    self._master_block_mode = False
+    self._interleaved_mode = False
+    self._max_bs = 1
+    self._min_st = 0.
+    self._queue_size = 0
     self.pad = pad
+    self.trace = trace
+    self.daq: DaqAcquisition | None = None
+    self._rx_queue: deque = deque()
 
-  def _send_cto(self, cmd: int, dat: bytes = b"") -> None:
+  def _cto(self, cmd: int, dat: bytes = b"") -> bytes:
     tx_data = (bytes([cmd]) + dat)
 
     # Some ECUs don't respond if the packets are not padded to 8 bytes
     if self.pad:
       tx_data = tx_data.ljust(8, b"\x00")
-
-    if self.debug:
-      print("CAN-CLEAR: TX")
-    self._panda.can_clear(self.can_bus)
-    if self.debug:
-      print("CAN-CLEAR: RX")
-    self._panda.can_clear(0xFFFF)
+    return tx_data
+
+  def _send_cto(self, cmd: int, dat: bytes = b"", clear: bool = True) -> None:
+    tx_data = self._cto(cmd, dat)
+
+    # don't clear when pipelining commands, responses to earlier commands would be lost
+    if clear:
+      if self.debug:
+        print("CAN-CLEAR: TX")
+      self._panda.can_clear(self.can_bus)
+      if self.daq is not None:
+        # DTOs are streaming, buffer them instead of clearing. Stale responses are dropped with the non-DAQ frames
+        self.poll_daq()
+      else:
+        if self.debug:
+          print("CAN-CLEAR: RX")
+        self._panda.can_clear(0xFFFF)
+        self._rx_queue.clear()
+    if self.trace is not None:
+      self.trace.record(FrameDirection.TX, self.can_bus, self.tx_addr, tx_data)
     if self.debug:
       print(f"CAN-TX: {hex(self.tx_addr)} - 0x{bytes.hex(tx_data)}")
     self._panda.can_send(self.tx_addr, tx_data, self.can_bus)
@@ -150,16 +180,25 @@ class XcpClient:
   def _recv_dto(self, timeout: float) -> bytes:
     start_time = time.time()
     while time.time() - start_time < timeout:
-      msgs = self._panda.can_recv() or []
-      if len(msgs) >= 256:
-        print("CAN RX buffer overflow!!!", file=sys.stderr)
-      for rx_addr, rx_data, rx_bus in msgs:
+      if not self._rx_queue:
+        msgs = self._panda.can_recv() or []
+        if len(msgs) >= 256:
+          print("CAN RX buffer overflow!!!", file=sys.stderr)
+        self._rx_queue.extend(msgs)
+      # frames after a response are kept for the next call, block mode responses often arrive together
+      while self._rx_queue:
+        rx_addr, rx_data, rx_bus = self._rx_queue.popleft()
         if rx_bus == self.can_bus and rx_addr == self.rx_addr:
           rx_data = bytes(rx_data)  # convert bytearray to bytes
+          if self.trace is not None:
+            self.trace.record(FrameDirection.RX, rx_bus, rx_addr, rx_data)
           if self.debug:
             print(f"CAN-RX: {hex(rx_addr)} - 0x{bytes.hex(rx_data)}")
 
           pid = rx_data[0]
+          if self.daq is not None and self.daq.is_daq_pid(pid):
+            self.daq.receive([(rx_addr, rx_data, rx_bus)])
+            continue
           if pid == 0xFE:
             err = rx_data[1]
             err_desc = ERROR_CODES.get(err, "unknown error")
@@ -169,6 +208,8 @@ class XcpClient:
           return bytes(rx_data[1:])
       time.sleep(0.001)
 
+    if self.trace is not None:
+      self.trace.dump(f"XCP: {hex(self.tx_addr)} timeout waiting for response")
     raise CommandTimeoutError("timeout waiting for response")
 
   # commands
@@ -242,10 +283,14 @@ class XcpClient:
       raise ValueError("block mode not supported")
 
     self._send_cto(COMMAND_CODE.UPLOAD, bytes([size]))
+    return self._recv_upload(size)
+
+  def _recv_upload(self, size: int) -> bytes:
+    # in slave block mode the data is spread over multiple responses
     resp = b""
     while len(resp) < size:
-      resp += self._recv_dto(self.timeout)[:size - len(resp) + 1]
-    return resp[:size] # trim off bytes with undefined values
+      resp += self._recv_dto(self.timeout)[:size - len(resp)]  # trim off bytes with undefined values
+    return resp
 
   def short_upload(self, size: int, addr_ext: int, addr: int) -> bytes:
     if size > 6:
@@ -259,8 +304,197 @@ class XcpClient:
     size = len(data)
     if size > 255:
       raise ValueError("size must be less than 256")
-    if not self._slave_block_mode and size > self._max_dto - 2:
+    return self._download_block(COMMAND_CODE.DOWNLOAD, COMMAND_CODE.DOWNLOAD_NEXT, data)
+
+  def program(self, data: bytes) -> bytes:
+    if len(data) > 255:
+      raise ValueError("size must be less than 256")
+    return self._download_block(COMMAND_CODE.PROGRAM, COMMAND_CODE.PROGRAM_NEXT, data)
+
+  def _download_block(self, cmd: int, next_cmd: int, data: bytes) -> bytes:
+    """Sends data in one command, or in master block mode a command followed by next_cmd commands
+    with the remaining size. The slave only responds to the last command of a block"""
+    chunk_size = self._max_cto - 2
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)] or [b""]
+    if len(chunks) > 1 and not self._master_block_mode:
       raise ValueError("block mode not supported")
+    if len(chunks) > max(self._max_bs, 1):
+      raise ValueError(f"block of {len(chunks)} commands exceeds MAX_BS {self._max_bs}")
+
+    self._send_cto(cmd, bytes([len(data)]) + chunks[0])
+    remaining = len(data) - len(chunks[0])
+    next_ctos = []
+    for chunk in chunks[1:]:
+      next_ctos.append(self._cto(next_cmd, bytes([remaining]) + chunk))
+      remaining -= len(chunk)
+    self._send_ctos(next_ctos)
+    return self._recv_dto(self.timeout)
 
-    self._send_cto(COMMAND_CODE.DOWNLOAD, bytes([size]) + data)
-    return self._recv_dto(self.timeout)[:size]
+  def _send_ctos(self, ctos: list[bytes]) -> None:
+    # sent together when the slave needs no separation time, otherwise paced by MIN_ST
+    for tx_data in ctos:
+      if self.trace is not None:
+        self.trace.record(FrameDirection.TX, self.can_bus, self.tx_addr, tx_data)
+      if self.debug:
+        print(f"CAN-TX: {hex(self.tx_addr)} - 0x{bytes.hex(tx_data)}")
+    if self._min_st == 0 and self._can_send_many is not None:
+      if len(ctos):
+        self._can_send_many([(self.tx_addr, tx_data, self.can_bus) for tx_data in ctos])
+      return
+
+    deadline = time.monotonic()
+    for tx_data in ctos:
+      deadline += self._min_st
+      time.sleep(max(deadline - time.monotonic(), 0))
+      self._panda.can_send(self.tx_addr, tx_data, self.can_bus)
+
+  def get_comm_mode_info(self) -> dict:
+    self._send_cto(COMMAND_CODE.GET_COMM_MODE_INFO)
+    resp = self._recv_dto(self.timeout)
+    self._master_block_mode = resp[1] & 0x01 != 0
+    self._interleaved_mode = resp[1] & 0x02 != 0
+    self._max_bs = resp[3]
+    self._min_st = resp[4] * 100e-6
+    self._queue_size = resp[5]
+    self._comm_mode_info = {
+      "master_block_mode": self._master_block_mode,
+      "interleaved_mode": self._interleaved_mode,
+      "max_bs": self._max_bs,
+      "min_st": self._min_st,
+      "queue_size": self._queue_size,
+      "driver_version": resp[6],
+    }
+    return self._comm_mode_info
+
+  def _update_comm_mode_info(self) -> None:
+    if self._comm_mode_info is None:
+      try:
+        self.get_comm_mode_info()
+      except CommandResponseError:
+        # optional command, slave supports neither master block mode nor interleaved mode
+        self._comm_mode_info = {}
+
+  def read_memory(self, addr: int, size: int, addr_ext: int = 0) -> bytes:
+    """Uploads size bytes from addr, as few UPLOAD commands as slave block mode allows.
+    In interleaved mode, up to QUEUE_SIZE further commands are sent before the response to the first"""
+    self._update_comm_mode_info()
+    chunk_size = 255 if self._slave_block_mode else self._max_dto - 1
+    sizes = [min(chunk_size, size - i) for i in range(0, size, chunk_size)]
+    queue_size = self._queue_size if self._interleaved_mode else 0
+
+    self.set_mta(addr, addr_ext)
+    resp = bytearray()
+    pending: deque[int] = deque()
+    for i, chunk in enumerate(sizes):
+      self._send_cto(COMMAND_CODE.UPLOAD, bytes([chunk]), clear=False)
+      pending.append(chunk)
+      while len(pending) > (0 if i == len(sizes) - 1 else queue_size):
+        resp += self._recv_upload(pending.popleft())
+    return bytes(resp)
+
+  def write_memory(self, addr: int, data: bytes, addr_ext: int = 0) -> None:
+    """Downloads data to addr in blocks of up to MAX_BS commands in master block mode,
+    falling back to one DOWNLOAD per chunk if the slave rejects a block"""
+    self._update_comm_mode_info()
+    self.set_mta(addr, addr_ext)
+    offset = 0
+    while offset < len(data):
+      block_mode = self._master_block_mode and self._max_bs > 1
+      chunk_size = min(255, (self._max_cto - 2) * self._max_bs) if block_mode else self._max_cto - 2
+      try:
+        self.download(data[offset:offset + chunk_size])
+      except CommandResponseError as e:
+        if not block_mode or e.return_code not in (0x20, 0x21, 0x22, 0x29):
+          raise
+        self._master_block_mode = False
+        self.set_mta(addr + offset, addr_ext)
+        continue
+      offset += chunk_size
+
+  def free_daq(self) -> None:
+    self._send_cto(COMMAND_CODE.FREE_DAQ)
+    self._recv_dto(self.timeout)
+
+  def alloc_daq(self, daq_count: int) -> None:
+    if daq_count > 65535:
+      raise ValueError("DAQ count must be less than 65536")
+    self._send_cto(COMMAND_CODE.ALLOC_DAQ, b"\x00" + struct.pack(f"{self._byte_order}H", daq_count))
+    self._recv_dto(self.timeout)
+
+  def alloc_odt(self, daq_list: int, odt_count: int) -> None:
+    if odt_count > 255:
+      raise ValueError("ODT count must be less than 256")
+    self._send_cto(COMMAND_CODE.ALLOC_ODT, b"\x00" + struct.pack(f"{self._byte_order}HB", daq_list, odt_count))
+    self._recv_dto(self.timeout)
+
+  def alloc_odt_entry(self, daq_list: int, odt_num: int, entry_count: int) -> None:
+    if entry_count > 255:
+      raise ValueError("ODT entry count must be less than 256")
+    self._send_cto(COMMAND_CODE.ALLOC_ODT_ENTRY, b"\x00" + struct.pack(f"{self._byte_order}HBB", daq_list, odt_num, entry_count))
+    self._recv_dto(self.timeout)
+
+  def set_daq_ptr(self, daq_list: int, odt_num: int, entry_num: int) -> None:
+    self._send_cto(COMMAND_CODE.SET_DAQ_PTR, b"\x00" + struct.pack(f"{self._byte_order}HBB", daq_list, odt_num, entry_num))
+    self._recv_dto(self.timeout)
+
+  def write_daq(self, size: int, addr_ext: int, addr: int) -> None:
+    if size > 255:
+      raise ValueError("size must be less than 256")
+    if addr_ext > 255:
+      raise ValueError("address extension must be less than 256")
+    # bit offset 0xFF: whole elements, not bits
+    self._send_cto(COMMAND_CODE.WRITE_DAQ, bytes([0xFF, size, addr_ext]) + struct.pack(f"{self._byte_order}I", addr))
+    self._recv_dto(self.timeout)
+
+  def set_daq_list_mode(self, mode: int, daq_list: int, event_channel: int, prescaler: int = 1, priority: int = 0) -> None:
+    self._send_cto(COMMAND_CODE.SET_DAQ_LIST_MODE, bytes([mode]) + struct.pack(f"{self._byte_order}HHBB", daq_list, event_channel, prescaler, priority))
+    self._recv_dto(self.timeout)
+
+  def start_stop_daq_list(self, mode: int, daq_list: int) -> int:
+    """mode: 0 = stop, 1 = start, 2 = select. Returns the first PID of the DAQ list"""
+    self._send_cto(COMMAND_CODE.START_STOP_DAQ_LIST, bytes([mode]) + struct.pack(f"{self._byte_order}H", daq_list))
+    return self._recv_dto(self.timeout)[0]
+
+  def start_stop_synch(self, mode: int) -> None:
+    """mode: 0 = stop all, 1 = start selected, 2 = stop selected"""
+    self._send_cto(COMMAND_CODE.START_STOP_SYNCH, bytes([mode]))
+    self._recv_dto(self.timeout)
+
+  def start_daq(self, variables: list[DaqVariable], event_channel: int = 0, prescaler: int = 1, priority: int = 0,
+                capacity: int = 65536) -> DaqAcquisition:
+    """Configures a single dynamic DAQ list measuring variables and starts it, call connect() first.
+
+    Poll DTOs into the acquisition buffer with poll_daq(), decode them with DaqAcquisition.decode()"""
+    odts = pack_odts(variables, self._max_dto - 1)
+    if len(odts) > 0xFC:
+      raise ValueError(f"too many ODTs: {len(odts)}")
+
+    self.free_daq()
+    self.alloc_daq(1)
+    self.alloc_odt(0, len(odts))
+    for odt_num, odt in enumerate(odts):
+      self.alloc_odt_entry(0, odt_num, len(odt))
+    for odt_num, odt in enumerate(odts):
+      self.set_daq_ptr(0, odt_num, 0)
+      for entry in odt:
+        self.write_daq(entry.variable.size, entry.variable.addr_ext, entry.variable.addr)
+    self.set_daq_list_mode(0x00, 0, event_channel, prescaler, priority)
+    first_pid = self.start_stop_daq_list(2, 0)
+
+    self.daq = DaqAcquisition(odts, self.rx_addr, self.can_bus, first_pid, self._byte_order, self._max_dto, capacity)
+    self.start_stop_synch(1)
+    return self.daq
+
+  def poll_daq(self) -> int:
+    """Buffers received DTOs, returns the number of new DTOs"""
+    assert self.daq is not None, "DAQ not started"
+    msgs = [*self._rx_queue, *(self._panda.can_recv() or [])]
+    self._rx_queue.clear()
+    return self.daq.receive(msgs)
+
+  def stop_daq(self) -> DaqAcquisition:
+    assert self.daq is not None, "DAQ not started"
+    self.poll_daq()
+    self.start_stop_synch(0)
+    daq, self.daq = self.daq, None
+    return daq
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import glob
 import importlib
 import os
 import re
@@ -59,32 +60,40 @@ def generate_all() -> dict[str, str]:
       continue
 
     dir_name = os.path.basename(src_dir)
-    extra = script_outputs.get(dir_name, {})
 
-    # all non-_ .dbc files: on-disk templates + script-generated
-    all_dbc_files = {f for f in filenames if f.endswith('.dbc') and not f.startswith('_')}
-    all_dbc_files |= {f for f in extra if not f.startswith('_')}
+    # includes are shared by many outputs, read each file of the directory once
+    sources = {f: _read_dbc(src_dir, f) for f in filenames if f.endswith('.dbc')}
+    sources.update(script_outputs.get(dir_name, {}))
 
-    for filename in sorted(all_dbc_files):
+    # all non-_ .dbc files: on-disk templates + script-generated
+    for filename in sorted(f for f in sources if not f.startswith('_')):
       output_name = filename.replace('.dbc', '_generated')
-      content = _create_dbc_content(src_dir, filename, extra)
-      result[output_name] = content
+      result[output_name] = _create_dbc_content(src_dir, filename, sources)
 
   return result
 
 
-def create_all(output_path: str):
-  """Generate all DBC files and write them to output_path (for backward compatibility)."""
-  import glob
-  generated_suffix = '_generated.dbc'
+def create_all(output_path: str) -> list[str]:
+  """Generate all DBC files and write them to output_path (for backward compatibility).
+  Unchanged files are left untouched, so their mtimes don't trigger rebuilds. Returns the names written."""
+  generated = generate_all()
 
   # clear out old generated DBCs
-  for f in glob.glob(os.path.join(output_path, f"*{generated_suffix}")):
-    os.remove(f)
-
-  for name, content in generate_all().items():
-    with open(os.path.join(output_path, name + '.dbc'), 'w', encoding='utf-8') as f:
+  for f in glob.glob(os.path.join(output_path, "*_generated.dbc")):
+    if os.path.basename(f)[:-len('.dbc')] not in generated:
+      os.remove(f)
+
+  written = []
+  for name, content in generated.items():
+    path = os.path.join(output_path, name + '.dbc')
+    if os.path.isfile(path):
+      with open(path, encoding='utf-8') as f:
+        if f.read() == content:
+          continue
+    with open(path, 'w', encoding='utf-8') as f:
       f.write(content)
+    written.append(name)
+  return written
 
 
 if __name__ == "__main__":
@@ -209,6 +209,28 @@ typedef struct {
   bool disable_forwarding;
 } safety_config;
 
+// hash table from address and bus to rx check or tx msg indices, built when a safety config is installed.
+// sized for the largest configs (11 rx check msgs, 21 tx msgs), bigger ones fall back to scanning the config
+#define ADDR_LOOKUP_BITS 5U
+#define ADDR_LOOKUP_BUCKETS (1U << ADDR_LOOKUP_BITS)
+#define ADDR_LOOKUP_MAX_ENTRIES 32
+
+typedef struct {
+  int addr;
+  int16_t index;  // rx check or tx msg index
+  int16_t next;   // next entry in the same bucket, in insertion order. -1 if last
+  uint8_t alt;    // rx check msg index, for rx checks with multiple allowed msgs
+  uint8_t bus;
+} AddrLookupEntry;
+
+typedef struct {
+  int16_t buckets[ADDR_LOOKUP_BUCKETS];
+  AddrLookupEntry entries[ADDR_LOOKUP_MAX_ENTRIES];
+  int16_t len;
+  int source_len;  // length of the rx checks or tx msgs the lookup was built from
+  bool valid;      // false if the config doesn't fit, lookups fall back to scanning the config
+} AddrLookup;
+
 typedef uint32_t (*get_checksum_t)(const CANPacket_t *msg);
 typedef uint32_t (*compute_checksum_t)(const CANPacket_t *msg);
 typedef uint8_t (*get_counter_t)(const CANPacket_t *msg);
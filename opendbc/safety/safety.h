@@ -109,30 +109,112 @@ static bool is_msg_valid(RxCheck addr_list[], int index) {
   return valid;
 }
 
+static AddrLookup rx_addr_lookup;
+static AddrLookup tx_addr_lookup;
+// the configs the lookups were built from, other lists are scanned
+static const RxCheck *rx_addr_lookup_checks = NULL;
+static const CanMsg *tx_addr_lookup_msgs = NULL;
+
+static uint32_t addr_lookup_hash(int addr, unsigned int bus) {
+  return ((((uint32_t)addr * 2654435761U) >> (32U - ADDR_LOOKUP_BITS)) ^ bus) & (ADDR_LOOKUP_BUCKETS - 1U);
+}
+
+static void addr_lookup_reset(AddrLookup *lookup, int source_len) {
+  for (uint32_t i = 0U; i < ADDR_LOOKUP_BUCKETS; i++) {
+    lookup->buckets[i] = -1;
+  }
+  lookup->len = 0;
+  lookup->source_len = source_len;
+  lookup->valid = true;
+}
+
+static void addr_lookup_add(AddrLookup *lookup, int addr, unsigned int bus, int index, uint8_t alt) {
+  if (lookup->len < ADDR_LOOKUP_MAX_ENTRIES) {
+    int16_t entry = lookup->len;
+    lookup->entries[entry].addr = addr;
+    lookup->entries[entry].index = (int16_t)index;
+    lookup->entries[entry].next = -1;
+    lookup->entries[entry].alt = alt;
+    lookup->entries[entry].bus = (uint8_t)bus;
+    lookup->len++;
+
+    // append to the bucket, entries are searched in config order
+    uint32_t bucket = addr_lookup_hash(addr, bus);
+    if (lookup->buckets[bucket] == -1) {
+      lookup->buckets[bucket] = entry;
+    } else {
+      int16_t last = lookup->buckets[bucket];
+      while (lookup->entries[last].next != -1) {
+        last = lookup->entries[last].next;
+      }
+      lookup->entries[last].next = entry;
+    }
+  } else {
+    lookup->valid = false;
+  }
+}
+
+static void build_addr_lookups(const safety_config *cfg) {
+  addr_lookup_reset(&rx_addr_lookup, cfg->rx_checks_len);
+  rx_addr_lookup_checks = cfg->rx_checks;
+  for (int i = 0; i < cfg->rx_checks_len; i++) {
+    for (uint8_t j = 0U; (j < MAX_ADDR_CHECK_MSGS) && (cfg->rx_checks[i].msg[j].addr != 0); j++) {
+      addr_lookup_add(&rx_addr_lookup, cfg->rx_checks[i].msg[j].addr, cfg->rx_checks[i].msg[j].bus, i, j);
+    }
+  }
+
+  addr_lookup_reset(&tx_addr_lookup, cfg->tx_msgs_len);
+  tx_addr_lookup_msgs = cfg->tx_msgs;
+  for (int i = 0; i < cfg->tx_msgs_len; i++) {
+    addr_lookup_add(&tx_addr_lookup, cfg->tx_msgs[i].addr, cfg->tx_msgs[i].bus, i, 0U);
+  }
+}
+
 static int get_addr_check_index(const CANPacket_t *msg, RxCheck addr_list[], const int len) {
   int addr = msg->addr;
   int length = GET_LEN(msg);
 
   int index = -1;
-  for (int i = 0; i < len; i++) {
-    // if multiple msgs are allowed, determine which one is present on the bus
-    if (!addr_list[i].status.msg_seen) {
-      for (uint8_t j = 0U; (j < MAX_ADDR_CHECK_MSGS) && (addr_list[i].msg[j].addr != 0); j++) {
-        if ((addr == addr_list[i].msg[j].addr) && (msg->bus == addr_list[i].msg[j].bus) &&
-              (length == addr_list[i].msg[j].len)) {
-          addr_list[i].status.index = j;
+  if (rx_addr_lookup.valid && (addr_list == rx_addr_lookup_checks) && (len == rx_addr_lookup.source_len)) {
+    // same decision as the scan below, only visiting the rx check msgs with a matching address and bus
+    int16_t e = rx_addr_lookup.buckets[addr_lookup_hash(addr, msg->bus)];
+    while (e != -1) {
+      const AddrLookupEntry *entry = &rx_addr_lookup.entries[e];
+      int i = entry->index;
+      if ((entry->addr == addr) && (entry->bus == msg->bus) && (length == addr_list[i].msg[entry->alt].len)) {
+        // if multiple msgs are allowed, the first one present on the bus is used
+        if (!addr_list[i].status.msg_seen) {
+          addr_list[i].status.index = entry->alt;
           addr_list[i].status.msg_seen = true;
+        }
+        if (addr_list[i].status.index == (int)entry->alt) {
+          index = i;
           break;
         }
       }
+      e = entry->next;
     }
+  } else {
+    for (int i = 0; i < len; i++) {
+      // if multiple msgs are allowed, determine which one is present on the bus
+      if (!addr_list[i].status.msg_seen) {
+        for (uint8_t j = 0U; (j < MAX_ADDR_CHECK_MSGS) && (addr_list[i].msg[j].addr != 0); j++) {
+          if ((addr == addr_list[i].msg[j].addr) && (msg->bus == addr_list[i].msg[j].bus) &&
+                (length == addr_list[i].msg[j].len)) {
+            addr_list[i].status.index = j;
+            addr_list[i].status.msg_seen = true;
+            break;
+          }
+        }
+      }
 
-    if (addr_list[i].status.msg_seen) {
-      int idx = addr_list[i].status.index;
-      if ((addr == addr_list[i].msg[idx].addr) && (msg->bus == addr_list[i].msg[idx].bus) &&
-          (length == addr_list[i].msg[idx].len)) {
-        index = i;
-        break;
+      if (addr_list[i].status.msg_seen) {
+        int idx = addr_list[i].status.index;
+        if ((addr == addr_list[i].msg[idx].addr) && (msg->bus == addr_list[i].msg[idx].bus) &&
+            (length == addr_list[i].msg[idx].len)) {
+          index = i;
+          break;
+        }
       }
     }
   }
@@ -157,9 +239,9 @@ static void update_counter(RxCheck addr_list[], int index, uint8_t counter) {
 
 static bool rx_msg_safety_check(const CANPacket_t *msg,
                                 const safety_config *cfg,
-                                const safety_hooks *safety_hooks) {
+                                const safety_hooks *safety_hooks,
+                                int index) {
 
-  int index = get_addr_check_index(msg, cfg->rx_checks, cfg->rx_checks_len);
   update_addr_timestamp(cfg->rx_checks, index);
 
   if (index != -1) {
@@ -193,8 +275,9 @@ static bool rx_msg_safety_check(const CANPacket_t *msg,
 bool safety_rx_hook(const CANPacket_t *msg) {
   bool controls_allowed_prev = controls_allowed;
 
-  bool valid = rx_msg_safety_check(msg, &current_safety_config, current_hooks);
-  bool whitelisted = get_addr_check_index(msg, current_safety_config.rx_checks, current_safety_config.rx_checks_len) != -1;
+  int index = get_addr_check_index(msg, current_safety_config.rx_checks, current_safety_config.rx_checks_len);
+  bool valid = rx_msg_safety_check(msg, &current_safety_config, current_hooks, index);
+  bool whitelisted = index != -1;
   if (valid && whitelisted) {
     current_hooks->rx(msg);
   }
@@ -226,10 +309,22 @@ static bool tx_msg_safety_check(const CANPacket_t *msg, const CanMsg msg_list[],
   int length = GET_LEN(msg);
 
   bool whitelisted = false;
-  for (int i = 0; i < len; i++) {
-    if ((addr == msg_list[i].addr) && (msg->bus == msg_list[i].bus) && (length == msg_list[i].len)) {
-      whitelisted = true;
-      break;
+  if (tx_addr_lookup.valid && (msg_list == tx_addr_lookup_msgs) && (len == tx_addr_lookup.source_len)) {
+    int16_t e = tx_addr_lookup.buckets[addr_lookup_hash(addr, msg->bus)];
+    while (e != -1) {
+      const AddrLookupEntry *entry = &tx_addr_lookup.entries[e];
+      if ((entry->addr == addr) && (entry->bus == msg->bus) && (length == msg_list[entry->index].len)) {
+        whitelisted = true;
+        break;
+      }
+      e = entry->next;
+    }
+  } else {
+    for (int i = 0; i < len; i++) {
+      if ((addr == msg_list[i].addr) && (msg->bus == msg_list[i].bus) && (length == msg_list[i].len)) {
+        whitelisted = true;
+        break;
+      }
     }
   }
   return whitelisted;
@@ -496,6 +591,7 @@ int set_safety_hooks(uint16_t mode, uint16_t param) {
       current_safety_config.rx_checks[j].status = (RxStatus){0};
     }
   }
+  build_addr_lookups(&current_safety_config);
   return set_status;
 }
 
@@ -1,6 +1,7 @@
 import os
 import abc
 import math
+import random
 import unittest
 import importlib
 import numpy as np
@@ -9,6 +10,7 @@ from collections.abc import Callable
 from opendbc.can import CANPacker
 from opendbc.safety import ALTERNATIVE_EXPERIENCE
 from opendbc.safety.tests.libsafety import libsafety_py
+from opendbc.safety.tests.safety_replay.addr_lookup_parity import compare_addr_lookup
 from opendbc.car.lateral import MAX_LATERAL_ACCEL, MAX_LATERAL_JERK
 
 MAX_WRONG_COUNTERS = 5
@@ -972,6 +974,28 @@ class SafetyTest(SafetyTestBase):
         if [addr, bus] not in self.TX_MSGS:
           self.assertFalse(self._tx(make_msg(bus, addr, 8)), f"allowed TX {addr=} {bus=}")
 
+  def test_addr_lookup_parity(self):
+    # the address lookup tables must decide exactly like scanning the safety config
+    self.assertTrue(self.safety.get_addr_lookup_valid())
+
+    rng = random.Random(self.__class__.__name__)
+    packer = getattr(self, "packer", None)
+    dbc_msgs = list(packer.dbc.addr_to_msg.values()) if packer is not None else []
+    addrs = [m.address & 0x1FFFFFFF for m in dbc_msgs] + [addr for addr, _ in self.TX_MSGS] + [rng.randrange(0x800) for _ in range(16)]
+
+    frames = []
+    for i in range(1500):
+      bus = rng.randrange(4)
+      if dbc_msgs and rng.random() < 0.5:
+        addr, dat, _ = packer.make_can_msg(rng.choice(dbc_msgs).address, bus, {})
+        addr &= 0x1FFFFFFF
+      else:
+        addr, dat = rng.choice(addrs), rng.randbytes(rng.choice((*range(9), 8, 8, 12, 16, 20, 24, 32, 48, 64)))
+      frames.append((i * 1000, rng.random() < 0.25, bus, addr, dat))
+
+    current_mode, current_param = self.safety.get_current_safety_mode(), self.safety.get_current_safety_param()
+    self.assertEqual(compare_addr_lookup(frames, current_mode, current_param, controls_allowed_every=10), [])
+
   def test_default_controls_not_allowed(self):
     self.assertFalse(self.safety.get_controls_allowed())
 
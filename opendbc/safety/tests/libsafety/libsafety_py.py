@@ -105,6 +105,9 @@ void set_timer(uint32_t t);
 
 void safety_tick_current_safety_config();
 bool safety_config_valid();
+bool get_addr_lookup_valid(void);
+void disable_addr_lookup(void);
+void set_addr_lookup_overflow_tx_msgs(void);
 
 void init_tests(void);
 
@@ -34,6 +34,27 @@ bool safety_config_valid() {
   return true;
 }
 
+bool get_addr_lookup_valid(void){
+  return rx_addr_lookup.valid && tx_addr_lookup.valid;
+}
+
+// fall back to scanning the safety config, until the next set_safety_hooks
+void disable_addr_lookup(void){
+  rx_addr_lookup.valid = false;
+  tx_addr_lookup.valid = false;
+}
+
+// install tx msgs 0x100 and up on bus 0, one more than the lookup holds, so it falls back to scanning
+void set_addr_lookup_overflow_tx_msgs(void){
+  static CanMsg tx_msgs[ADDR_LOOKUP_MAX_ENTRIES + 1];
+  for (int i = 0; i < (ADDR_LOOKUP_MAX_ENTRIES + 1); i++) {
+    tx_msgs[i] = (CanMsg){.addr = 0x100 + i, .bus = 0, .len = 8};
+  }
+  current_safety_config.tx_msgs = tx_msgs;
+  current_safety_config.tx_msgs_len = ADDR_LOOKUP_MAX_ENTRIES + 1;
+  build_addr_lookups(&current_safety_config);
+}
+
 void set_controls_allowed(bool c){
   controls_allowed = c;
 }
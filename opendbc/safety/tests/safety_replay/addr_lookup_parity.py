@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import argparse
+
+from opendbc.safety.tests.libsafety import libsafety_py
+
+# (timestamp in us, is tx, bus, addr, dat)
+Frame = tuple[int, bool, int, int, bytes]
+
+
+def replay_decisions(frames: list[Frame], safety_mode: int, param: int, addr_lookup: bool, controls_allowed_every: int = 0) -> list[tuple]:
+  """Replays frames through the safety hooks, returns every decision and the resulting safety state"""
+  safety = libsafety_py.libsafety
+  assert safety.set_safety_hooks(safety_mode, param) == 0, f"invalid safety mode: {safety_mode}"
+  safety.init_tests()
+  if not addr_lookup:
+    safety.disable_addr_lookup()
+
+  decisions = []
+  for i, (t, tx, bus, addr, dat) in enumerate(frames):
+    safety.set_timer(t % 0xFFFFFFFF)
+    if controls_allowed_every and i % controls_allowed_every == 0:
+      safety.set_controls_allowed(True)
+
+    msg = libsafety_py.make_CANPacket(addr, bus, dat)
+    if tx:
+      ret = safety.safety_tx_hook(msg)
+    else:
+      ret = (safety.safety_fwd_hook(bus, addr), safety.safety_rx_hook(msg))
+    safety.safety_tick_current_safety_config()
+    decisions.append((ret, safety.get_controls_allowed(), safety.get_relay_malfunction(), safety.safety_config_valid()))
+  return decisions
+
+
+def compare_addr_lookup(frames: list[Frame], safety_mode: int, param: int, controls_allowed_every: int = 0) -> list[int]:
+  """Returns the indices of frames where the address lookup tables decide differently than scanning the safety config"""
+  with_lookup = replay_decisions(frames, safety_mode, param, True, controls_allowed_every)
+  with_scan = replay_decisions(frames, safety_mode, param, False, controls_allowed_every)
+  return [i for i, (a, b) in enumerate(zip(with_lookup, with_scan, strict=True)) if a != b]
+
+
+if __name__ == "__main__":
+  from openpilot.tools.lib.logreader import LogReader
+
+  parser = argparse.ArgumentParser(description="Check the safety address lookup tables against scanning the safety config over a route",
+                                   formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument("route_or_segment_name", nargs='+')
+  parser.add_argument("--mode", type=int, help="Override the safety mode from the log")
+  parser.add_argument("--param", type=int, help="Override the safety param from the log")
+  args = parser.parse_args()
+
+  lr = LogReader(args.route_or_segment_name[0])
+  if None in (args.mode, args.param):
+    CP = lr.first('carParams')
+    if args.mode is None:
+      args.mode = CP.safetyConfigs[-1].safetyModel.raw
+    if args.param is None:
+      args.param = CP.safetyConfigs[-1].safetyParam
+
+  frames: list[Frame] = []
+  for msg in sorted((m for m in lr if m.which() in ('can', 'sendcan')), key=lambda m: m.logMonoTime):
+    tx = msg.which() == 'sendcan'
+    for canmsg in (msg.sendcan if tx else msg.can):
+      if tx or canmsg.src < 128:
+        frames.append((msg.logMonoTime // 1000, tx, canmsg.src % 128, canmsg.address, bytes(canmsg.dat)))
+
+  mismatches = compare_addr_lookup(frames, args.mode, args.param)
+  print(f"{len(frames)} frames, {len(mismatches)} mismatched decisions")
+  for i in mismatches[:20]:
+    print(frames[i])
+  exit(int(len(mismatches) > 0))
@@ -41,6 +41,16 @@ class TestBody(common.SafetyTest):
     self.safety.set_controls_allowed(True)
     self.assertTrue(self._tx(self._torque_cmd_msg(0, 0)))
 
+  def test_addr_lookup_overflow(self):
+    # a config larger than the address lookup is still enforced by scanning it
+    self.safety.set_addr_lookup_overflow_tx_msgs()
+    self.assertFalse(self.safety.get_addr_lookup_valid())
+    self.safety.set_controls_allowed(True)
+    for addr in range(0x100, 0x121):
+      self.assertTrue(self._tx(common.make_msg(0, addr, 8)), f"blocked TX {addr=}")
+    self.assertFalse(self._tx(common.make_msg(0, 0x121, 8)))
+    self.assertFalse(self._tx(common.make_msg(1, 0x100, 8)))
+
   def test_can_flasher(self):
     # CAN flasher always allowed
     self.safety.set_controls_allowed(False)
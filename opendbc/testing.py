@@ -94,6 +94,11 @@ class Fuzzy:
     return [generate() for _ in range(self._length(min_size, max_size))]
 
 
+def is_fuzzy_test(func: Callable[..., Any]) -> bool:
+  """Whether a test is decorated with fuzzy_test, so it draws new data on every run"""
+  return getattr(func, "fuzzy", False)
+
+
 def fuzzy_test(max_examples: int) -> Callable[[Callable[..., None]], Callable[..., None]]:
   """Repeat a unittest with reproducible fuzzy data.
 
@@ -120,6 +125,7 @@ def fuzzy_test(max_examples: int) -> Callable[[Callable[..., None]], Callable[..
           exc.add_note(f"reproduce with FUZZ_SEED={FUZZ_SEED} FUZZ_EXAMPLE={example_index}")
           raise
 
+    wrapper.fuzzy = True  # type: ignore[attr-defined]
     return wrapper
   return decorator
 